@@ -0,0 +1,279 @@
+"""
+Measure the extraction backends offline on saved review panels and search feeds.
+
+Review panels are parsed with every backend that works without a browser:
+  bs4      parse_review_html on the outerHTML of each review element (what the scraper
+           gets from WebDriver, split from the snapshot before timing)
+  network  decode_review_batch on the recorded listugcposts responses of the same reviews
+Search feeds are read from the rendered feed HTML (anchor hrefs + dedupe_place_links, as
+locationScrapper does) and from the HTTP payload (parse_place_links).
+
+  js       extract_reviews_js, the in-browser extractor, on the fixture page loaded in
+           headless Chrome (only with --chrome; needs chromedriver where driver_pool
+           expects it). The scripted browser of the load harness answers that script with
+           parse_review_html, so this is the only check of the script itself.
+
+For every fixture and backend the best of --repeat runs gives reviews/sec (places/sec for
+feeds), and one extra run under tracemalloc gives the peak Python memory. The backends'
+outputs are compared field by field (js against bs4 on every field but raw_html, whose
+serialization differs between Chrome and BeautifulSoup); any difference, or a throughput drop beyond
+--tolerance against a --baseline file, makes the script exit with status 1.
+
+Fixtures are read from benchmarks/fixtures; the synthetic_* ones (20, 500 and 5000
+reviews and a 120 place feed) are generated on first run. Real snapshots can be added next
+to them as <name>.html with the recorded responses in <name>.network.jsonl (one JSON string
+per line), and feeds as <name>feed<...>.html with the HTTP payload in <name>.payload.html.
+
+Usage:
+    python benchmarks/extraction_benchmark.py
+    python benchmarks/extraction_benchmark.py --repeat 5 --save baseline.json
+    python benchmarks/extraction_benchmark.py --baseline baseline.json --tolerance 0.15
+    python benchmarks/extraction_benchmark.py --chrome --only reviews
+"""
+import argparse
+import glob
+import json
+import os
+import pathlib
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from fixtures import FIXTURE_DIR, ensure_fixtures
+from http_discovery import parse_place_links
+from place_identity import canonical_place_id, dedupe_place_links
+from review_extraction import extract_reviews_js, parse_review_html
+from review_network import decode_review_batch
+
+
+REVIEW_SELECTOR = ".jftiEf.fontBodyMedium"
+FEED_LINK_SELECTOR = 'div[role="feed"] a[href*="/place/"]'
+NETWORK_URL = "https://www.google.com/maps/rpc/listugcposts"
+
+
+def _review_key(record):
+    # rating_text and raw_html differ by design ("4 stars" vs "4/5", HTML vs JSON)
+    rating = float(record.rating_value) if record.rating_value else None
+    return (record.review_id, record.username, rating, record.review_text, record.date_text,
+            tuple(record.photo_links))
+
+
+def _dom_review_key(record):
+    # Both DOM extractors read the same markup, so everything but the serialized HTML must match
+    fields = record.as_dict()
+    del fields["raw_html"]
+    fields["photo_links"] = tuple(fields["photo_links"])
+    return tuple(sorted(fields.items()))
+
+
+def load_review_fixture(path):
+    """The review elements' outerHTML and the recorded response bodies (None if there are none)."""
+    with open(path, encoding="utf-8") as page_file:
+        soup = BeautifulSoup(page_file.read(), "html.parser")
+    elements = [str(element) for element in soup.select(REVIEW_SELECTOR)]
+
+    responses = None
+    network_path = path[:-len(".html")] + ".network.jsonl"
+    if os.path.exists(network_path):
+        with open(network_path, encoding="utf-8") as network_file:
+            responses = [json.loads(line) for line in network_file if line.strip()]
+    return elements, responses
+
+
+def load_feed_fixture(path):
+    with open(path, encoding="utf-8") as feed_file:
+        feed_html = feed_file.read()
+    payload = None
+    payload_path = path[:-len(".html")] + ".payload.html"
+    if os.path.exists(payload_path):
+        with open(payload_path, encoding="utf-8") as payload_file:
+            payload = payload_file.read()
+    return feed_html, payload
+
+
+def review_backends(elements, responses, page_path=None, driver=None):
+    """The backends of a review fixture; with a Chrome driver the js backend runs on the loaded page."""
+    backends = {"bs4": lambda: [parse_review_html(element) for element in elements]}
+    if responses is not None:
+        backends["network"] = lambda: [record for body in responses for record in decode_review_batch(NETWORK_URL, body)]
+    if driver is not None:
+        driver.get(pathlib.Path(page_path).resolve().as_uri())
+        backends["js"] = lambda: extract_reviews_js(driver, REVIEW_SELECTOR)
+    return backends
+
+
+def feed_backends(feed_html, payload):
+    def from_feed():
+        soup = BeautifulSoup(feed_html, "html.parser")
+        return dedupe_place_links(anchor["href"] for anchor in soup.select(FEED_LINK_SELECTOR))
+
+    backends = {"feed_dom": from_feed}
+    if payload is not None:
+        backends["http"] = lambda: parse_place_links(payload)
+    return backends
+
+
+def measure(function, repeat):
+    """Best wall time of `repeat` runs, the peak traced memory of one more run, and its output."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        output = function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, output
+
+
+def run_fixture(name, kind, backends, repeat):
+    """
+    Measure every backend on one fixture and compare their outputs with the first one.
+
+    Returns:
+        tuple: (result rows, list of mismatch messages)
+    """
+    rows = []
+    mismatches = []
+    reference = None
+    for backend, function in backends.items():
+        seconds, peak, output = measure(function, repeat)
+        if kind == "reviews":
+            key = _dom_review_key if backend == "js" else _review_key
+            keys = [key(record) for record in output]
+        else:
+            key = None
+            keys = sorted(canonical_place_id(link) or link.split("?")[0] for link in output)
+        if reference is None:
+            reference = (backend, keys, output)
+        else:
+            expected = [key(record) for record in reference[2]] if key is not None else reference[1]
+            if keys != expected:
+                mismatches.append(_describe_mismatch(name, reference[0], expected, backend, keys))
+        rows.append({
+            "fixture": name,
+            "kind": kind,
+            "backend": backend,
+            "items": len(output),
+            "seconds": seconds,
+            "per_second": len(output) / seconds if seconds else 0.0,
+            "peak_kb": peak / 1024,
+        })
+    return rows, mismatches
+
+
+def _describe_mismatch(name, reference_backend, reference, backend, keys):
+    if len(keys) != len(reference):
+        return f"{name}: {backend} returned {len(keys)} items, {reference_backend} {len(reference)}"
+    for index, (expected, actual) in enumerate(zip(reference, keys)):
+        if expected != actual:
+            return f"{name}: item {index} differs between {reference_backend} and {backend}: {expected!r} != {actual!r}"
+    return f"{name}: {backend} differs from {reference_backend}"
+
+
+def discover_fixtures(folder):
+    reviews = []
+    feeds = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.html"))):
+        base = os.path.basename(path)
+        if base.endswith(".payload.html"):
+            continue
+        (feeds if "feed" in base else reviews).append(path)
+    return reviews, feeds
+
+
+def check_regressions(rows, baseline_path, tolerance):
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = {(row["fixture"], row["backend"]): row for row in json.load(baseline_file)["results"]}
+    regressions = []
+    for row in rows:
+        previous = baseline.get((row["fixture"], row["backend"]))
+        if previous and row["per_second"] < previous["per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{row['fixture']} / {row['backend']}: {row['per_second']:.0f}/s, "
+                f"baseline {previous['per_second']:.0f}/s"
+            )
+    return regressions
+
+
+def print_table(rows):
+    print(f"{'Fixture':<28}{'Backend':<10}{'Items':>7}{'Best s':>10}{'Per sec':>11}{'Peak KB':>11}")
+    for row in rows:
+        print(f"{row['fixture']:<28}{row['backend']:<10}{row['items']:>7}{row['seconds']:>10.4f}"
+              f"{row['per_second']:>11.0f}{row['peak_kb']:>11.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="Fixture folder (default: benchmarks/fixtures)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per backend; the best one counts")
+    parser.add_argument("--only", help="Only fixtures whose file name contains this text")
+    parser.add_argument("--save", help="Write the results as JSON, e.g. to use as a baseline later")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed throughput drop against the baseline (default: 0.2 = 20%%)")
+    parser.add_argument("--chrome", action="store_true",
+                        help="Also run the js extractor in headless Chrome on every review fixture")
+    args = parser.parse_args(argv)
+
+    if os.path.abspath(args.fixtures) == os.path.abspath(FIXTURE_DIR):
+        ensure_fixtures(args.fixtures)
+    review_paths, feed_paths = discover_fixtures(args.fixtures)
+
+    driver = None
+    if args.chrome:
+        from driver_pool import create_chrome_driver
+
+        driver = create_chrome_driver()
+
+    rows = []
+    mismatches = []
+    try:
+        for path in review_paths + feed_paths:
+            name = os.path.basename(path)[:-len(".html")]
+            if args.only and args.only not in name:
+                continue
+            if path in review_paths:
+                backends = review_backends(*load_review_fixture(path), page_path=path, driver=driver)
+                fixture_rows, fixture_mismatches = run_fixture(name, "reviews", backends, args.repeat)
+            else:
+                fixture_rows, fixture_mismatches = run_fixture(name, "places", feed_backends(*load_feed_fixture(path)),
+                                                               args.repeat)
+            rows.extend(fixture_rows)
+            mismatches.extend(fixture_mismatches)
+    finally:
+        if driver is not None:
+            driver.quit()
+
+    print_table(rows)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as results_file:
+            json.dump({"created_at": time.time(), "python": sys.version.split()[0], "results": rows},
+                      results_file, indent=2)
+        print(f"Results saved to {args.save}")
+
+    failed = False
+    for mismatch in mismatches:
+        print(f"❌ Output mismatch: {mismatch}")
+        failed = True
+    if args.baseline:
+        for regression in check_regressions(rows, args.baseline, args.tolerance):
+            print(f"❌ Regression: {regression}")
+            failed = True
+    if not failed:
+        print("✅ All backends agree" + (" and nothing regressed" if args.baseline else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
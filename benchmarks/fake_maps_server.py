@@ -0,0 +1,358 @@
+"""
+Local stand-in for the Google Maps pages the scrapers read, for load tests.
+
+Serves search feeds and place pages with the markup the scrapers look for. Both lists
+load lazily: the feed fetches more cards and the review panel fetches listugcposts
+batches (the layout review_network decodes) when scrolled to the bottom, through small
+inline scripts in a real browser or through the fake driver in fake_webdriver.py.
+Every request can be delayed (latency, jitter, a slow tail) or answered with an error.
+
+Place links point at https://www.google.com/maps/place/...; drivers and HTTP sessions
+used against the server map that host to base_url (see rewrite_url).
+
+Usage:
+    python benchmarks/fake_maps_server.py --port 8765 --places 40 --reviews 20-300 --latency-ms 80
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import make_review, review_payload
+from place_identity import extract_feature_id, place_url
+
+
+GOOGLE_HOST = "https://www.google.com"
+FEED_PAGE_SIZE = 7  # Cards in the first feed page and in every later batch, as Maps loads them
+REVIEW_PAGE_SIZE = 10
+MAX_REVIEWS_PER_PLACE = 100000  # Keeps the review ids of different places apart
+
+# Loads the next batch of a lazily loaded list (feed or review panel) when it is scrolled to the bottom
+_PAGE_SCRIPT = r"""
+<script>
+function renderReview(review) {
+    var id = review[0], author = review[1] || [], body = review[2] || [];
+    var name = (((author[4] || [])[5]) || [])[0] || '';
+    var rating = ((body[0] || [])[0]) || 0, text = (((body[15] || [])[0]) || [])[0] || '';
+    var stars = '';
+    for (var i = 0; i < 5; i++) {
+        stars += '<span class="hCCjke google-symbols NhBTye' + (i < rating ? ' elGi1d' : '') + '"></span>';
+    }
+    var photos = (body[2] || []).map(function (photo) {
+        return '<button class="Tya61d" style=\'background-image: url("' + photo[1][6][0] + '");\'></button>';
+    }).join('');
+    var box = document.createElement('div');
+    box.textContent = name;
+    var safeName = box.innerHTML;
+    box.textContent = text;
+    return '<div class="jftiEf fontBodyMedium" aria-label="' + safeName + '" data-review-id="' + id + '">'
+        + '<div class="jJc9Ad"><div class="GHT2ce"><div class="d4r55">' + safeName + '</div></div>'
+        + '<div class="DU9Pgb"><span class="kvMYJc" role="img">' + stars + '</span>'
+        + '<span class="rsqaWe">' + (author[6] || '') + '</span></div>'
+        + '<div class="MyEned"><span class="wiI7pd">' + box.innerHTML + '</span></div>'
+        + '<div class="KtCyie">' + photos + '</div></div></div>';
+}
+function loadMore(list) {
+    if (list.dataset.loading || !list.dataset.next) { return; }
+    list.dataset.loading = '1';
+    fetch(list.dataset.next).then(function (response) {
+        if (!response.ok) { throw new Error(response.status); }
+        return response.text();
+    }).then(function (text) {
+        if (list.dataset.kind === 'feed') {
+            var page = JSON.parse(text);
+            list.insertAdjacentHTML('beforeend', page.html);
+            if (page.next) { list.dataset.next = page.next; } else { delete list.dataset.next; }
+        } else {
+            var data = JSON.parse(text.replace(")]}'", ''));
+            list.insertAdjacentHTML('beforeend', (data[2] || []).map(function (item) {
+                return renderReview(item[0]);
+            }).join(''));
+            if (data[1]) { list.dataset.next = list.dataset.rpc + '&offset=' + data[1]; } else { delete list.dataset.next; }
+        }
+    }).catch(function () {}).then(function () { delete list.dataset.loading; });
+}
+function watchScroll(list) {
+    list.addEventListener('scroll', function () {
+        if (list.scrollTop + list.clientHeight >= list.scrollHeight - 50) { loadMore(list); }
+    });
+}
+function openReviews(button) {
+    var panel = document.createElement('div');
+    panel.className = 'm6QErb DxyBCb kA9KIf dS8AEf XiKgde';
+    panel.dataset.kind = 'reviews';
+    panel.dataset.rpc = button.dataset.rpc;
+    panel.dataset.next = button.dataset.rpc + '&offset=0';
+    document.getElementById('pane').appendChild(panel);
+    watchScroll(panel);
+    loadMore(panel);
+}
+document.querySelectorAll('[data-kind="feed"]').forEach(watchScroll);
+</script>
+"""
+
+_PAGE_STYLE = ("<style>div[role=feed], .m6QErb { height: 500px; overflow-y: auto; } "
+               ".Nv2PK, .jftiEf { min-height: 120px; }</style>")
+
+_WORDS = ("müze", "park", "kafe", "han", "cami", "çarşı", "köprü", "kale", "saray", "bahçe")
+
+
+def rewrite_url(url, base_url):
+    """Point a www.google.com URL at the fake server."""
+    return base_url + url[len(GOOGLE_HOST):] if url.startswith(GOOGLE_HOST) else url
+
+
+class FakeMapsConfig:
+    """
+    What the fake server serves and how badly it behaves.
+
+    Parameters:
+        places (int): Places found by every search.
+        reviews (tuple): (min, max) reviews per place; every place gets a fixed count in that range.
+        latency_ms (float): Delay added to every response.
+        jitter_ms (float): Random extra delay, up to this much.
+        slow_rate (float): Share of requests that take slow_ms longer (the tail).
+        slow_ms (float): Extra delay of those requests.
+        error_rate (float): Share of requests answered with 503 instead of content.
+        seed (int): Makes places, reviews and injected faults repeatable.
+    """
+
+    def __init__(self, places=20, reviews=(20, 200), latency_ms=50, jitter_ms=30, slow_rate=0.02, slow_ms=1500,
+                 error_rate=0.0, seed=0):
+        self.places = places
+        self.reviews = reviews
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self.seed = seed
+
+
+class FakeMapsServer:
+    """
+    The fake Maps site on a background ThreadingHTTPServer.
+
+    Parameters:
+        config (FakeMapsConfig): Content and fault settings.
+        port (int): Port to listen on; 0 picks a free one.
+    """
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or FakeMapsConfig()
+        self._lock = threading.Lock()
+        self._fault_rng = random.Random(self.config.seed)
+        self._places = {}
+        self.stats = {"requests": 0, "errors_injected": 0, "bytes": 0}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self._httpd.server_address[1]}"
+        self._thread = None
+
+    # ----- Content -----
+
+    @staticmethod
+    def search_url(query):
+        return f"{GOOGLE_HOST}/maps/search/{quote(query)}"
+
+    def _search_results(self, query):
+        # Every query has its own places; the same query always finds the same ones
+        rng = random.Random(f"{self.config.seed}:{query}")
+        results = []
+        for index in range(self.config.places):
+            feature_id = f"0x14{rng.getrandbits(48):012x}:0x{rng.getrandbits(60):x}"
+            name = f"{query} {rng.choice(_WORDS)} {index + 1}"
+            review_count = rng.randint(*self.config.reviews)
+            with self._lock:
+                place_number = self._places.get(feature_id, (None, None, len(self._places)))[2]
+                self._places[feature_id] = (name, review_count, place_number)
+            results.append((feature_id, name))
+        return results
+
+    def _place(self, feature_id):
+        with self._lock:
+            return self._places.get(feature_id)
+
+    def _card(self, feature_id, name):
+        href = place_url(feature_id, name)
+        return (f'<div class="Nv2PK"><a class="hfpxzc" aria-label="{name}" href="{href}?authuser=0&amp;hl=tr"></a>'
+                f'<div class="qBF1Pd">{name}</div></div>')
+
+    def _feed_page(self, query, offset):
+        results = self._search_results(query)
+        page = results[offset:offset + FEED_PAGE_SIZE]
+        html = "".join(self._card(feature_id, name) for feature_id, name in page)
+        next_offset = offset + FEED_PAGE_SIZE
+        if next_offset >= len(results):
+            return html + '<span class="HlvSq">Listenin sonuna ulaştınız.</span>', None
+        return html, f"/maps/search/{quote(query)}/feed?offset={next_offset}"
+
+    def _search_page(self, query):
+        html, next_url = self._feed_page(query, 0)
+        # The first results are also in the page data, where HTTP discovery reads them
+        entries = [[None] * 10 + [feature_id, name] for feature_id, name in self._search_results(query)[:FEED_PAGE_SIZE]]
+        state = json.dumps(")]}'\n" + json.dumps([None, None, entries], ensure_ascii=False, separators=(",", ":")))
+        next_attribute = f' data-next="{next_url}"' if next_url else ""
+        return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{query} - Google Haritalar</title>'
+                f'{_PAGE_STYLE}</head><body><div id="pane">'
+                f'<div role="feed" data-kind="feed"{next_attribute}>{html}</div></div>'
+                f'<script>window.APP_INITIALIZATION_STATE=[[["x",{state}]]];</script>{_PAGE_SCRIPT}</body></html>')
+
+    def _place_page(self, feature_id):
+        name, review_count, _ = self._place(feature_id)
+        rpc = f"/maps/rpc/listugcposts?place={quote(feature_id)}"
+        return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{name} - Google Haritalar</title>'
+                f'{_PAGE_STYLE}</head><body><div id="pane">'
+                f'<h1 class="DUwDvf lfPIob">{name}</h1>'
+                f'<div class="F7nice"><span>{review_count} yorum</span></div>'
+                f'<div class="bJzME tTVLSc"><button>Genel Bakış</button>'
+                f'<button data-rpc="{rpc}" onclick="openReviews(this)">Yorumlar</button>'
+                f'<button>Hakkında</button></div></div>{_PAGE_SCRIPT}</body></html>')
+
+    def _review_batch(self, feature_id, offset):
+        name, review_count, place_number = self._place(feature_id)
+        rng = random.Random(f"{self.config.seed}:{feature_id}:{offset}")
+        batch = []
+        for index in range(offset, min(offset + REVIEW_PAGE_SIZE, review_count)):
+            review = make_review(rng, place_number * MAX_REVIEWS_PER_PLACE + index)
+            batch.append(review_payload(review))
+        next_token = str(offset + REVIEW_PAGE_SIZE) if offset + REVIEW_PAGE_SIZE < review_count else None
+        return ")]}'\n" + json.dumps([None, next_token, batch], ensure_ascii=False)
+
+    def respond(self, path):
+        """
+        Content for one request path.
+
+        Returns:
+            tuple: (status, content type, body text)
+        """
+        parts = urlsplit(path)
+        query = parse_qs(parts.query)
+        if parts.path.startswith("/maps/search/"):
+            rest = parts.path[len("/maps/search/"):]
+            if rest.endswith("/feed"):
+                html, next_url = self._feed_page(unquote(rest[:-len("/feed")]), int(query.get("offset", ["0"])[0]))
+                return 200, "application/json", json.dumps({"html": html, "next": next_url}, ensure_ascii=False)
+            return 200, "text/html", self._search_page(unquote(rest.rstrip("/")))
+        if parts.path.startswith("/maps/place/"):
+            feature_id = extract_feature_id(unquote(path))
+            if feature_id and self._place(feature_id):
+                return 200, "text/html", self._place_page(feature_id)
+        if parts.path == "/maps/rpc/listugcposts":
+            feature_id = query.get("place", [""])[0]
+            if self._place(feature_id):
+                return 200, "application/json", self._review_batch(feature_id, int(query.get("offset", ["0"])[0]))
+        return 404, "text/plain", "Not found"
+
+    # ----- Faults -----
+
+    def _fault(self):
+        """Delay in seconds and whether to fail, drawn for one request."""
+        config = self.config
+        with self._lock:
+            delay = config.latency_ms + self._fault_rng.uniform(0, config.jitter_ms)
+            if self._fault_rng.random() < config.slow_rate:
+                delay += config.slow_ms
+            fail = self._fault_rng.random() < config.error_rate
+        return delay / 1000, fail
+
+    # ----- Server -----
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                delay, fail = server._fault()
+                if delay > 0:
+                    time.sleep(delay)
+                if fail:
+                    status, content_type, body = 503, "text/plain", "Injected error"
+                else:
+                    status, content_type, body = server.respond(self.path)
+                data = body.encode("utf-8")
+                with server._lock:
+                    server.stats["requests"] += 1
+                    server.stats["errors_injected"] += 1 if fail else 0
+                    server.stats["bytes"] += len(data)
+                self.send_response(status)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-maps-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def parse_range(value):
+    """ "50" -> (50, 50), "20-200" -> (20, 200) """
+    match = re.fullmatch(r"(\d+)(?:-(\d+))?", value)
+    if not match:
+        raise argparse.ArgumentTypeError(f"Expected N or MIN-MAX, got {value!r}")
+    low = int(match.group(1))
+    return low, int(match.group(2) or low)
+
+
+def add_config_options(parser):
+    parser.add_argument("--places", type=int, default=20, help="Places found by every search")
+    parser.add_argument("--reviews", type=parse_range, default=(20, 200), help="Reviews per place, N or MIN-MAX")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=30)
+    parser.add_argument("--slow-rate", type=float, default=0.02, help="Share of requests that are slow")
+    parser.add_argument("--slow-ms", type=float, default=1500, help="Extra delay of a slow request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def config_from_args(args):
+    return FakeMapsConfig(places=args.places, reviews=args.reviews, latency_ms=args.latency_ms,
+                          jitter_ms=args.jitter_ms, slow_rate=args.slow_rate, slow_ms=args.slow_ms,
+                          error_rate=args.error_rate, seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_options(parser)
+    args = parser.parse_args(argv)
+
+    server = FakeMapsServer(config_from_args(args), port=args.port).start()
+    print(f"Fake Maps server on {server.base_url}, e.g. {server.base_url}/maps/search/{quote('Sivas müze')}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
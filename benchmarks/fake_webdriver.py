@@ -0,0 +1,364 @@
+"""
+Scripted stand-in for a Chrome WebDriver session, for load tests against fake_maps_server.
+
+FakeWebDriver fetches pages over HTTP (so the server's latency and errors apply), keeps
+the page as a BeautifulSoup tree and answers the calls the scrapers make: find_element(s)
+with CSS and the XPaths they use, clicks, and the execute_script snippets of the scroller,
+the tracer, the driver pool and the extractors. Scrolling a lazily loaded list fetches its
+next batch, as the page's own script does in a browser. With performance_log=True the
+review responses are also reported through get_log("performance") and
+Network.getResponseBody, so the network extraction mode works.
+
+In-page JavaScript is not run: the js extractor and the streaming harvester are answered
+with parse_review_html and the "more" expander clicks nothing (the fake reviews are never
+truncated).
+"""
+import itertools
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import (InvalidSessionIdException, NoSuchElementException,
+                                        StaleElementReferenceException)
+from selenium.webdriver.common.by import By
+
+from driver_pool import create_chrome_driver
+from fake_maps_server import rewrite_url
+from fixtures import review_html
+from location_scrapper import _CARD_LINKS_JS
+from review_expander import _EXPAND_ALL_JS
+from review_extraction import EXTRACT_REVIEWS_JS, parse_review_html
+from review_network import decode_review_batch
+from review_stream import _HARVEST_REVIEWS_JS
+from review_sync import _LOADED_REVIEW_IDS_JS
+from run_trace import _TRANSFERRED_BYTES_JS
+from scroll_engine import PRUNED_HEIGHT_ATTRIBUTE, PRUNED_ITEMS_ATTRIBUTE, _SCROLL_AND_MEASURE_JS
+
+
+# The XPaths the scrapers use, as CSS
+_XPATH_AS_CSS = {
+    '//div[@role="feed"]': 'div[role="feed"]',
+    '//a[contains(@href, "/place/")]': 'a[href*="/place/"]',
+}
+
+_ERROR_PAGE = "<html><body><h2>Bu siteye ulaşılamıyor</h2></body></html>"
+_ITEM_HEIGHT = 120  # Pixels per list child, for the scrollHeight the scroller compares
+
+_request_ids = itertools.count(1)
+
+
+def _css(by, value):
+    if by == By.CSS_SELECTOR:
+        return value
+    if by == By.TAG_NAME:
+        return value
+    if by == By.CLASS_NAME:
+        return "." + value
+    if by == By.ID:
+        return "#" + value
+    if by == By.XPATH and value in _XPATH_AS_CSS:
+        return _XPATH_AS_CSS[value]
+    raise NotImplementedError(f"FakeWebDriver cannot find elements by {by} {value!r}")
+
+
+class FakeElement:
+    """A WebElement over one tag of the fake driver's current page."""
+
+    def __init__(self, driver, tag):
+        self._driver = driver
+        self._tag = tag
+
+    def _live(self):
+        # A tag from a page that has been replaced is stale, like in a browser
+        parents = self._tag.find_parents()
+        if (parents[-1] if parents else self._tag) is not self._driver._soup:
+            raise StaleElementReferenceException("Element is no longer attached to the page")
+        return self._tag
+
+    @property
+    def text(self):
+        return self._live().get_text(" ", strip=True)
+
+    @property
+    def tag_name(self):
+        return self._live().name
+
+    def get_attribute(self, name):
+        tag = self._live()
+        if name == "outerHTML":
+            return str(tag)
+        if name == "innerHTML":
+            return tag.decode_contents()
+        value = tag.get(name)
+        return " ".join(value) if isinstance(value, list) else value
+
+    def is_displayed(self):
+        self._live()
+        return True
+
+    def is_enabled(self):
+        self._live()
+        return True
+
+    def click(self):
+        self._driver._click(self._live())
+
+    def find_element(self, by=By.ID, value=None):
+        return self._driver._find(self._live(), by, value, single=True)
+
+    def find_elements(self, by=By.ID, value=None):
+        return self._driver._find(self._live(), by, value)
+
+
+class _SwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def window(self, handle):
+        pass
+
+
+class FakeWebDriver:
+    """
+    A WebDriver-like session against the fake Maps server.
+
+    Parameters:
+        base_url (str): Where the fake server listens; www.google.com URLs are sent there.
+        performance_log (bool): Record the review responses for get_log("performance").
+        session (requests.Session): HTTP session; a new one by default.
+    """
+
+    def __init__(self, base_url, performance_log=False, session=None):
+        self.base_url = base_url
+        self.performance_log = performance_log
+        self.session = session or requests.Session()
+        self.session.trust_env = False  # No proxy between the driver and the local server
+        self.current_url = "about:blank"
+        self.window_handles = ["main"]
+        self.switch_to = _SwitchTo(self)
+        self._soup = BeautifulSoup("<html><body></body></html>", "html.parser")
+        self._transferred = 0
+        self._log = []
+        self._bodies = {}
+        self._quit = False
+
+    def _check_session(self):
+        # Like Chrome after quit(), e.g. by the stop watchdog: every later call fails
+        if self._quit:
+            raise InvalidSessionIdException("invalid session id")
+
+    # ----- Navigation -----
+
+    def _fetch(self, path_or_url):
+        url = rewrite_url(path_or_url, self.base_url)
+        if url.startswith("/"):
+            url = self.base_url + url
+        try:
+            response = self.session.get(url, timeout=30)
+        except requests.RequestException:
+            return None, None
+        self._transferred += len(response.content)
+        return response, url
+
+    def get(self, url):
+        self._check_session()
+        self.current_url = url
+        if url == "about:blank":
+            self._soup = BeautifulSoup("<html><body></body></html>", "html.parser")
+            self._transferred = 0
+            self._log = []
+            self._bodies = {}
+            return
+        self._transferred = 0
+        response, _ = self._fetch(url)
+        text = response.text if response is not None and response.ok else _ERROR_PAGE
+        self._soup = BeautifulSoup(text, "html.parser")
+
+    @property
+    def title(self):
+        return self._soup.title.get_text() if self._soup.title else ""
+
+    @property
+    def page_source(self):
+        return str(self._soup)
+
+    # ----- Elements -----
+
+    def _find(self, root, by, value, single=False):
+        self._check_session()
+        tags = root.select(_css(by, value))
+        if single:
+            if not tags:
+                raise NoSuchElementException(f"No element matches {value!r}")
+            return FakeElement(self, tags[0])
+        return [FakeElement(self, tag) for tag in tags]
+
+    def find_element(self, by=By.ID, value=None):
+        return self._find(self._soup, by, value, single=True)
+
+    def find_elements(self, by=By.ID, value=None):
+        return self._find(self._soup, by, value)
+
+    def _click(self, tag):
+        if tag.get("onclick", "").startswith("openReviews"):
+            panel = self._soup.new_tag("div", attrs={
+                "class": "m6QErb DxyBCb kA9KIf dS8AEf XiKgde",
+                "data-kind": "reviews",
+                "data-rpc": tag["data-rpc"],
+                "data-next": tag["data-rpc"] + "&offset=0",
+            })
+            self._soup.find(id="pane").append(panel)
+            self._load_more(panel)
+
+    def _load_more(self, container):
+        """Fetch and append the next batch of a lazily loaded list, like the page script does on scroll."""
+        next_url = container.get("data-next")
+        if not next_url:
+            return
+        response, url = self._fetch(next_url)
+        if response is None or not response.ok:
+            return  # The page retries on the next scroll
+        if container.get("data-kind") == "feed":
+            page = response.json()
+            fragment = page["html"]
+            next_url = page["next"]
+        else:
+            if self.performance_log:
+                self._record_response(url, response.text)
+            data = json.loads(response.text.replace(")]}'", "", 1))
+            fragment = "".join(
+                review_html({
+                    "review_id": record.review_id, "username": record.username, "rating": int(record.rating_value or 0),
+                    "numeric": False, "text": record.review_text, "date": record.date_text,
+                    "photos": record.photo_links,
+                })
+                for record in decode_review_batch(url, response.text)
+            )
+            next_url = container["data-rpc"] + "&offset=" + data[1] if data[1] else None
+        for child in list(BeautifulSoup(fragment, "html.parser").contents):
+            container.append(child)
+        if next_url:
+            container["data-next"] = next_url
+        else:
+            del container["data-next"]
+
+    # ----- Scripts -----
+
+    def execute_script(self, script, *args):
+        self._check_session()
+        args = [arg._live() if isinstance(arg, FakeElement) else arg for arg in args]
+        if script == _SCROLL_AND_MEASURE_JS:
+            container, selector, end_selector, scroll = args
+            if scroll:
+                self._load_more(container)
+            count = len(container.select(selector)) if selector else len(container.find_all(recursive=False))
+            count += int(container.get(PRUNED_ITEMS_ATTRIBUTE, 0))
+            height = len(container.find_all(recursive=False)) * _ITEM_HEIGHT + int(container.get(PRUNED_HEIGHT_ATTRIBUTE, 0))
+            at_end = bool(end_selector and container.select_one(end_selector))
+            return [count, height, at_end]
+        if script == _TRANSFERRED_BYTES_JS:
+            return self._transferred
+        if script == _LOADED_REVIEW_IDS_JS:
+            container, selector, start = args
+            ids = []
+            for tag in container.select(selector)[start:]:
+                node = tag if tag.has_attr("data-review-id") else tag.select_one("[data-review-id]")
+                ids.append(node["data-review-id"] if node else "")
+            return ids
+        if script == _CARD_LINKS_JS:
+            container, selector, start = args
+            return [tag.get("href") for tag in container.select(selector)[start:]]
+        if script == _HARVEST_REVIEWS_JS:
+            container, selector, keep_tail, structured, unexpanded_selector = args
+            tags = container.select(selector)
+            harvested = []
+            for tag in tags[:max(len(tags) - keep_tail, 0)]:
+                if unexpanded_selector and tag.select_one(unexpanded_selector):
+                    break
+                harvested.append(parse_review_html(str(tag)).as_dict() if structured else str(tag))
+                tag.decompose()
+            container[PRUNED_ITEMS_ATTRIBUTE] = str(int(container.get(PRUNED_ITEMS_ATTRIBUTE, 0)) + len(harvested))
+            container[PRUNED_HEIGHT_ATTRIBUTE] = str(int(container.get(PRUNED_HEIGHT_ATTRIBUTE, 0))
+                                                     + len(harvested) * _ITEM_HEIGHT)
+            return json.dumps(harvested)
+        if script == EXTRACT_REVIEWS_JS:
+            selector, include_html = args
+            records = [parse_review_html(str(tag)).as_dict() for tag in self._soup.select(selector)]
+            if not include_html:
+                for record in records:
+                    record["raw_html"] = ""
+            return json.dumps(records)
+        if script.strip() == "arguments[0].click();":
+            self._click(args[0])
+        return None
+
+    def execute_async_script(self, script, *args):
+        self._check_session()
+        if script == _EXPAND_ALL_JS:
+            return 0
+        return None
+
+    # ----- Chrome DevTools -----
+
+    def _record_response(self, url, body):
+        request_id = str(next(_request_ids))
+        self._bodies[request_id] = body
+        for method, params in (
+            ("Network.responseReceived", {"requestId": request_id, "response": {"url": url}}),
+            ("Network.loadingFinished", {"requestId": request_id, "encodedDataLength": len(body)}),
+        ):
+            self._log.append({"message": json.dumps({"message": {"method": method, "params": params}})})
+
+    def get_log(self, log_type):
+        entries, self._log = self._log, []
+        return entries
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Network.getResponseBody":
+            return {"body": self._bodies.pop(params["requestId"]), "base64Encoded": False}
+        return {}
+
+    # ----- Session -----
+
+    def delete_all_cookies(self):
+        pass
+
+    def close(self):
+        pass
+
+    def quit(self):
+        self._quit = True
+        self.session.close()
+
+
+class RewritingChromeDriver:
+    """A real Chrome session whose get() sends www.google.com URLs to the fake server."""
+
+    def __init__(self, driver, base_url):
+        self._driver = driver
+        self._base_url = base_url
+
+    def get(self, url):
+        self._driver.get(rewrite_url(url, self._base_url))
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+def fake_driver_factory(base_url, performance_log=False):
+    """Driver factory for DriverPool that starts FakeWebDriver sessions."""
+    return lambda: FakeWebDriver(base_url, performance_log=performance_log)
+
+
+def chrome_driver_factory(base_url, performance_log=False, lean=False):
+    """Driver factory for DriverPool that starts real headless Chrome sessions pointed at the fake server."""
+    from review_network import NETWORK_LOGGING_CAPABILITIES
+
+    def factory():
+        capabilities = NETWORK_LOGGING_CAPABILITIES if performance_log else None
+        return RewritingChromeDriver(create_chrome_driver(lean=lean, capabilities=capabilities), base_url)
+    return factory
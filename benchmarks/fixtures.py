@@ -0,0 +1,178 @@
+"""
+Deterministic stand-ins for saved Google Maps pages, used by the offline benchmarks.
+
+Review panels use the same markup the extractors read (.jftiEf, d4r55, kvMYJc/elGi1d,
+fzvQIb, rsqaWe, wiI7pd, Tya61d), and every review is also written as a listugcposts
+response so the network decoder can be measured on the same reviews. The search feed
+comes both as rendered feed HTML and as the HTTP payload http_discovery parses. The
+edge-case panel holds hand-written reviews where the two DOM extractors (bs4 and the
+in-browser js) are easiest to get out of step; it has no network responses.
+
+Real snapshots can be dropped next to the generated files (see extraction_benchmark.py).
+"""
+import html
+import json
+import os
+import random
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+REVIEW_PANEL_SIZES = {"small": 20, "medium": 500, "5k": 5000}
+FEED_SIZE = 120
+RESPONSE_BATCH_SIZE = 10  # Reviews per listugcposts response, as the panel loads them
+
+_WORDS = ("müze", "harika", "tarih", "rehber", "bilet", "kalabalık", "temiz", "personel", "güzel", "otopark",
+          "museum", "great", "history", "worth", "visit", "crowded", "friendly", "staff", "clean", "view")
+_DATES = ("bir gün önce", "2 hafta önce", "3 ay önce", "bir yıl önce", "5 yıl önce")
+
+
+def make_review(rng, index):
+    photos = [f"https://lh5.googleusercontent.com/p/AF1Qip{index:06d}{n}=w300-h450-p-k-no"
+              for n in range(rng.choice((0, 0, 0, 1, 3)))]
+    return {
+        "review_id": f"ChZDSUhNMG9nS0VJQ0FnSUR{index:08d}",
+        "username": f"Ziyaretçi {index}",
+        "rating": rng.randint(1, 5),
+        "numeric": index % 7 == 0,  # Some places show "4/5" instead of stars
+        "text": " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 80))),
+        "date": rng.choice(_DATES),
+        "photos": photos,
+    }
+
+
+def review_html(review):
+    if review["numeric"]:
+        rating = f'<span class="fzvQIb">{review["rating"]}/5</span>'
+    else:
+        stars = ''.join('<span class="hCCjke google-symbols NhBTye elGi1d"></span>' for _ in range(review["rating"]))
+        stars += ''.join('<span class="hCCjke google-symbols NhBTye"></span>' for _ in range(5 - review["rating"]))
+        rating = f'<span class="kvMYJc" role="img" aria-label="{review["rating"]} yıldız">{stars}</span>'
+    photos = ''.join(
+        f'<button class="Tya61d" style=\'background-image: url("{url}");\' aria-label="Fotoğraf"></button>'
+        for url in review["photos"]
+    )
+    return (
+        f'<div class="jftiEf fontBodyMedium" aria-label="{html.escape(review["username"])}" '
+        f'data-review-id="{review["review_id"]}">'
+        f'<div class="jJc9Ad"><div class="GHT2ce"><div class="d4r55">{html.escape(review["username"])}</div>'
+        f'<div class="RfnDt">Yerel Rehber · 12 yorum</div></div>'
+        f'<div class="DU9Pgb">{rating}<span class="rsqaWe">{review["date"]}</span></div>'
+        f'<div class="MyEned"><span class="wiI7pd">{html.escape(review["text"])}</span></div>'
+        f'<div class="KtCyie">{photos}</div></div></div>'
+    )
+
+
+def review_payload(review):
+    # Same layout review_network._decode_listugcposts reads
+    author = [None, None, None, None, [None, None, None, None, None, [review["username"]]], None, review["date"]]
+    body = [[review["rating"]], None, [[None, [None] * 6 + [[url]]] for url in review["photos"]]]
+    body += [None] * 12 + [[[review["text"]]]]
+    return [[review["review_id"], author, body]]
+
+
+def review_panel_html(count, seed=0):
+    rng = random.Random(seed)
+    reviews = [make_review(rng, index) for index in range(count)]
+    panel = ''.join(review_html(review) for review in reviews)
+    page = ('<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>'
+            '<div class="m6QErb DxyBCb kA9KIf dS8AEf XiKgde">' + panel + '</div></body></html>')
+    responses = []
+    for start in range(0, count, RESPONSE_BATCH_SIZE):
+        batch = [review_payload(review) for review in reviews[start:start + RESPONSE_BATCH_SIZE]]
+        responses.append(")]}'\n" + json.dumps([None, f"token{start}", batch], ensure_ascii=False))
+    return page, responses
+
+
+# Reviews the generator never makes: missing fields, odd ratings, nested and padded text, ids on a child
+EDGE_CASE_REVIEWS = (
+    # Review id on an inner element, text split over nested tags with whitespace-only nodes and entities
+    '<div class="jftiEf fontBodyMedium"><div data-review-id="ChdDSUhNMG9nS0VJQ0FnSUNlZGdl">'
+    '<div class="d4r55">  Ayşe   <span>Yılmaz</span> </div>'
+    '<div class="DU9Pgb"><span class="kvMYJc" role="img" aria-label="3 yıldız">'
+    '<span class="hCCjke elGi1d"></span><span class="hCCjke NhBTye elGi1d"></span><span class="elGi1d x"></span>'
+    '<span class="hCCjke"></span><span class="hCCjke"></span></span><span class="rsqaWe"> 2 hafta önce </span></div>'
+    '<div class="MyEned"><span class="wiI7pd">\n  İlk satır &amp; <b>kalın</b><br>\n ikinci  satır &lt;3 🎉  \n'
+    '<span> </span><span>son</span></span></div></div></div>',
+    # No rating, no username, no text, no date
+    '<div class="jftiEf fontBodyMedium" data-review-id="ChdDSUhNMG9nS0VJQ0FnSUNlbXB0eQ"></div>',
+    # Numeric ratings: normal, zero, malformed and with spaces
+    '<div class="jftiEf fontBodyMedium" data-review-id="ChdDSUhNMG9nS0VJQ0FnSUNudW0x">'
+    '<div class="d4r55">Numeric</div><span class="fzvQIb">4/5</span><span class="wiI7pd">ok</span></div>',
+    '<div class="jftiEf fontBodyMedium" data-review-id="ChdDSUhNMG9nS0VJQ0FnSUNudW0y">'
+    '<span class="fzvQIb">0/5</span><span class="kvMYJc"><span class="elGi1d"></span></span></div>',
+    '<div class="jftiEf fontBodyMedium" data-review-id="ChdDSUhNMG9nS0VJQ0FnSUNudW0z">'
+    '<span class="fzvQIb">/5</span></div>',
+    '<div class="jftiEf fontBodyMedium" data-review-id="ChdDSUhNMG9nS0VJQ0FnSUNudW00">'
+    '<span class="fzvQIb"> 4,5 / 5 </span><span class="kvMYJc"><span class="elGi1d"></span>'
+    '<span class="elGi1d"></span></span></div>',
+    # Star box with no filled stars, photo buttons with and without a URL, and no review id at all
+    '<div class="jftiEf fontBodyMedium"><div class="d4r55">Fotoğrafçı</div>'
+    '<span class="kvMYJc"><span class="hCCjke"></span></span>'
+    '<button class="Tya61d" style=\'background-image: url("https://lh5.googleusercontent.com/p/AF1QipEdge1=w300");\'>'
+    '</button><button class="Tya61d" style="width: 10px"></button><button class="Tya61d"></button>'
+    '<button class="Tya61d x" style=\'background-image: url("https://lh5.googleusercontent.com/p/AF1QipEdge2");\'>'
+    '</button></div>',
+)
+
+
+def edge_case_panel_html():
+    return ('<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>'
+            '<div class="m6QErb DxyBCb kA9KIf dS8AEf XiKgde">' + ''.join(EDGE_CASE_REVIEWS) + '</div></body></html>')
+
+
+def search_feed(count=FEED_SIZE, seed=1):
+    """Rendered feed HTML (with the duplicate links the feed really has) and the matching HTTP payload."""
+    rng = random.Random(seed)
+    cards = []
+    payload_entries = []
+    for index in range(count):
+        feature_id = f"0x14{rng.getrandbits(48):012x}:0x{rng.getrandbits(60):x}"
+        name = f"Yer {index} {rng.choice(_WORDS)}"
+        href = (f"https://www.google.com/maps/place/{name.replace(' ', '+')}/data=!4m7!3m6!1s{feature_id}"
+                f"!8m2!3d37.{rng.randint(1000, 9999)}!4d38.{rng.randint(1000, 9999)}!16s%2Fg%2F11{index:06d}")
+        # Every card links the place twice: once plain, once with the click-tracking parameters
+        cards.append(f'<div class="Nv2PK"><a class="hfpxzc" aria-label="{name}" href="{href}?authuser=0&amp;hl=tr"></a>'
+                     f'<div class="qBF1Pd">{name}</div><a href="{href}?entry=ttu"></a></div>')
+        payload_entries.append([None] * 10 + [feature_id, name])
+    feed_html = ('<!DOCTYPE html><html><body><div role="feed">' + ''.join(cards)
+                 + '<span class="HlvSq">Listenin sonuna ulaştınız.</span></div></body></html>')
+    inner = json.dumps([None, None, payload_entries], ensure_ascii=False, separators=(",", ":"))
+    payload = ('<script>window.APP_INITIALIZATION_STATE=[[["x",' + json.dumps(")]}'\n" + inner)
+               + ']]];</script>')
+    return feed_html, payload
+
+
+def ensure_fixtures(folder=FIXTURE_DIR):
+    """Write the synthetic fixtures that are missing and return their paths by name."""
+    os.makedirs(folder, exist_ok=True)
+    paths = {}
+    for name, count in REVIEW_PANEL_SIZES.items():
+        page_path = os.path.join(folder, f"synthetic_reviews_{name}.html")
+        network_path = os.path.join(folder, f"synthetic_reviews_{name}.network.jsonl")
+        if not (os.path.exists(page_path) and os.path.exists(network_path)):
+            page, responses = review_panel_html(count)
+            with open(page_path, "w", encoding="utf-8") as page_file:
+                page_file.write(page)
+            with open(network_path, "w", encoding="utf-8") as network_file:
+                for body in responses:
+                    network_file.write(json.dumps(body, ensure_ascii=False) + "\n")
+        paths[f"reviews_{name}"] = page_path
+        paths[f"reviews_{name}.network"] = network_path
+
+    edge_path = os.path.join(folder, "synthetic_reviews_edge.html")
+    if not os.path.exists(edge_path):
+        with open(edge_path, "w", encoding="utf-8") as page_file:
+            page_file.write(edge_case_panel_html())
+    paths["reviews_edge"] = edge_path
+
+    feed_path = os.path.join(folder, "synthetic_feed.html")
+    payload_path = os.path.join(folder, "synthetic_feed.payload.html")
+    if not (os.path.exists(feed_path) and os.path.exists(payload_path)):
+        feed_html, payload = search_feed()
+        with open(feed_path, "w", encoding="utf-8") as feed_file:
+            feed_file.write(feed_html)
+        with open(payload_path, "w", encoding="utf-8") as payload_file:
+            payload_file.write(payload)
+    paths["feed"] = feed_path
+    paths["feed.payload"] = payload_path
+    return paths
@@ -0,0 +1,98 @@
+"""
+Compare the default and the lean browser profile on real place pages.
+
+For every place URL both profiles load the page, wait for the title, open the 'Yorumlar'
+tab and wait for the review panel. Bytes are summed from Chrome's network log
+(Network.loadingFinished encodedDataLength), so blocked requests count as zero.
+
+Usage:
+    python benchmarks/lean_profile_benchmark.py location_links.csv --limit 5
+    python benchmarks/lean_profile_benchmark.py "https://www.google.com/maps/place/..."
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from driver_pool import create_chrome_driver
+from review_scrapper2 import get_location_links
+
+
+PERFORMANCE_LOGGING = {"goog:loggingPrefs": {"performance": "ALL"}}
+
+
+def transferred_bytes(driver):
+    """Sum the bytes of every finished request since the last call (reading the log clears it)."""
+    total = 0
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        if message.get("method") == "Network.loadingFinished":
+            total += message["params"].get("encodedDataLength", 0)
+    return total
+
+
+def measure_place(driver, url):
+    started = time.monotonic()
+    driver.get(url)
+    WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, "h1.DUwDvf.lfPIob")))
+    for button in driver.find_elements(By.CSS_SELECTOR, ".bJzME.tTVLSc button"):
+        if "Yorumlar" in button.text:
+            driver.execute_script("arguments[0].click();", button)
+            break
+    WebDriverWait(driver, 20).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, ".m6QErb.DxyBCb.kA9KIf.dS8AEf.XiKgde"))
+    )
+    return time.monotonic() - started, transferred_bytes(driver)
+
+
+def run_profile(urls, lean):
+    driver = create_chrome_driver(lean=lean, capabilities=PERFORMANCE_LOGGING)
+    results = []
+    try:
+        transferred_bytes(driver)
+        for url in urls:
+            try:
+                results.append(measure_place(driver, url))
+            except Exception as e:
+                print(f"  {'lean' if lean else 'default'}: failed on {url[:60]}...: {e}")
+            driver.get("about:blank")
+            transferred_bytes(driver)
+    finally:
+        driver.quit()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="A place URL or a CSV with a 'Location Link' column")
+    parser.add_argument("--limit", type=int, default=5, help="Maximum number of places to load")
+    args = parser.parse_args(argv)
+
+    urls = get_location_links(args.source) if args.source.endswith(".csv") else [args.source]
+    urls = urls[:args.limit]
+
+    summary = {}
+    for lean in (False, True):
+        results = run_profile(urls, lean)
+        if results:
+            seconds = sum(r[0] for r in results) / len(results)
+            megabytes = sum(r[1] for r in results) / len(results) / (1024 * 1024)
+            summary["lean" if lean else "default"] = (seconds, megabytes, len(results))
+
+    print(f"{'profile':<10}{'places':>8}{'s/place':>10}{'MB/place':>10}")
+    for name, (seconds, megabytes, count) in summary.items():
+        print(f"{name:<10}{count:>8}{seconds:>10.2f}{megabytes:>10.2f}")
+    if len(summary) == 2:
+        default, lean = summary["default"], summary["lean"]
+        print(f"Saved per place: {default[0] - lean[0]:.2f} s, {default[1] - lean[1]:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Load-test the whole scraping pipeline against the local fake Maps server.
+
+Starts fake_maps_server, writes a batch CSV of search URLs and runs it through the GUI's
+BatchWorkerThread (WorkerThread with --single, one search) at every --concurrency level,
+each in a fresh temporary folder. Browsers are FakeWebDriver sessions, or real headless
+Chrome with --chrome (needs chromedriver where driver_pool expects it); both are pointed at
+the fake server, as is the HTTP discovery session.
+
+For every level it reports places/min, reviews/sec, the p50/p95/p99/max time per place
+(from the run manifest) and the slowest phases (from the run trace).
+
+Usage:
+    python benchmarks/load_harness.py --concurrency 1 2 4 --searches 2 --places 15 --reviews 20-150
+    python benchmarks/load_harness.py --concurrency 4 --latency-ms 200 --error-rate 0.02 --extraction network
+    python benchmarks/load_harness.py --single --chrome --concurrency 2
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from requests.adapters import HTTPAdapter
+
+import scrape_pipeline
+from driver_pool import DriverPool
+from fake_maps_server import FakeMapsServer, GOOGLE_HOST, add_config_options, config_from_args, rewrite_url
+from fake_webdriver import chrome_driver_factory, fake_driver_factory
+from http_discovery import DISCOVERY_MODES, DISCOVERY_BROWSER, DISCOVERY_HTTP, create_http_session
+from parallel_scraper import MAX_PARALLELISM
+from review_extraction import EXTRACTION_MODES, EXTRACTION_BS4, EXTRACTION_NETWORK
+from run_trace import PHASE_ORDER, RunTracer
+
+
+class _FakeServerAdapter(HTTPAdapter):
+    """Sends the discovery requests for www.google.com to the fake server."""
+
+    def __init__(self, base_url, **kwargs):
+        self.base_url = base_url
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        request.url = rewrite_url(request.url, self.base_url)
+        return super().send(request, **kwargs)
+
+
+def harness_settings_class(server, use_chrome, trace_path):
+    """ScrapeSettings whose browsers, HTTP session and tracer point at the fake server and the run folder."""
+
+    class HarnessSettings(scrape_pipeline.ScrapeSettings):
+        def create_driver_pool(self, tracer=None):
+            performance_log = self.extraction_mode == EXTRACTION_NETWORK
+            if use_chrome:
+                factory = chrome_driver_factory(server.base_url, performance_log, lean=self.lean_browser)
+            else:
+                factory = fake_driver_factory(server.base_url, performance_log)
+            return DriverPool(max_size=self.parallelism, driver_factory=factory, tracer=tracer)
+
+        def create_http_session(self):
+            if self.discovery_mode != DISCOVERY_HTTP:
+                return None
+            session = create_http_session()
+            session.trust_env = False  # No proxy between us and the local server
+            session.mount(GOOGLE_HOST, _FakeServerAdapter(server.base_url))
+            return session
+
+        def create_tracer(self, folder):
+            return RunTracer(trace_path)
+
+    return HarnessSettings
+
+
+@contextlib.contextmanager
+def _patched_settings(settings_class):
+    # The worker threads build their ScrapeSettings themselves; hand them the harness version
+    original = scrape_pipeline.ScrapeSettings
+    scrape_pipeline.ScrapeSettings = settings_class
+    try:
+        yield
+    finally:
+        scrape_pipeline.ScrapeSettings = original
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_level(server, args, concurrency):
+    """Run one batch (or single search) at the given concurrency and measure it."""
+    folder = tempfile.mkdtemp(prefix=f"load-{concurrency}-")
+    trace_path = os.path.join(folder, "trace.jsonl")
+    queries = [f"{args.query} {number + 1}" for number in range(args.searches)]
+    previous_dir = os.getcwd()
+    os.chdir(folder)
+    try:
+        with _patched_settings(harness_settings_class(server, args.chrome, trace_path)):
+            started = time.monotonic()
+            completed = _run_worker(args, concurrency, queries)
+            elapsed = time.monotonic() - started
+    finally:
+        os.chdir(previous_dir)
+
+    place_seconds = []
+    reviews = 0
+    failed = 0
+    for manifest_path in glob.glob(os.path.join(folder, "**", "*manifest.json"), recursive=True):
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        for location in manifest["locations"].values():
+            for place in location.get("places", {}).values():
+                if place.get("status") == "done":
+                    place_seconds.append(place["finished_at"] - place["started_at"])
+                    reviews += place.get("outputs", {}).get("review_count", 0)
+                else:
+                    failed += 1
+
+    phases = {}
+    if os.path.exists(trace_path):
+        with open(trace_path, encoding="utf-8") as trace_file:
+            for line in trace_file:
+                event = json.loads(line)
+                phases.setdefault(event["phase"], []).append(event["duration_s"])
+
+    return {
+        "concurrency": concurrency,
+        "completed": completed,
+        "places": len(place_seconds),
+        "failed": failed,
+        "reviews": reviews,
+        "seconds": elapsed,
+        "places_per_min": len(place_seconds) / elapsed * 60 if elapsed else 0.0,
+        "reviews_per_sec": reviews / elapsed if elapsed else 0.0,
+        "p50": _percentile(place_seconds, 0.5),
+        "p95": _percentile(place_seconds, 0.95),
+        "p99": _percentile(place_seconds, 0.99),
+        "max": max(place_seconds, default=0.0),
+        "phase_p95": {name: _percentile(durations, 0.95) for name, durations in phases.items()},
+        "folder": folder,
+    }
+
+
+def _run_worker(args, concurrency, queries):
+    # Imported here so the harness only needs PyQt when it actually runs a level
+    if args.single:
+        from maps_scraper_app import WorkerThread
+        worker = WorkerThread(
+            FakeMapsServer.search_url(queries[0]), args.location_scrolls, args.review_scrolls,
+            "csv_reviews", "html_reviews", parallelism=concurrency, extraction_mode=args.extraction,
+            discovery_mode=args.discovery, log_file="run.log", streaming=args.streaming,
+        )
+    else:
+        from batch_maps_scrapper_app import BatchWorkerThread
+        pd.DataFrame({"Location": queries, "Link": [FakeMapsServer.search_url(query) for query in queries]}) \
+            .to_csv("locations.csv", index=False)
+        worker = BatchWorkerThread(
+            "locations.csv", args.location_scrolls, args.review_scrolls, parallelism=concurrency,
+            extraction_mode=args.extraction, discovery_mode=args.discovery, log_file="run.log",
+            streaming=args.streaming,
+        )
+    outcome = []
+    worker.finished_signal.connect(outcome.append)
+    # run() on this thread: same code path as start(), without needing a Qt event loop
+    worker.run()
+    return bool(outcome and outcome[0])
+
+
+def print_report(results, server):
+    print(f"{'Workers':>7}{'Places':>8}{'Failed':>8}{'Reviews':>9}{'Wall s':>9}{'Places/min':>12}{'Reviews/s':>11}"
+          f"{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}{'Max s':>8}")
+    for result in results:
+        print(f"{result['concurrency']:>7}{result['places']:>8}{result['failed']:>8}{result['reviews']:>9}"
+              f"{result['seconds']:>9.1f}{result['places_per_min']:>12.1f}{result['reviews_per_sec']:>11.1f}"
+              f"{result['p50']:>8.2f}{result['p95']:>8.2f}{result['p99']:>8.2f}{result['max']:>8.2f}")
+
+    print("")
+    print("p95 seconds per phase:")
+    names = [name for name in PHASE_ORDER if any(name in result["phase_p95"] for result in results)]
+    print(f"{'Phase':<16}" + "".join(f"{result['concurrency']:>8}" for result in results))
+    for name in names:
+        print(f"{name:<16}" + "".join(f"{result['phase_p95'].get(name, 0.0):>8.2f}" for result in results))
+
+    print("")
+    print(f"Fake server: {server.stats['requests']} requests, {server.stats['errors_injected']} injected errors, "
+          f"{server.stats['bytes'] / 1024 / 1024:.1f} MB served")
+    for result in results:
+        print(f"Workers {result['concurrency']}: output and run.log in {result['folder']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4],
+                        choices=range(1, MAX_PARALLELISM + 1), metavar="N", help="Parallelism levels to run")
+    parser.add_argument("--searches", type=int, default=2, help="Location rows of the batch CSV")
+    parser.add_argument("--query", default="Sivas", help="Search text; rows get a number appended")
+    parser.add_argument("--single", action="store_true", help="Run one search through WorkerThread instead")
+    parser.add_argument("--chrome", action="store_true", help="Use real headless Chrome instead of the fake driver")
+    parser.add_argument("--extraction", choices=EXTRACTION_MODES, default=EXTRACTION_BS4)
+    parser.add_argument("--discovery", choices=DISCOVERY_MODES, default=DISCOVERY_BROWSER)
+    parser.add_argument("--streaming", action="store_true", help="Save and prune reviews while scrolling")
+    parser.add_argument("--location-scrolls", type=int, default=50)
+    parser.add_argument("--review-scrolls", type=int, default=200)
+    parser.add_argument("--save", help="Also write the results as JSON")
+    add_config_options(parser)
+    args = parser.parse_args(argv)
+
+    results = []
+    with FakeMapsServer(config_from_args(args)) as server:
+        for concurrency in args.concurrency:
+            print(f"Running with {concurrency} worker(s)...")
+            results.append(run_level(server, args, concurrency))
+        print_report(results, server)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as results_file:
+            json.dump({"created_at": time.time(), "arguments": vars(args), "results": results}, results_file,
+                      indent=2, default=str)
+        print(f"Results saved to {args.save}")
+    return 0 if all(result["completed"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
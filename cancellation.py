@@ -0,0 +1,87 @@
+import threading
+import time
+
+from run_log import carry_context, get_logger
+
+
+logger = get_logger(__name__)
+
+CANCEL_POLL_SECONDS = 0.1  # How often the driver watchdog looks at the stop event
+
+
+class ScrapeCancelled(Exception):
+    """A scraper stopped early because its stop event was set."""
+
+    def __init__(self, message="Stopped by user"):
+        super().__init__(message)
+
+
+def raise_if_cancelled(stop_event):
+    """Raise ScrapeCancelled if stop_event (a threading.Event, or None) is set."""
+    if stop_event is not None and stop_event.is_set():
+        raise ScrapeCancelled()
+
+
+def sleep_unless_cancelled(seconds, stop_event=None):
+    """time.sleep that ends as soon as stop_event is set, raising ScrapeCancelled."""
+    if stop_event is None:
+        time.sleep(seconds)
+    elif stop_event.wait(seconds):
+        raise ScrapeCancelled()
+
+
+def cancellable(iterable, stop_event=None):
+    """Yield the items of iterable, raising ScrapeCancelled before the next one once stop_event is set."""
+    for item in iterable:
+        raise_if_cancelled(stop_event)
+        yield item
+
+
+class DriverWatchdog:
+    """
+    Quits a browser as soon as the stop event is set, from a background thread.
+
+    The scraper loops check the stop event themselves, but a single driver call (a page
+    load, a WebDriverWait, an in-page expand wait) can block for seconds; quitting the
+    session makes it fail right away. The scraper then sees the event set, treats the
+    error as a stop and discards the browser. Without a stop_event this does nothing.
+
+    Parameters:
+        driver: The WebDriver session borrowed by the scraper.
+        stop_event (threading.Event): The run's stop event.
+    """
+
+    def __init__(self, driver, stop_event):
+        self.driver = driver
+        self.stop_event = stop_event
+        self.fired = False
+        self._finished = threading.Event()
+        self._thread = None
+
+    def _watch(self):
+        while not self._finished.wait(CANCEL_POLL_SECONDS):
+            if self.stop_event.is_set():
+                self.fired = True
+                logger.info("🛑 Stop requested, closing the browser.")
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+                return
+
+    def start(self):
+        if self.stop_event is not None:
+            self._thread = threading.Thread(target=carry_context(self._watch), name="driver-watchdog", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._finished.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,267 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+from run_trace import NULL_TRACER
+
+
+CHROMEDRIVER_PATH = "chromedriver.exe"
+
+# Recycle a browser after this many places, or once its page heap grows past this size
+DEFAULT_MAX_PAGES_PER_DRIVER = 25
+DEFAULT_MAX_MEMORY_MB = 1024
+
+
+# Resources the scrapers never read: map tiles, review photos (their URLs come from style attributes),
+# fonts and media. Blocked through CDP in the lean profile.
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.mp3",
+    "*googleusercontent.com/*", "*ggpht.com/*",
+    "*/maps/vt*", "*/kh/v*", "*streetviewpixels*",
+    "*fonts.gstatic.com/*", "*fonts.googleapis.com/*",
+]
+
+LEAN_CHROME_ARGUMENTS = [
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-translate",
+    "--mute-audio",
+    "--no-first-run",
+    "--blink-settings=imagesEnabled=false",
+]
+
+
+def create_chrome_driver(lean=False, capabilities=None):
+    """
+    Start a new headless Chrome session.
+
+    Parameters:
+        lean (bool): Use the lean profile: images, fonts, media and map tiles are blocked,
+            GPU and background features are off and pages load eagerly (DOMContentLoaded).
+        capabilities (dict): Extra capabilities, e.g. logging preferences for benchmarks.
+    """
+    service = Service(executable_path=CHROMEDRIVER_PATH)
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    if lean:
+        for argument in LEAN_CHROME_ARGUMENTS:
+            options.add_argument(argument)
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+            "profile.default_content_setting_values.notifications": 2,
+            "profile.default_content_setting_values.geolocation": 2,
+        })
+        options.page_load_strategy = "eager"
+    for name, value in (capabilities or {}).items():
+        options.set_capability(name, value)
+
+    driver = webdriver.Chrome(service=service, options=options)
+    if lean:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+    return driver
+
+
+def lean_chrome_driver():
+    """Driver factory for DriverPool that starts lean sessions."""
+    return create_chrome_driver(lean=True)
+
+
+class _PooledDriver:
+    """Bookkeeping for one browser session owned by the pool."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_served = 0
+        self.created_at = time.time()
+
+
+class DriverPool:
+    """
+    Keeps warm headless Chrome sessions alive so every place does not pay a browser cold start.
+
+    Parameters:
+        max_size (int): Maximum number of browsers alive at the same time.
+        max_pages_per_driver (int): Recycle a browser after serving this many places.
+        max_memory_mb (int): Recycle a browser once its JS heap grows past this many megabytes.
+        driver_factory (callable): Creates a new WebDriver session.
+        tracer (RunTracer): Records every browser start as a driver_start phase.
+    """
+
+    def __init__(self, max_size=1, max_pages_per_driver=DEFAULT_MAX_PAGES_PER_DRIVER,
+                 max_memory_mb=DEFAULT_MAX_MEMORY_MB, driver_factory=create_chrome_driver, tracer=None):
+        self.max_size = max(1, max_size)
+        self.max_pages_per_driver = max_pages_per_driver
+        self.max_memory_mb = max_memory_mb
+        self.driver_factory = driver_factory
+        self.tracer = tracer or NULL_TRACER
+
+        self._condition = threading.Condition()
+        self._idle = []
+        self._in_use = {}
+        self._starting = 0
+        self._closed = False
+
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "recycled_pages": 0,
+            "recycled_memory": 0,
+            "discarded": 0,
+            "borrows": 0,
+        }
+
+    def acquire(self):
+        """Borrow a browser, starting one if the pool is not full. Blocks while all browsers are busy."""
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._stats["reused"] += 1
+                    break
+                if len(self._in_use) + self._starting < self.max_size:
+                    pooled = None
+                    # Reserve the slot before starting Chrome outside the lock
+                    self._starting += 1
+                    break
+                self._condition.wait()
+
+        if pooled is None:
+            try:
+                with self.tracer.phase("driver_start"):
+                    driver = self.driver_factory()
+            except Exception:
+                with self._condition:
+                    self._starting -= 1
+                    self._condition.notify()
+                raise
+            pooled = _PooledDriver(driver)
+            with self._condition:
+                self._starting -= 1
+                self._stats["created"] += 1
+
+        with self._condition:
+            self._in_use[id(pooled.driver)] = pooled
+            self._stats["borrows"] += 1
+        return pooled.driver
+
+    def release(self, driver, discard=False):
+        """
+        Return a borrowed browser to the pool.
+
+        The session is reset so the next place starts clean. It is quit instead when
+        discard is True, when it has served max_pages_per_driver places or when its
+        memory use grew past max_memory_mb.
+        """
+        with self._condition:
+            pooled = self._in_use.pop(id(driver), None)
+        if pooled is None:
+            return
+
+        pooled.pages_served += 1
+        reason = None
+        if discard:
+            reason = "discarded"
+        elif pooled.pages_served >= self.max_pages_per_driver:
+            reason = "recycled_pages"
+        elif self._memory_mb(driver) > self.max_memory_mb:
+            reason = "recycled_memory"
+        elif not self._reset(driver):
+            reason = "discarded"
+
+        with self._condition:
+            if reason is None and not self._closed:
+                self._idle.append(pooled)
+            else:
+                self._stats[reason or "discarded"] += 1
+            self._condition.notify()
+
+        if reason is not None or self._closed:
+            self._quit(driver)
+
+    @contextmanager
+    def borrow(self):
+        """Context manager around acquire/release that discards the browser if the caller fails."""
+        driver = self.acquire()
+        failed = False
+        try:
+            yield driver
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(driver, discard=failed)
+
+    def stats(self):
+        """Return a snapshot of the pool counters."""
+        with self._condition:
+            snapshot = dict(self._stats)
+            snapshot["idle"] = len(self._idle)
+            snapshot["in_use"] = len(self._in_use)
+        return snapshot
+
+    def format_stats(self):
+        stats = self.stats()
+        return (f"{stats['created']} started, {stats['reused']} reused, "
+                f"{stats['recycled_pages'] + stats['recycled_memory']} recycled, "
+                f"{stats['discarded']} discarded")
+
+    def close(self):
+        """Quit every idle browser. Browsers still borrowed are quit when they are released."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for pooled in idle:
+            self._quit(pooled.driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _memory_mb(driver):
+        try:
+            used = driver.execute_script(
+                "return (window.performance && performance.memory) ? performance.memory.usedJSHeapSize : 0;"
+            )
+            return (used or 0) / (1024 * 1024)
+        except Exception:
+            return 0
+
+    @staticmethod
+    def _reset(driver):
+        """Clear cookies, storage and extra tabs so the next place starts from a blank page."""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
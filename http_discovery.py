@@ -0,0 +1,104 @@
+import re
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from place_identity import FEATURE_ID_PATTERN, extract_feature_id, place_url
+from run_log import get_logger
+
+
+logger = get_logger(__name__)
+
+DISCOVERY_BROWSER = "browser"
+DISCOVERY_HTTP = "http"
+DISCOVERY_MODES = (DISCOVERY_BROWSER, DISCOVERY_HTTP)
+
+HTTP_TIMEOUT = 15
+HTTP_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36"),
+    "Accept-Language": "tr-TR,tr;q=0.9,en;q=0.8",
+}
+# Skips the EU cookie consent interstitial, which has no search results in it
+CONSENT_COOKIES = {"CONSENT": "YES+", "SOCS": "CAESEwgDEgk0ODE3Nzk3MjQaAmVuIAEaBgiA_LyaBg"}
+
+# A search result entry holds the place's feature id directly followed by its name
+_RESULT_PATTERN = re.compile(r'"(' + FEATURE_ID_PATTERN.pattern + r')","((?:[^"\\]|\\.)*)"')
+_PLACE_HREF_PATTERN = re.compile(r'https://www\.google\.[a-z.]+/maps/place/[^"\'\\\s<>]+')
+_UNICODE_ESCAPE = re.compile(r"\\u([0-9a-fA-F]{4})")
+
+
+def create_http_session(pool_size=10):
+    """
+    A requests Session with keep-alive connection pooling and retries for the discovery requests.
+
+    Parameters:
+        pool_size (int): Connections kept open per host.
+    """
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HTTP_HEADERS)
+    session.cookies.update(CONSENT_COOKIES)
+    return session
+
+
+def _unescape(payload):
+    # The results are a JSON string inside a JS array, so quotes and '=' arrive escaped
+    payload = _UNICODE_ESCAPE.sub(lambda match: chr(int(match.group(1), 16)), payload)
+    return payload.replace('\\"', '"').replace("\\/", "/")
+
+
+def parse_place_links(payload):
+    """
+    Extract the place links from a search results page.
+
+    Parameters:
+        payload (str): HTML of a Google Maps search URL.
+
+    Returns:
+        list: Place URLs in result order, without duplicates. Empty if the page has no results
+            in a known form (consent page, captcha, changed layout).
+    """
+    text = _unescape(payload)
+    links = []
+    seen = set()
+    for href in _PLACE_HREF_PATTERN.findall(text):
+        feature_id = extract_feature_id(href) or href
+        if feature_id not in seen:
+            seen.add(feature_id)
+            links.append(href)
+    for feature_id, name in _RESULT_PATTERN.findall(text):
+        if feature_id not in seen:
+            seen.add(feature_id)
+            links.append(place_url(feature_id, name.replace('\\"', '"')))
+    return links
+
+
+def discover_place_links(map_url, session=None):
+    """
+    Collect the place links of a search URL with a plain HTTP request instead of a browser.
+
+    Only the results embedded in the first response are found (what the feed shows before
+    any scrolling).
+
+    Returns:
+        list: Place URLs, or None if the request failed or the payload could not be parsed.
+    """
+    own_session = session is None
+    if own_session:
+        session = create_http_session(pool_size=1)
+    try:
+        response = session.get(map_url, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        return parse_place_links(response.text) or None
+    except requests.RequestException as e:
+        logger.warning(f"HTTP discovery failed: {e}")
+        return None
+    finally:
+        if own_session:
+            session.close()
@@ -0,0 +1,333 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from run_log import carry_context, get_logger
+
+
+logger = get_logger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_LEASED = "leased"
+JOB_DONE = "done"
+JOB_DEAD = "dead"  # Out of attempts; stays in the table until retried by hand
+JOB_STATUSES = (JOB_QUEUED, JOB_LEASED, JOB_DONE, JOB_DEAD)
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_LEASE_SECONDS = 300  # A job whose worker stops heartbeating for this long goes back to the queue
+BACKOFF_BASE_SECONDS = 30  # Wait before the first retry; doubles with every further attempt
+BACKOFF_MAX_SECONDS = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    dedupe_key TEXT UNIQUE,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, priority DESC, available_at);
+"""
+
+_JOB_COLUMNS = "job_id, kind, payload, priority, status, attempts, max_attempts, lease_owner, last_error"
+
+
+def backoff_delay(attempts, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_MAX_SECONDS):
+    """Seconds to wait before retrying a job that failed its attempts-th attempt: base, 2*base, 4*base, ... up to cap."""
+    return min(cap, base * 2 ** max(0, attempts - 1))
+
+
+class Job:
+    """A job as handed to a worker by JobQueue.lease()."""
+
+    __slots__ = ("job_id", "kind", "payload", "priority", "status", "attempts", "max_attempts",
+                 "lease_owner", "last_error")
+
+    def __init__(self, job_id, kind, payload, priority, status, attempts, max_attempts, lease_owner=None,
+                 last_error=None):
+        self.job_id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.priority = priority
+        self.status = status
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.lease_owner = lease_owner
+        self.last_error = last_error
+
+    @classmethod
+    def from_row(cls, row):
+        job_id, kind, payload, priority, status, attempts, max_attempts, lease_owner, last_error = row
+        return cls(job_id, kind, json.loads(payload), priority, status, attempts, max_attempts, lease_owner,
+                   last_error)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class JobQueue:
+    """
+    Durable work queue in one SQLite file (WAL mode), shared by the GUI and headless workers.
+
+    Workers lease the ready job with the highest priority; a lease expires unless the worker
+    renews it (see LeaseHeartbeat), so the jobs of a crashed worker go back to the queue. A
+    failed job is retried with exponential backoff until max_attempts, then dead-lettered.
+    Jobs with a dedupe_key are enqueued once, so re-enqueueing a batch adds only new work.
+
+    Every state change is one short IMMEDIATE transaction, so several processes can use the
+    same file; inside a process the connection is shared by the worker threads under a lock.
+
+    Parameters:
+        path (str): Queue database file; created with the schema if it does not exist.
+        lease_seconds (float): Lease length given by lease() and renewed by heartbeat().
+        shared_volume (bool): The file is on a network share used by several machines. WAL needs
+            shared memory between the processes, so a rollback journal is used instead.
+    """
+
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE_SECONDS, shared_volume=False):
+        self.path = path
+        self.folder = os.path.dirname(os.path.abspath(path))
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=" + ("DELETE" if shared_volume else "WAL"))
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def enqueue(self, kind, payload, priority=0, dedupe_key=None, max_attempts=DEFAULT_MAX_ATTEMPTS, delay=0):
+        """
+        Add a job.
+
+        Parameters:
+            kind (str): What the worker should do with it.
+            payload (dict): JSON-serializable job arguments.
+            priority (int): Higher priorities are leased first.
+            dedupe_key (str): A job with the same key already in the queue (in any status) keeps this one out.
+            delay (float): Seconds before the job may be leased.
+
+        Returns:
+            int: The new job_id, or None if it was a duplicate.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (kind, payload, dedupe_key, priority, status, max_attempts, available_at, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(dedupe_key) DO NOTHING",
+                (kind, json.dumps(payload, ensure_ascii=False), dedupe_key, priority, JOB_QUEUED, max_attempts,
+                 now + delay, now, now),
+            )
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def _expire_leases(self, connection, now):
+        # Jobs of workers that stopped heartbeating: retry them, or dead-letter them if that was the last attempt
+        connection.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END, "
+            "last_error = 'Lease of ' || lease_owner || ' expired', lease_owner = NULL, lease_expires_at = NULL, "
+            "available_at = ?, updated_at = ? WHERE status = ? AND lease_expires_at < ?",
+            (JOB_DEAD, JOB_QUEUED, now, now, JOB_LEASED, now),
+        )
+
+    def lease(self, worker_id, kinds=None):
+        """
+        Take the ready job with the highest priority (oldest first among equals) for worker_id.
+
+        Returns:
+            Job: The leased job (its attempts already counts this attempt), or None if no job is ready.
+        """
+        now = time.time()
+        kind_filter = ""
+        params = [JOB_QUEUED, now]
+        if kinds:
+            kind_filter = f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        with self._transaction() as connection:
+            self._expire_leases(connection, now)
+            row = connection.execute(
+                f"SELECT {_JOB_COLUMNS} FROM jobs WHERE status = ? AND available_at <= ?{kind_filter} "
+                "ORDER BY priority DESC, available_at, job_id LIMIT 1",
+                params,
+            ).fetchone()
+            if row is None:
+                return None
+            job = Job.from_row(row)
+            job.status = JOB_LEASED
+            job.attempts += 1
+            job.lease_owner = worker_id
+            connection.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, lease_owner = ?, lease_expires_at = ?, updated_at = ? "
+                "WHERE job_id = ?",
+                (JOB_LEASED, job.attempts, worker_id, now + self.lease_seconds, now, job.job_id),
+            )
+        return job
+
+    def _update_leased(self, job, assignments, params):
+        # Only the worker still holding the lease may change the job; returns False if the lease was lost
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE job_id = ? AND status = ? AND lease_owner = ?",
+                (*params, time.time(), job.job_id, JOB_LEASED, job.lease_owner),
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job):
+        """Renew the lease of a running job. Returns False if the job's lease expired and was taken back."""
+        return self._update_leased(job, "lease_expires_at = ?", (time.time() + self.lease_seconds,))
+
+    def complete(self, job, result=None):
+        """Mark a leased job done, keeping result (JSON-serializable) with it."""
+        done = self._update_leased(
+            job, "status = ?, result = ?, last_error = NULL, lease_owner = NULL, lease_expires_at = NULL",
+            (JOB_DONE, json.dumps(result, ensure_ascii=False, default=str)),
+        )
+        if done:
+            job.status = JOB_DONE
+        return done
+
+    def fail(self, job, error):
+        """
+        Record a failed attempt: retry after backoff_delay(attempts), or dead-letter after the last attempt.
+
+        Returns:
+            float: Seconds until the retry, or None if the job is now dead.
+        """
+        if job.attempts >= job.max_attempts:
+            status, delay = JOB_DEAD, None
+        else:
+            status, delay = JOB_QUEUED, backoff_delay(job.attempts)
+        if self._update_leased(
+            job, "status = ?, last_error = ?, available_at = ?, lease_owner = NULL, lease_expires_at = NULL",
+            (status, str(error), time.time() + (delay or 0)),
+        ):
+            job.status = status
+            job.last_error = str(error)
+        return delay
+
+    def release(self, job):
+        """Give a leased job back untouched (e.g. the worker is stopping); the attempt is not counted."""
+        if self._update_leased(
+            job, "status = ?, attempts = attempts - 1, available_at = ?, lease_owner = NULL, lease_expires_at = NULL",
+            (JOB_QUEUED, time.time()),
+        ):
+            job.status = JOB_QUEUED
+
+    def counts(self):
+        """Number of jobs per status (every status is present)."""
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        with self._lock:
+            for status, count in self._connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+                counts[status] = count
+        return counts
+
+    def pending(self):
+        """Jobs that still have to run: queued (possibly waiting for a retry) or leased."""
+        counts = self.counts()
+        return counts[JOB_QUEUED] + counts[JOB_LEASED]
+
+    def get(self, job_id):
+        """The job with job_id as stored, or None if there is no such job."""
+        with self._lock:
+            row = self._connection.execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def dead_letters(self, limit=100):
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {_JOB_COLUMNS} FROM jobs WHERE status = ? ORDER BY updated_at DESC LIMIT ?", (JOB_DEAD, limit)
+            ).fetchall()
+        return [Job.from_row(row) for row in rows]
+
+    def retry_dead(self):
+        """Put every dead-lettered job back in the queue with fresh attempts. Returns how many."""
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE status = ?",
+                (JOB_QUEUED, now, now, JOB_DEAD),
+            )
+            return cursor.rowcount
+
+    def clear(self):
+        """Remove every job (a fresh, non-resumed run)."""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM jobs")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def open_job_queue(target, token=None, shared_volume=False):
+    """
+    The job queue at target: a JobQueue file (local or on a shared volume), or the
+    JobQueueServer at an http(s):// URL (token is its shared secret).
+    """
+    if target.startswith(("http://", "https://")):
+        from job_queue_server import RemoteJobQueue
+
+        return RemoteJobQueue(target, token=token)
+    return JobQueue(target, shared_volume=shared_volume)
+
+
+class LeaseHeartbeat:
+    """
+    Keeps a job's lease alive from a background thread while the job runs.
+
+    Use as a context manager around the work; lost is set if the lease expired anyway (the
+    job may then be running on another worker as well).
+    """
+
+    def __init__(self, job_queue, job, interval=None):
+        self.job_queue = job_queue
+        self.job = job
+        self.interval = interval or job_queue.lease_seconds / 3
+        self.lost = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=carry_context(self._run), name=f"lease-{job.job_id}", daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                renewed = self.job_queue.heartbeat(self.job)
+            except Exception as e:
+                # Try again at the next beat; the lease only expires after several missed beats
+                logger.warning(f"⚠️ Could not renew the lease of job {self.job.job_id}: {e}")
+                continue
+            if not renewed:
+                self.lost = True
+                logger.warning(f"⚠️ Lost the lease of job {self.job.job_id}; another worker may retry it.")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stopped.set()
+        self._thread.join()
+        return False
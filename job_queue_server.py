@@ -0,0 +1,267 @@
+"""
+Share one job queue between worker processes on several machines over HTTP.
+
+JobQueueServer exposes a JobQueue file on the machine that holds it; RemoteJobQueue is the
+client with the same methods, so run_queue works the same against either backend (see
+job_queue.open_job_queue). Every call is a POST /<method> with the arguments as a JSON
+object; leases, retries and dedupe stay in the server's SQLite transactions.
+
+    python -m scrape_cli serve-queue --queue location_links_collection.jobs.db --host 0.0.0.0 --token secret
+    python -m scrape_cli worker --queue http://<server>:8770 --token secret --wait
+"""
+import hmac
+import ipaddress
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from job_queue import JOB_DONE, Job
+from run_log import get_logger
+
+
+logger = get_logger(__name__)
+
+DEFAULT_QUEUE_PORT = 8770
+TOKEN_HEADER = "X-Queue-Token"
+REQUEST_TIMEOUT = 30
+MAX_REQUEST_BYTES = 1024 * 1024  # Larger request bodies are refused (413) without being read
+
+# Queue methods callable over HTTP and their arguments; the ones listed in _JOB_ARGUMENT take the job as "job".
+# clear() is left out on purpose: emptying the shared queue is only done on the machine that holds the file.
+_METHODS = {
+    "info": (),
+    "enqueue": ("kind", "payload", "priority", "dedupe_key", "max_attempts", "delay"),
+    "lease": ("worker_id", "kinds"),
+    "heartbeat": ("job",),
+    "complete": ("job", "result"),
+    "fail": ("job", "error"),
+    "release": ("job",),
+    "counts": (),
+    "pending": (),
+    "dead_letters": ("limit",),
+    "retry_dead": (),
+}
+_JOB_ARGUMENT = ("heartbeat", "complete", "fail", "release")
+
+
+class QueueRequestError(ValueError):
+    """A queue call with unknown or malformed arguments (answered with HTTP 400)."""
+
+
+def is_loopback_host(host):
+    """True if host only accepts connections from this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class JobQueueServer:
+    """
+    Serves a JobQueue over HTTP, one thread per request.
+
+    Parameters:
+        job_queue (JobQueue): The queue file on this machine.
+        host (str): Interface to listen on; use "0.0.0.0" to accept other machines.
+        port (int): Port; 0 picks a free one (see base_url).
+        token (str): Shared secret the clients must send. Without one only a loopback host is
+            allowed, so the queue is never open to the whole network.
+
+    Raises:
+        ValueError: host is not a loopback address and no token was given.
+    """
+
+    def __init__(self, job_queue, host="127.0.0.1", port=DEFAULT_QUEUE_PORT, token=None):
+        if not token and not is_loopback_host(host):
+            raise ValueError(f"Serving the queue on {host} needs a token (--token), or listen on 127.0.0.1")
+        self.job_queue = job_queue
+        self.token = token or None
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def is_authorized(self, token):
+        if self.token is None:
+            return True
+        return hmac.compare_digest((token or "").encode("utf-8"), self.token.encode("utf-8"))
+
+    def _leased_job(self, data):
+        # Only the id and the lease owner come from the client; everything else (attempts,
+        # max_attempts, ...) is read from the queue, so a client cannot forge them
+        if not isinstance(data, dict):
+            raise QueueRequestError("job must be an object")
+        job_id, lease_owner = data.get("job_id"), data.get("lease_owner")
+        if not isinstance(job_id, int) or isinstance(job_id, bool):
+            raise QueueRequestError("job.job_id must be an integer")
+        if not isinstance(lease_owner, str) or not lease_owner:
+            raise QueueRequestError("job.lease_owner must be a non-empty string")
+        job = self.job_queue.get(job_id)
+        if job is None:
+            raise QueueRequestError(f"Unknown job {job_id}")
+        job.lease_owner = lease_owner
+        return job
+
+    def call(self, method, arguments):
+        if not isinstance(arguments, dict):
+            raise QueueRequestError("The arguments must be a JSON object")
+        unknown = set(arguments) - set(_METHODS[method])
+        if unknown:
+            raise QueueRequestError(f"Unknown arguments for {method}: {', '.join(sorted(unknown))}")
+        if method == "info":
+            return {"path": self.job_queue.path, "lease_seconds": self.job_queue.lease_seconds}
+        if method in _JOB_ARGUMENT:
+            arguments["job"] = self._leased_job(arguments.get("job"))
+        result = getattr(self.job_queue, method)(**arguments)
+        if isinstance(result, Job):
+            return result.as_dict()
+        if isinstance(result, list):
+            return [job.as_dict() for job in result]
+        return result
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                method = self.path.strip("/")
+                # Token and size are checked before the body is read, so a bad request costs no memory
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                except ValueError:
+                    length = -1
+                if not server.is_authorized(self.headers.get(TOKEN_HEADER)):
+                    self._reply(401, {"error": "Bad or missing queue token"}, body_read=False)
+                elif length < 0:
+                    self._reply(400, {"error": "Bad Content-Length"}, body_read=False)
+                elif length > MAX_REQUEST_BYTES:
+                    self._reply(413, {"error": f"Request body over {MAX_REQUEST_BYTES} bytes"}, body_read=False)
+                elif method not in _METHODS:
+                    self._reply(404, {"error": f"Unknown queue method {method!r}"}, body_read=False)
+                else:
+                    body = self.rfile.read(length)
+                    try:
+                        status, response = 200, {"result": server.call(method, json.loads(body or b"{}"))}
+                    except (QueueRequestError, TypeError, json.JSONDecodeError) as e:
+                        status, response = 400, {"error": str(e)}
+                    except Exception as e:
+                        logger.warning(f"⚠️ Queue call {method} failed: {e}")
+                        status, response = 500, {"error": str(e)}
+                    self._reply(status, response)
+
+            def _reply(self, status, response, body_read=True):
+                data = json.dumps(response, ensure_ascii=False, default=str).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                if not body_read:
+                    # The unread body would be taken for the next request: end the connection instead
+                    self.send_header("Connection", "close")
+                    self.close_connection = True
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="job-queue-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class RemoteJobQueueError(RuntimeError):
+    """The queue server refused or failed a call."""
+
+
+class RemoteJobQueue:
+    """
+    Client of a JobQueueServer with the methods of JobQueue.
+
+    Parameters:
+        url (str): Base URL of the server, e.g. http://queue-host:8770.
+        token (str): Shared secret of the server, if it has one.
+    """
+
+    def __init__(self, url, token=None):
+        self.path = url.rstrip("/")
+        self.folder = os.getcwd()  # Outputs and traces of a remote queue's jobs are written locally
+        self._session = requests.Session()
+        if token:
+            self._session.headers[TOKEN_HEADER] = token
+        self.lease_seconds = self._call("info")["lease_seconds"]
+
+    def _call(self, method, **arguments):
+        response = self._session.post(f"{self.path}/{method}", json=arguments, timeout=REQUEST_TIMEOUT)
+        try:
+            data = response.json()
+        except ValueError:
+            data = {"error": response.text[:200]}
+        if response.status_code != 200:
+            raise RemoteJobQueueError(f"{method}: HTTP {response.status_code}: {data.get('error')}")
+        return data["result"]
+
+    def enqueue(self, kind, payload, priority=0, dedupe_key=None, max_attempts=None, delay=0):
+        arguments = dict(kind=kind, payload=payload, priority=priority, dedupe_key=dedupe_key, delay=delay)
+        if max_attempts is not None:
+            arguments["max_attempts"] = max_attempts
+        return self._call("enqueue", **arguments)
+
+    def lease(self, worker_id, kinds=None):
+        data = self._call("lease", worker_id=worker_id, kinds=kinds)
+        return Job(**data) if data else None
+
+    def heartbeat(self, job):
+        return self._call("heartbeat", job=job.as_dict())
+
+    def complete(self, job, result=None):
+        done = self._call("complete", job=job.as_dict(), result=result)
+        if done:
+            job.status = JOB_DONE
+        return done
+
+    def fail(self, job, error):
+        delay = self._call("fail", job=job.as_dict(), error=str(error))
+        job.last_error = str(error)
+        return delay
+
+    def release(self, job):
+        self._call("release", job=job.as_dict())
+
+    def counts(self):
+        return self._call("counts")
+
+    def pending(self):
+        return self._call("pending")
+
+    def dead_letters(self, limit=100):
+        return [Job(**data) for data in self._call("dead_letters", limit=limit)]
+
+    def retry_dead(self):
+        return self._call("retry_dead")
+
+    def close(self):
+        self._session.close()
@@ -1,60 +1,151 @@
-from selenium import webdriver
+import os
+
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 import pandas as pd
-import time
-
-
-
-def locationScrapper(map_url, number_of_scroll):
-    # Chrome WebDriver başlat
-    service = Service(executable_path="chromedriver.exe")  # Dosya yolunu kendi bilgisayarına göre düzenle
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless=new")
-    driver = webdriver.Chrome(service=service, options=options)
-
-
-    NUMBER_OF_SCROLL = number_of_scroll
-    # Google Maps URL'si
-    url = map_url
 
+from cancellation import DriverWatchdog, ScrapeCancelled, raise_if_cancelled
+from driver_pool import DriverPool
+from scroll_engine import scroll_until_stable
+from file_utils import atomic_write_text
+from review_writers import partial_output_path
+from http_discovery import DISCOVERY_BROWSER, DISCOVERY_HTTP, discover_place_links
+from place_identity import dedupe_place_links
+from run_trace import NULL_TRACER, page_transfer_bytes
+from run_log import get_logger
 
 
+logger = get_logger(__name__)
 
-    driver.get(url)
+PLACE_CARD_SELECTOR = 'a[href*="/place/"]'
+FEED_END_SELECTOR = ".HlvSq"  # "Listenin sonuna ulaştınız" yazısı
+FEED_LOAD_TIMEOUT = 15
+FEED_IDLE_TIMEOUT = 4
 
-    # Sayfanın yüklenmesini bekle
-    time.sleep(4)
+# Listedeki kartların linkleri, start sırasından itibaren (her kaydırmada yalnızca yeni gelenler okunur)
+_CARD_LINKS_JS = """
+var nodes = arguments[0].querySelectorAll(arguments[1]);
+var links = [];
+for (var i = arguments[2]; i < nodes.length; i++) {
+    links.push(nodes[i].href);
+}
+return links;
+"""
 
-    # Soldaki scroll edilebilir bölgeyi bul
-    scrollable_div = driver.find_element(By.XPATH, '//div[@role="feed"]')
 
-    # 4 kez aşağı kaydır
-    for _ in range(NUMBER_OF_SCROLL):
-        driver.execute_script("arguments[0].scrollTop = arguments[0].scrollTop + arguments[0].offsetHeight;", scrollable_div)
-        time.sleep(2)
+def _save_links(links, output_csv):
+    # Yinelenenleri kaldır (aynı yerin farklı sorgu parametreli linkleri de dahil)
+    links = dedupe_place_links(links)
 
-    # Lokasyon kartlarını topla
-    time.sleep(2)  # Scroll sonrası yeni içerik yüklenmesi için bekle
-    cards = driver.find_elements(By.XPATH, '//a[contains(@href, "/place/")]')
+    # CSV dosyasına kaydet (yarım kalmış dosya oluşmasın diye geçici dosya + yeniden adlandırma)
+    df = pd.DataFrame(links, columns=["Location Link"])
+    atomic_write_text(output_csv, df.to_csv(index=False), encoding="utf-8-sig")
+
+    logger.info(f"{len(links)} link kaydedildi.")
+
+
+def locationScrapper(map_url, number_of_scroll, driver_pool=None, target_count=None, time_budget=None,
+                     output_csv="location_links.csv", discovery_mode=DISCOVERY_BROWSER, http_session=None,
+                     tracer=None, stop_event=None):
+    tracer = tracer or NULL_TRACER
+    raise_if_cancelled(stop_event)
+
+    # Hızlı yol: arama sonuçlarını tarayıcısız, tek HTTP isteğiyle çek; çözülemezse tarayıcıya dön
+    if discovery_mode == DISCOVERY_HTTP:
+        with tracer.phase("discovery_http", place=map_url) as span:
+            links = discover_place_links(map_url, session=http_session)
+            span.items = len(links or [])
+        if links:
+            logger.info(f"HTTP ile {len(links)} lokasyon bulundu.")
+            _save_links(links, output_csv)
+            return True
+        logger.warning("HTTP sonuçları çözülemedi, tarayıcı ile devam ediliyor.")
+
+    # Havuzdan hazır bir Chrome oturumu al; havuz verilmediyse tek seferlik tarayıcı aç
+    own_pool = driver_pool is None
+    if own_pool:
+        driver_pool = DriverPool()
+    driver = driver_pool.acquire()
+    # Durdurulunca tarayıcıyı hemen kapat; o ana kadar görülen linkler ayrı bir .partial dosyasına yazılır
+    # (eski tam listenin üzerine yazmasın)
+    watchdog = DriverWatchdog(driver, stop_event).start()
+    failed = False
+    seen_links = []
 
-    # Linkleri al ve filtrele
-    links = []
-    for card in cards:
-        href = card.get_attribute("href")
-        if href and "/place/" in href:
-            links.append(href)
 
-    # Yinelenenleri kaldır
-    links = list(set(links))
+    NUMBER_OF_SCROLL = number_of_scroll
+    # Google Maps URL'si
+    url = map_url
 
-    # CSV dosyasına kaydet
-    df = pd.DataFrame(links, columns=["Location Link"])
-    df.to_csv("location_links.csv", index=False, encoding="utf-8-sig")
 
-    print(f"{len(links)} link kaydedildi.")
 
-    # Tarayıcıyı kapat
-    driver.quit()
+    try:
+        with tracer.phase("page_load", place=url) as span:
+            driver.get(url)
+
+            # Sayfanın yüklenmesini bekle ve soldaki scroll edilebilir bölgeyi bul
+            scrollable_div = WebDriverWait(driver, FEED_LOAD_TIMEOUT).until(
+                EC.presence_of_element_located((By.XPATH, '//div[@role="feed"]'))
+            )
+            span.bytes = page_transfer_bytes(driver)
+
+        # Her kaydırmadan sonra yeni kartların linklerini biriktir; durdurulursa bunlar kaydedilir
+        def remember_links(card_count, scrolls):
+            seen_links.extend(
+                driver.execute_script(_CARD_LINKS_JS, scrollable_div, PLACE_CARD_SELECTOR, len(seen_links)) or []
+            )
+            return False
+
+        # Yeni kart gelmeyene, liste sonuna, hedef sayıya ya da süre sınırına kadar kaydır
+        with tracer.phase("feed_scroll", place=url) as span:
+            scroll_result = scroll_until_stable(
+                driver, scrollable_div,
+                item_selector=PLACE_CARD_SELECTOR,
+                max_scrolls=NUMBER_OF_SCROLL,
+                target_count=target_count,
+                time_budget=time_budget,
+                idle_timeout=FEED_IDLE_TIMEOUT,
+                end_selector=FEED_END_SELECTOR,
+                on_progress=remember_links,
+                stop_event=stop_event,
+            )
+            span.items = scroll_result.item_count
+        raise_if_cancelled(stop_event)
+        logger.info(f"Kaydırma bitti: {scroll_result.item_count} kart, {scroll_result.scrolls} kaydırma ({scroll_result.reason})")
+
+        # Lokasyon kartlarını topla
+        cards = driver.find_elements(By.XPATH, '//a[contains(@href, "/place/")]')
+
+        # Linkleri al ve filtrele
+        links = []
+        for card in cards:
+            href = card.get_attribute("href")
+            if href and "/place/" in href:
+                links.append(href)
+
+    except Exception as e:
+        failed = True
+        # Durdurulduktan sonraki hatalar (kapatılan tarayıcı gibi) durdurmanın parçasıdır
+        cancelled = stop_event is not None and stop_event.is_set()
+        if cancelled and seen_links:
+            partial_csv = partial_output_path(output_csv)
+            logger.warning(f"Durduruldu: o ana kadar bulunan linkler {partial_csv} dosyasına kaydediliyor.")
+            _save_links(seen_links, partial_csv)
+        if cancelled and not isinstance(e, ScrapeCancelled):
+            raise ScrapeCancelled() from e
+        raise
+
+    finally:
+        # Tarayıcıyı havuza geri ver (hata olduysa kapat)
+        watchdog.stop()
+        driver_pool.release(driver, discard=failed)
+        if own_pool:
+            driver_pool.close()
+
+    _save_links(links, output_csv)
+    # Tam liste kaydedildi; önceki durdurulmuş çalışmanın yarım listesine artık gerek yok
+    if os.path.exists(partial_output_path(output_csv)):
+        os.remove(partial_output_path(output_csv))
 
     return True
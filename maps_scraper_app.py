@@ -1,97 +1,93 @@
 import sys
 import os
-import time
+import threading
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                            QLabel, QLineEdit, QSpinBox, QPushButton, QTextEdit, 
-                            QFileDialog, QProgressBar, QGroupBox, QFormLayout, QMessageBox)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize
+                            QLabel, QLineEdit, QSpinBox, QPushButton, QPlainTextEdit, 
+                            QComboBox, QCheckBox, QFileDialog, QProgressBar, QGroupBox, QFormLayout, QMessageBox)
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal, QSize
 from PyQt5.QtGui import QFont, QIcon, QColor, QPalette
 
 # Import the scraper modules
-import location_scrapper
-import review_scrapper2
+import parallel_scraper
+import http_discovery
+import place_cache
+import review_extraction
+import review_store
+import review_writers
+import run_log
+import scrape_pipeline
 
 class WorkerThread(QThread):
     """Worker thread for running the scraping operations without freezing the UI"""
-    update_signal = pyqtSignal(str)
     progress_signal = pyqtSignal(int)
     finished_signal = pyqtSignal(bool)
     
-    def __init__(self, url, scroll_location, scroll_review, folder_name, html_folder_name):
+    def __init__(self, url, scroll_location, scroll_review, folder_name, html_folder_name, parallelism=1,
+                 extraction_mode=review_extraction.EXTRACTION_BS4, resume=False, incremental=False,
+                 lean_browser=False, discovery_mode=http_discovery.DISCOVERY_BROWSER,
+                 sinks=review_writers.DEFAULT_SINKS, database_path=review_store.DEFAULT_DATABASE_PATH,
+                 download_photos=False, log_queue=None, log_file=None, streaming=False,
+                 place_cache_ttl_hours=place_cache.DEFAULT_PLACE_CACHE_TTL_HOURS):
         super().__init__()
         self.url = url
         self.scroll_location = scroll_location
         self.scroll_review = scroll_review
         self.folder_name = folder_name
         self.html_folder_name = html_folder_name
-        self.csv_path = "location_links.csv"
-        # Store original print function
-        self.original_print = print
-        # Flag to check if stop was requested
+        self.parallelism = parallelism
+        self.extraction_mode = extraction_mode
+        self.resume = resume
+        self.incremental = incremental
+        self.streaming = streaming
+        self.lean_browser = lean_browser
+        self.discovery_mode = discovery_mode
+        self.sinks = sinks
+        self.database_path = database_path
+        self.download_photos = download_photos
+        self.place_cache_ttl_hours = place_cache_ttl_hours
+        # Flag to check if stop was requested; the event is shared with the place workers
         self.stop_requested = False
-    
-    def custom_print(self, *args, **kwargs):
-        """Custom print function that sends output to our signal"""
-        text = " ".join(map(str, args))
-        self.update_signal.emit(text)
-        self.original_print(*args, **kwargs)
+        self.stop_event = threading.Event()
+        # This run's log lines (and no other worker's) go to log_queue, and to log_file if given
+        self.run_id = run_log.new_run_id()
+        self.log_queue = log_queue or run_log.LogQueue()
+        self.log_file = log_file
     
     def stop(self):
         """Request the thread to stop"""
         self.stop_requested = True
-        self.update_signal.emit("⚠️ Stop requested. Finishing current operation...")
+        self.stop_event.set()
+        self.log_queue.put_text("⚠️ Stop requested. Saving what was scraped and closing the browsers...", level="WARNING")
     
     def run(self):
-        try:
-            # Create a print redirection using monkeypatching at the module level
-            import builtins
-            builtins.print = self.custom_print
-            
-            # Step 1: Scrape location links
-            self.update_signal.emit("🔍 Starting location scraping...")
-            
-            if not self.stop_requested:
-                location_scrapper.locationScrapper(self.url, self.scroll_location)
-                self.progress_signal.emit(25)
-                self.update_signal.emit("📋 Location links scraped successfully.")
-            
-            # Step 2: Wait a bit and then get the links
-            if not self.stop_requested:
-                time.sleep(2)
-                self.update_signal.emit("📊 Processing location links...")
-                location_links = review_scrapper2.get_location_links(self.csv_path)
-                total_links = len(location_links)
-                self.update_signal.emit(f"🏢 Found {total_links} locations to process.")
-                self.progress_signal.emit(30)
-            
-            # Step 3: Scrape reviews for each location
-            if not self.stop_requested:
-                for i, link in enumerate(location_links):
-                    if self.stop_requested:
-                        self.update_signal.emit("🛑 Scraping stopped by user.")
-                        break
-                        
-                    progress = 30 + int(70 * ((i + 1) / total_links))
-                    self.update_signal.emit(f"🔍 Processing location {i+1}/{total_links}...")
-                    review_scrapper2.scrape_reviews_and_save_csv(
-                        link, self.scroll_review, self.folder_name, self.html_folder_name
+        with run_log.run_context(self.run_id):
+            try:
+                with run_log.attached(*run_log.run_handlers(self.log_queue, self.run_id, self.log_file)):
+                    settings = scrape_pipeline.ScrapeSettings(
+                        location_scroll=self.scroll_location,
+                        review_scroll=self.scroll_review,
+                        parallelism=self.parallelism,
+                        extraction_mode=self.extraction_mode,
+                        resume=self.resume,
+                        incremental=self.incremental,
+                        streaming=self.streaming,
+                        lean_browser=self.lean_browser,
+                        discovery_mode=self.discovery_mode,
+                        sinks=self.sinks,
+                        database_path=self.database_path,
+                        place_cache_ttl_hours=self.place_cache_ttl_hours,
+                        download_photos=self.download_photos,
+                    )
+                    completed = scrape_pipeline.run_single(
+                        self.url, self.folder_name, self.html_folder_name, settings,
+                        progress=self.progress_signal.emit,
+                        stop_event=self.stop_event,
                     )
-                    self.progress_signal.emit(progress)
-            
-            if not self.stop_requested:
-                self.update_signal.emit("✅ All scraping tasks completed successfully!")
-                self.progress_signal.emit(100)
-            
-            # Restore the original print function
-            builtins.print = self.original_print
-            self.finished_signal.emit(not self.stop_requested)
-            
-        except Exception as e:
-            self.update_signal.emit(f"❌ Error occurred: {str(e)}")
-            # Restore the original print function
-            import builtins
-            builtins.print = self.original_print
-            self.finished_signal.emit(False)
+                self.finished_signal.emit(completed and not self.stop_requested)
+
+            except Exception as e:
+                self.log_queue.put_text(f"❌ Error occurred: {str(e)}", level="ERROR")
+                self.finished_signal.emit(False)
 
 
 class MapsScraperApp(QMainWindow):
@@ -150,6 +146,74 @@ class MapsScraperApp(QMainWindow):
         scroll_layout.addWidget(self.review_scroll)
         config_layout.addRow("Scroll Settings:", scroll_layout)
         
+        # Number of places scraped at the same time
+        self.parallelism = QSpinBox()
+        self.parallelism.setRange(1, parallel_scraper.MAX_PARALLELISM)
+        self.parallelism.setValue(1)
+        config_layout.addRow("Parallelism:", self.parallelism)
+        
+        # How reviews are read from the page
+        self.extraction_mode = QComboBox()
+        self.extraction_mode.addItem("BeautifulSoup (per review)", review_extraction.EXTRACTION_BS4)
+        self.extraction_mode.addItem("In-browser JSON (one call)", review_extraction.EXTRACTION_JS)
+        self.extraction_mode.addItem("Network responses (CDP)", review_extraction.EXTRACTION_NETWORK)
+        config_layout.addRow("Extraction:", self.extraction_mode)
+        
+        # Skip places finished by a previous, interrupted run
+        self.resume_checkbox = QCheckBox("Resume previous run (skip finished places, retry failed ones)")
+        config_layout.addRow("Resume:", self.resume_checkbox)
+        
+        # Only fetch reviews newer than the ones already saved for each place
+        self.incremental_checkbox = QCheckBox("Incremental sync (append only new reviews)")
+        config_layout.addRow("Reviews:", self.incremental_checkbox)
+        
+        # Save reviews while scrolling and drop them from the page, so big places do not slow Chrome down
+        self.streaming_checkbox = QCheckBox("Streaming (save and prune reviews while scrolling)")
+        config_layout.addRow("", self.streaming_checkbox)
+        
+        # Lean browser profile: no images, fonts or media, eager page loads
+        self.lean_checkbox = QCheckBox("Lean browser (block images, fonts and media)")
+        config_layout.addRow("Browser:", self.lean_checkbox)
+        
+        # How places are found: scroll the results feed, or read the first results page over HTTP
+        self.discovery_mode = QComboBox()
+        self.discovery_mode.addItem("Browser (scroll the results feed)", http_discovery.DISCOVERY_BROWSER)
+        self.discovery_mode.addItem("HTTP fast path (first results page, browser fallback)",
+                                    http_discovery.DISCOVERY_HTTP)
+        config_layout.addRow("Discovery:", self.discovery_mode)
+        
+        # Where the reviews are saved: per-place files and/or one SQLite database
+        output_layout = QHBoxLayout()
+        self.csv_sink_checkbox = QCheckBox("CSV")
+        self.csv_sink_checkbox.setChecked(True)
+        self.html_sink_checkbox = QCheckBox("HTML")
+        self.html_sink_checkbox.setChecked(True)
+        self.sqlite_sink_checkbox = QCheckBox("SQLite")
+        self.parquet_sink_checkbox = QCheckBox("Parquet")
+        self.database_path = QLineEdit(review_store.DEFAULT_DATABASE_PATH)
+        output_layout.addWidget(self.csv_sink_checkbox)
+        output_layout.addWidget(self.html_sink_checkbox)
+        output_layout.addWidget(self.sqlite_sink_checkbox)
+        output_layout.addWidget(self.database_path)
+        output_layout.addWidget(self.parquet_sink_checkbox)
+        config_layout.addRow("Save to:", output_layout)
+        
+        # Download review photos so the HTML reports do not depend on Google's links
+        self.photos_checkbox = QCheckBox("Download photos (local HTML gallery)")
+        config_layout.addRow("Photos:", self.photos_checkbox)
+        
+        # Keep a rotating copy of the log next to the output
+        self.log_file_checkbox = QCheckBox(f"Write log file ({run_log.DEFAULT_LOG_FILE})")
+        config_layout.addRow("Log file:", self.log_file_checkbox)
+        
+        # A place listed twice in the results is scraped once per run; with Resume, places scraped
+        # by earlier runs within this many hours are reused too (0 = off)
+        self.place_cache_ttl = QSpinBox()
+        self.place_cache_ttl.setRange(0, 720)
+        self.place_cache_ttl.setValue(place_cache.DEFAULT_PLACE_CACHE_TTL_HOURS)
+        self.place_cache_ttl.setSuffix(" h")
+        config_layout.addRow("Place Cache TTL:", self.place_cache_ttl)
+        
         # Folder names
         folder_layout = QHBoxLayout()
         self.folder_name = QLineEdit("Şanlıurfa_Müzeler")
@@ -197,12 +261,20 @@ class MapsScraperApp(QMainWindow):
         log_layout = QVBoxLayout()
         log_group.setLayout(log_layout)
         
-        self.log_output = QTextEdit()
+        self.log_output = QPlainTextEdit()
         self.log_output.setReadOnly(True)
         self.log_output.setFont(QFont("Consolas", 10))
         self.log_output.setMinimumHeight(200)
+        self.log_output.setMaximumBlockCount(run_log.LOG_VIEW_MAX_LINES)
         log_layout.addWidget(self.log_output)
         
+        # The workers queue their log lines; the view takes them in batches on a timer
+        self.log_queue = run_log.LogQueue()
+        self.reported_drops = 0
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(self.drain_log)
+        self.log_timer.start(run_log.LOG_DRAIN_INTERVAL_MS)
+        
         main_layout.addWidget(log_group)
         
         # Load the last URL if available
@@ -221,7 +293,18 @@ class MapsScraperApp(QMainWindow):
             pass
     
     def add_to_log(self, message):
-        self.log_output.append(message)
+        # Queued behind the worker's lines, so the log keeps its order
+        self.log_queue.put_text(message)
+    
+    def drain_log(self):
+        events = self.log_queue.drain(run_log.LOG_DRAIN_BATCH)
+        lines = [event.message for event in events]
+        if self.log_queue.dropped > self.reported_drops:
+            lines.append(f"⚠️ {self.log_queue.dropped - self.reported_drops} log lines skipped (log too fast)")
+            self.reported_drops = self.log_queue.dropped
+        if not lines:
+            return
+        self.log_output.appendPlainText("\n".join(lines))
         # Auto-scroll to the bottom
         cursor = self.log_output.textCursor()
         cursor.movePosition(cursor.End)
@@ -230,11 +313,26 @@ class MapsScraperApp(QMainWindow):
     def clear_log(self):
         self.log_output.clear()
     
+    def selected_sinks(self):
+        sinks = []
+        if self.csv_sink_checkbox.isChecked():
+            sinks.append(review_writers.SINK_CSV)
+        if self.html_sink_checkbox.isChecked():
+            sinks.append(review_writers.SINK_HTML)
+        if self.sqlite_sink_checkbox.isChecked():
+            sinks.append(review_writers.SINK_SQLITE)
+        if self.parquet_sink_checkbox.isChecked():
+            sinks.append(review_writers.SINK_PARQUET)
+        return sinks
+    
     def start_scraping(self):
         # Validate inputs
         if not self.url_input.text():
             QMessageBox.warning(self, "Input Error", "Please enter a valid Google Maps URL.")
             return
+        if not self.selected_sinks():
+            QMessageBox.warning(self, "Input Error", "Please select at least one output (CSV, HTML, SQLite or Parquet).")
+            return
         
         # Disable start button and enable stop button
         self.start_button.setEnabled(False)
@@ -250,12 +348,27 @@ class MapsScraperApp(QMainWindow):
         scroll_review = self.review_scroll.value()
         folder_name = self.folder_name.text()
         html_folder_name = self.html_folder_name.text()
+        parallelism = self.parallelism.value()
+        extraction_mode = self.extraction_mode.currentData()
+        resume = self.resume_checkbox.isChecked()
+        incremental = self.incremental_checkbox.isChecked()
+        streaming = self.streaming_checkbox.isChecked()
+        lean_browser = self.lean_checkbox.isChecked()
+        discovery_mode = self.discovery_mode.currentData()
+        sinks = self.selected_sinks()
+        database_path = self.database_path.text() or review_store.DEFAULT_DATABASE_PATH
+        download_photos = self.photos_checkbox.isChecked()
+        place_cache_ttl_hours = self.place_cache_ttl.value()
+        log_file = run_log.DEFAULT_LOG_FILE if self.log_file_checkbox.isChecked() else None
         
         # Create and start worker thread
         self.worker_thread = WorkerThread(
-            url, scroll_location, scroll_review, folder_name, html_folder_name
+            url, scroll_location, scroll_review, folder_name, html_folder_name, parallelism,
+            extraction_mode, resume, incremental, lean_browser, discovery_mode,
+            sinks, database_path, download_photos,
+            log_queue=self.log_queue, log_file=log_file, streaming=streaming,
+            place_cache_ttl_hours=place_cache_ttl_hours,
         )
-        self.worker_thread.update_signal.connect(self.add_to_log)
         self.worker_thread.progress_signal.connect(self.progress_bar.setValue)
         self.worker_thread.finished_signal.connect(self.scraping_finished)
         
@@ -398,7 +511,7 @@ def apply_styles(app):
             margin: 0.5px;
         }}
         
-        QTextEdit {{
+        QPlainTextEdit {{
             border: 1px solid {ACCENT_COLOR.name()};
             border-radius: 4px;
             background-color: white;
@@ -0,0 +1,108 @@
+import queue
+import threading
+
+from cancellation import ScrapeCancelled
+from run_log import carry_context
+
+
+# Upper bound for the parallelism spinboxes; every worker keeps its own Chrome alive
+MAX_PARALLELISM = 8
+
+_DONE = object()
+
+
+class PlaceResult:
+    """Outcome of scraping one place, handed to the on_place_done callback."""
+
+    def __init__(self, index, link, value=None, error=None, cancelled=False):
+        self.index = index
+        self.link = link
+        self.value = value
+        self.error = error
+        self.cancelled = cancelled
+
+    @property
+    def ok(self):
+        return self.error is None and not self.cancelled
+
+
+def scrape_places_in_parallel(links, scrape_place, workers=1, stop_event=None, on_place_done=None):
+    """
+    Run scrape_place(link) for every link on a pool of worker threads.
+
+    Each worker borrows its own browser inside scrape_place, so sessions never share
+    state. Links are fed through a bounded queue so a huge link list is not expanded
+    up front, and results are reported one by one as places finish, in whatever
+    order that happens. Workers run in the caller's context, so their log lines
+    keep the caller's run id (see run_log).
+
+    Parameters:
+        links (list): Place links to scrape.
+        scrape_place (callable): Called as scrape_place(link) on a worker thread.
+        workers (int): Number of places scraped at the same time.
+        stop_event (threading.Event): When set, no new place is started and queued ones are cancelled;
+            a place that raises ScrapeCancelled counts as cancelled too.
+        on_place_done (callable): Called with (PlaceResult, completed_count, total) after every place.
+
+    Returns:
+        dict: Counts of "completed", "failed" and "cancelled" places.
+    """
+    links = list(links)
+    total = len(links)
+    workers = max(1, min(workers, total or 1))
+    stop_event = stop_event or threading.Event()
+
+    tasks = queue.Queue(maxsize=workers * 2)
+    lock = threading.Lock()
+    summary = {"completed": 0, "failed": 0, "cancelled": 0}
+    finished = [0]
+
+    def report(result):
+        with lock:
+            finished[0] += 1
+            if result.cancelled:
+                summary["cancelled"] += 1
+            elif result.error is not None:
+                summary["failed"] += 1
+            else:
+                summary["completed"] += 1
+            if on_place_done is not None:
+                on_place_done(result, finished[0], total)
+
+    def worker():
+        while True:
+            task = tasks.get()
+            if task is _DONE:
+                return
+            index, link = task
+            if stop_event.is_set():
+                report(PlaceResult(index, link, cancelled=True))
+                continue
+            try:
+                value = scrape_place(link)
+                report(PlaceResult(index, link, value=value))
+            except ScrapeCancelled:
+                report(PlaceResult(index, link, cancelled=True))
+            except Exception as e:
+                report(PlaceResult(index, link, error=e))
+
+    threads = [
+        threading.Thread(target=carry_context(worker), name=f"place-worker-{n + 1}", daemon=True)
+        for n in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Feed the bounded queue; put() blocks while all workers are busy
+    for index, link in enumerate(links):
+        if stop_event.is_set():
+            report(PlaceResult(index, link, cancelled=True))
+            continue
+        tasks.put((index, link))
+
+    for _ in threads:
+        tasks.put(_DONE)
+    for thread in threads:
+        thread.join()
+
+    return summary
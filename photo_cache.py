@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from file_utils import atomic_write_text
+from http_discovery import create_http_session
+from run_log import carry_context, get_logger
+
+
+logger = get_logger(__name__)
+
+DEFAULT_PHOTO_FOLDER = "photos"
+DEFAULT_PHOTO_WORKERS = 8
+THUMBNAIL_SIZE = 400
+PHOTO_TIMEOUT = 20
+MAX_PHOTO_BYTES = 5 * 1024 * 1024  # A 400px thumbnail is well under 100 KB; anything this big is not one
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+INDEX_NAME = "index.json"
+
+# Size options at the end of a googleusercontent URL, e.g. "=w300-h450-p-k-no"
+SIZE_SUFFIX_PATTERN = re.compile(r"=w\d+-h\d+[^/?#=]*$")
+
+_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/gif": ".gif"}
+
+
+def thumbnail_url(url, size=THUMBNAIL_SIZE):
+    """Ask Google for a size x size thumbnail instead of the size in the URL (URLs without size options are kept)."""
+    return SIZE_SUFFIX_PATTERN.sub(f"=w{size}-h{size}-k-no", url)
+
+
+class PhotoCache:
+    """
+    Downloads review photos into a content-addressed folder so HTML reports can show local copies.
+
+    Files are stored as <root>/<first two hex digits>/<sha256>.<ext>, so the same image
+    reached through different URLs is kept once. index.json maps every photo URL to its
+    file; URLs already in the index are not downloaded again. Downloads run on a bounded
+    thread pool sharing one keep-alive session. Responses that are not image/* or larger than
+    max_bytes are rejected (and counted as failed) without being stored.
+
+    Parameters:
+        root (str): Cache folder, shared by every place and run.
+        max_workers (int): Photos downloaded at the same time.
+        thumbnail_size (int): Edge length requested from Google; None keeps the URL's size.
+        session (requests.Session): Session to use, e.g. one pointed at a local test server.
+        max_bytes (int): Largest photo accepted.
+    """
+
+    def __init__(self, root=DEFAULT_PHOTO_FOLDER, max_workers=DEFAULT_PHOTO_WORKERS, thumbnail_size=THUMBNAIL_SIZE,
+                 session=None, max_bytes=MAX_PHOTO_BYTES):
+        self.root = root
+        self.max_workers = max_workers
+        self.thumbnail_size = thumbnail_size
+        self.max_bytes = max_bytes
+        self._own_session = session is None
+        self.session = session or create_http_session(pool_size=max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="photo-download")
+        self._lock = threading.Lock()
+        self.downloaded = 0
+        self.failed = 0
+        os.makedirs(root, exist_ok=True)
+
+        self.index_path = os.path.join(root, INDEX_NAME)
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as index_file:
+                self.index = json.load(index_file)
+
+    def local_path(self, url):
+        """Path of the cached copy of a photo URL, or None if it has not been downloaded."""
+        with self._lock:
+            relative = self.index.get(url)
+        if relative and os.path.exists(os.path.join(self.root, relative)):
+            return os.path.join(self.root, relative)
+        return None
+
+    def download_all(self, urls):
+        """
+        Make sure every photo URL is cached, downloading the missing ones concurrently.
+
+        Returns:
+            dict: Photo URL -> local file path, for every URL that is cached now.
+        """
+        paths = {}
+        missing = []
+        for url in dict.fromkeys(urls):
+            path = self.local_path(url)
+            if path:
+                paths[url] = path
+            else:
+                missing.append(url)
+
+        for url, path in zip(missing, self._executor.map(carry_context(self._download), missing)):
+            if path:
+                paths[url] = path
+
+        if missing:
+            with self._lock:
+                atomic_write_text(self.index_path, json.dumps(self.index, indent=0))
+        return paths
+
+    def _fetch(self, url):
+        # Streamed, so a huge or endless body is cut off at max_bytes instead of filling memory
+        with self.session.get(url, timeout=PHOTO_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if not content_type.startswith("image/"):
+                raise ValueError(f"not an image ({content_type or 'no content type'})")
+            declared = response.headers.get("Content-Length", "")
+            if declared.isdigit() and int(declared) > self.max_bytes:
+                raise ValueError(f"{int(declared)} bytes, more than {self.max_bytes}")
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ValueError(f"more than {self.max_bytes} bytes")
+                chunks.append(chunk)
+        return b"".join(chunks), content_type
+
+    def _download(self, url):
+        fetch_url = thumbnail_url(url, self.thumbnail_size) if self.thumbnail_size else url
+        try:
+            content, content_type = self._fetch(fetch_url)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Could not download photo {url}: {e}")
+            with self._lock:
+                self.failed += 1
+            return None
+
+        digest = hashlib.sha256(content).hexdigest()
+        relative = os.path.join(digest[:2], digest + _EXTENSIONS.get(content_type, ".jpg"))
+        path = os.path.join(self.root, relative)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.part"
+            with open(temp_path, "wb") as photo_file:
+                photo_file.write(content)
+            os.replace(temp_path, path)
+
+        with self._lock:
+            self.index[url] = relative.replace(os.sep, "/")
+            self.downloaded += 1
+        return path
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self._own_session:
+            self.session.close()
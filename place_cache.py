@@ -0,0 +1,61 @@
+import json
+import os
+import threading
+import time
+
+from file_utils import atomic_write_text
+
+
+PLACE_CACHE_VERSION = 1
+DEFAULT_PLACE_CACHE_TTL_HOURS = 24
+
+
+class PlaceCache:
+    """
+    Places whose reviews were scraped recently, keyed by canonical place id.
+
+    Overlapping batch searches ("Gaziantep-Things-To-Do", "Gaziantep-Museums", ...) find the
+    same places; a place already scraped within the TTL is linked to those results instead
+    of being scraped again for the next category. Saved atomically after every change, but
+    like the run manifest a fresh run starts empty: only a resumed run reuses the places of
+    an earlier run.
+
+    Parameters:
+        path (str): Cache JSON file.
+        ttl_hours (float): How long scraped reviews count as fresh.
+        resume (bool): Load the places recorded by previous runs.
+    """
+
+    def __init__(self, path, ttl_hours=DEFAULT_PLACE_CACHE_TTL_HOURS, resume=True):
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self._lock = threading.Lock()
+        self.data = None
+        if resume and os.path.exists(path):
+            with open(path, encoding="utf-8") as cache_file:
+                self.data = json.load(cache_file)
+        if not self.data or self.data.get("version") != PLACE_CACHE_VERSION:
+            self.data = {"version": PLACE_CACHE_VERSION, "places": {}}
+
+    def lookup(self, place_id):
+        """The cached entry (link, category, outputs, scraped_at) of a place, or None if missing or stale."""
+        if not place_id:
+            return None
+        with self._lock:
+            entry = self.data["places"].get(place_id)
+            if entry is None or time.time() - entry.get("scraped_at", 0) > self.ttl_seconds:
+                return None
+            return dict(entry)
+
+    def record(self, place_id, link, category, outputs):
+        """Remember that a place was scraped now, and where its results are."""
+        if not place_id:
+            return
+        with self._lock:
+            self.data["places"][place_id] = {
+                "link": link,
+                "category": category,
+                "outputs": outputs,
+                "scraped_at": time.time(),
+            }
+            atomic_write_text(self.path, json.dumps(self.data, ensure_ascii=False, indent=2))
@@ -0,0 +1,74 @@
+import re
+from urllib.parse import parse_qs, quote, urlsplit
+
+
+# Google Maps feature id of a place ("0x<cell>:0x<cid>"), as found in place URLs and search payloads
+FEATURE_ID_PATTERN = re.compile(r"0x[0-9a-f]{1,16}:0x[0-9a-f]{1,16}")
+
+# Place URL opened by feature id; the name part is only cosmetic
+PLACE_URL_TEMPLATE = "https://www.google.com/maps/place/{name}/data=!4m2!3m1!1s{feature_id}"
+
+
+def extract_feature_id(url):
+    """
+    The feature id of a Google Maps place URL.
+
+    Returns:
+        str: "0x...:0x..." from the URL's data parameter, or None if the URL has none.
+    """
+    match = re.search(r"!1s(" + FEATURE_ID_PATTERN.pattern + ")", url)
+    return match.group(1) if match else None
+
+
+def place_url(feature_id, name=""):
+    """Build a place URL that the review scraper can open from a feature id (and optional name)."""
+    name = quote((name or "place").replace(" ", "+"), safe="+")
+    return PLACE_URL_TEMPLATE.format(name=name, feature_id=feature_id)
+
+
+def extract_cid(url):
+    """
+    The CID (customer id) of a Google Maps place URL.
+
+    It is the second half of the feature id, or the cid/ludocid query parameter of
+    "maps?cid=..." style links.
+
+    Returns:
+        str: The CID as a decimal string, or None if the URL has none.
+    """
+    feature_id = extract_feature_id(url)
+    if feature_id:
+        return str(int(feature_id.split(":")[1], 16))
+    query = parse_qs(urlsplit(url).query)
+    for name in ("cid", "ludocid"):
+        if query.get(name) and query[name][0].isdigit():
+            return query[name][0]
+    return None
+
+
+def canonical_place_id(url):
+    """
+    A stable id for the place behind a URL, the same for every link form of that place.
+
+    Returns:
+        str: "cid:<CID>", or None if the URL carries neither a feature id nor a CID.
+    """
+    cid = extract_cid(url)
+    return f"cid:{cid}" if cid else None
+
+
+def dedupe_place_links(links):
+    """
+    Keep the first link of every place, in order.
+
+    Links of the same place differ by query parameters and path details, so they are
+    compared by canonical_place_id; links without one by their URL minus the query.
+    """
+    unique = []
+    seen = set()
+    for link in links:
+        key = canonical_place_id(link) or link.split("?")[0]
+        if key not in seen:
+            seen.add(key)
+            unique.append(link)
+    return unique
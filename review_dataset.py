@@ -0,0 +1,177 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from file_utils import atomic_write_text
+from review_writers import SINK_PARQUET
+from run_log import get_logger
+
+logger = get_logger(__name__)
+
+# pyarrow and pyarrow.parquet; imported by the first ReviewDataset, only the parquet sink needs them
+pa = None
+pq = None
+
+
+DEFAULT_DATASET_PATH = "reviews_dataset"
+MANIFEST_NAME = "_manifest.json"  # Names starting with "_" are skipped by Arrow dataset discovery
+DATASET_VERSION = 1
+UNCATEGORIZED = "uncategorized"
+
+# category and run_date are not stored in the files; they come from the hive partition folders
+PARTITION_COLUMNS = ("category", "run_date")
+
+
+def _load_pyarrow():
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("The parquet sink needs pyarrow (pip install pyarrow)") from None
+        pa, pq = pyarrow, pyarrow.parquet
+
+
+def review_schema():
+    return pa.schema([
+        ("review_id", pa.string()),
+        ("place_id", pa.string()),
+        ("place_title", pa.string()),
+        ("username", pa.string()),
+        ("rating", pa.float64()),
+        ("max_rating", pa.float64()),
+        ("rating_text", pa.string()),
+        ("review_text", pa.string()),
+        ("date_text", pa.string()),
+        ("photo_links", pa.list_(pa.string())),
+        ("scraped_at", pa.timestamp("ms", tz="UTC")),
+    ])
+
+
+def _safe_file_name(value):
+    return "".join(char if char.isalnum() or char in "-_." else "_" for char in value)
+
+
+class ReviewDataset:
+    """
+    Parquet dataset of the reviews of a run, partitioned as category=<Location>/run_date=<YYYY-MM-DD>.
+
+    Every place becomes one Parquet file with typed columns (numeric rating, list of photo
+    URLs, scrape timestamp). _manifest.json at the root lists the files with their row
+    counts, so the whole dataset can be read with pyarrow.dataset / pandas.read_parquet
+    instead of globbing CSVs.
+
+    Parameters:
+        root (str): Dataset folder; created if missing and shared by every run.
+    """
+
+    def __init__(self, root=DEFAULT_DATASET_PATH):
+        _load_pyarrow()
+        self.root = root
+        self.started_at = datetime.now(timezone.utc)
+        self.run_date = self.started_at.strftime("%Y-%m-%d")
+        self.run_stamp = self.started_at.strftime("%Y%m%dT%H%M%S")
+        self.schema = review_schema()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        # The manifest on disk, which other processes writing to the same dataset may have updated
+        manifest = None
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as manifest_file:
+                manifest = json.load(manifest_file)
+        if not manifest or manifest.get("version") != DATASET_VERSION:
+            manifest = {"version": DATASET_VERSION, "files": {}}
+        manifest["partitioning"] = list(PARTITION_COLUMNS)
+        manifest["schema"] = {field.name: str(field.type) for field in self.schema}
+        return manifest
+
+    def partition_dir(self, category):
+        # Hive partition values are URI-encoded, which is what Arrow decodes by default
+        return os.path.join(
+            self.root,
+            "category=" + quote(category or UNCATEGORIZED, safe=""),
+            "run_date=" + self.run_date,
+        )
+
+    def write_place(self, place_id, title, category, records):
+        """
+        Write one place's reviews as a Parquet file and record it in the manifest.
+
+        A place scraped again in the same run overwrites its own file.
+
+        Returns:
+            str: Path of the written file.
+        """
+        scraped_at = datetime.now(timezone.utc)
+        columns = {name: [] for name in self.schema.names}
+        for record in records:
+            columns["review_id"].append(record.review_id or None)
+            columns["place_id"].append(place_id)
+            columns["place_title"].append(title)
+            columns["username"].append(record.username)
+            columns["rating"].append(float(record.rating_value) if record.rating_value else None)
+            columns["max_rating"].append(float(record.max_rating) if record.max_rating else None)
+            columns["rating_text"].append(record.rating_text)
+            columns["review_text"].append(record.review_text)
+            columns["date_text"].append(record.date_text)
+            columns["photo_links"].append(list(record.photo_links))
+            columns["scraped_at"].append(scraped_at)
+        table = pa.table(columns, schema=self.schema)
+
+        folder = self.partition_dir(category)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{_safe_file_name(place_id)}-{self.run_stamp}.parquet")
+        pq.write_table(table, path + ".part")
+        os.replace(path + ".part", path)
+
+        # Merge into the manifest as it is on disk now, so the files recorded by other runs since
+        # this one started are kept
+        with self._lock:
+            self.manifest = self._read_manifest()
+            self.manifest["files"][os.path.relpath(path, self.root).replace(os.sep, "/")] = {
+                "place_id": place_id,
+                "title": title,
+                "category": category or UNCATEGORIZED,
+                "run_date": self.run_date,
+                "rows": table.num_rows,
+                "written_at": time.time(),
+            }
+            self.manifest["updated_at"] = time.time()
+            atomic_write_text(self.manifest_path, json.dumps(self.manifest, ensure_ascii=False, indent=2))
+        return path
+
+
+class ParquetReviewWriter:
+    """Review writer (see review_writers) that buffers a place's reviews and writes them as one Parquet file on close."""
+
+    sink = SINK_PARQUET
+
+    def __init__(self, dataset, place_id, title, category=None):
+        self.dataset = dataset
+        self.place_id = place_id
+        self.title = title
+        self.category = category
+        self.count = 0
+        self.path = None
+        self._records = []
+
+    def write(self, record):
+        self._records.append(record)
+        self.count += 1
+
+    def close(self):
+        self.path = self.dataset.write_place(self.place_id, self.title, self.category, self._records)
+        self._records = []
+        logger.info(f"✅ Parquet reviews successfully saved to {self.path}")
+
+    def abort(self):
+        self._records = []
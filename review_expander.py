@@ -0,0 +1,59 @@
+EXPAND_BUTTON_SELECTOR = ".w8nwRe.kyuRq"  # "Daha fazla" / "More" button of a truncated review
+
+# Quiet period that counts as "DOM settled" and the hard upper bound, in milliseconds
+DEFAULT_SETTLE_MS = 300
+DEFAULT_TIMEOUT_MS = 5000
+
+# Clicks every expander not clicked yet, then resolves once the DOM has been quiet for settleMs
+_EXPAND_ALL_JS = """
+var root = arguments[0] || document, selector = arguments[1];
+var settleMs = arguments[2], timeoutMs = arguments[3];
+var done = arguments[arguments.length - 1];
+
+var buttons = Array.prototype.filter.call(root.querySelectorAll(selector), function (button) {
+    return !button.hasAttribute('data-expand-clicked');
+});
+buttons.forEach(function (button) {
+    button.setAttribute('data-expand-clicked', '1');
+    try { button.click(); } catch (e) {}
+});
+if (!buttons.length) { done(0); return; }
+
+var finished = false, settleTimer = null, hardTimer = null;
+var observer = new MutationObserver(function () {
+    clearTimeout(settleTimer);
+    settleTimer = setTimeout(finish, settleMs);
+});
+function finish() {
+    if (finished) { return; }
+    finished = true;
+    observer.disconnect();
+    clearTimeout(settleTimer);
+    clearTimeout(hardTimer);
+    done(buttons.length);
+}
+observer.observe(root === document ? document.body : root, {childList: true, subtree: true, characterData: true});
+settleTimer = setTimeout(finish, settleMs);
+hardTimer = setTimeout(finish, timeoutMs);
+"""
+
+
+def expand_all_reviews(driver, root=None, settle_ms=DEFAULT_SETTLE_MS, timeout_ms=DEFAULT_TIMEOUT_MS):
+    """
+    Click every "more" button under root in a single in-page call and wait for the DOM to settle.
+
+    Buttons are marked once clicked, so calling this again after more reviews loaded only
+    expands the new ones. That lets the scroller expand reviews in increments while it scrolls.
+
+    Parameters:
+        driver: Selenium WebDriver.
+        root: WebElement to search under (the review panel); the whole document if None.
+        settle_ms (int): Milliseconds without DOM mutations that count as settled.
+        timeout_ms (int): Maximum milliseconds to wait for the DOM to settle.
+
+    Returns:
+        int: Number of buttons clicked.
+    """
+    return driver.execute_async_script(
+        _EXPAND_ALL_JS, root, EXPAND_BUTTON_SELECTOR, settle_ms, timeout_ms
+    ) or 0
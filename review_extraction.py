@@ -0,0 +1,211 @@
+import json
+import re
+
+from review_model import ReviewRecord
+
+
+PHOTO_URL_PATTERN = re.compile(r'url\("([^"]+)"\)')
+
+
+def parse_review_html(html):
+    """
+    Turn the HTML of one review element into a ReviewRecord with a single BeautifulSoup parse.
+
+    Parameters:
+        html (str): outerHTML (or innerHTML) of a '.jftiEf' review element.
+
+    Returns:
+        ReviewRecord: The extracted review.
+    """
+    from bs4 import BeautifulSoup  # Imported on first use so the command line starts without it
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    review_id = ''
+    root = soup.find(attrs={'data-review-id': True})
+    if root is not None:
+        review_id = root.get('data-review-id', '')
+
+    username = soup.find('div', class_='d4r55')
+
+    # Extract rating - try both methods
+    rating_value = None
+    max_rating = None
+    rating_text = ''
+
+    # Method 1: Check for numeric ratings (e.g., "5/5")
+    rating_numeric = soup.find('span', class_='fzvQIb')
+    if rating_numeric and rating_numeric.text.strip():
+        rating_text = rating_numeric.text.strip()
+        if '/' in rating_text:
+            try:
+                rating_value = float(rating_text.split('/')[0])
+                max_rating = float(rating_text.split('/')[1])
+            except (ValueError, IndexError):
+                rating_value = None
+                max_rating = None
+
+    # Method 2: Count the filled stars if no numeric rating was found
+    if not rating_value:
+        star_rating_element = soup.find('span', class_='kvMYJc')
+        if star_rating_element:
+            filled_stars = star_rating_element.find_all('span', class_=lambda cls: cls and 'elGi1d' in cls)
+            if filled_stars:
+                rating_value = len(filled_stars)
+                max_rating = 5
+                rating_text = f"{rating_value} stars"
+
+    review_text = soup.find('span', class_='wiI7pd')
+    date_text = soup.find('span', class_='rsqaWe')
+
+    # Extract photo links from the background-image style of the photo buttons
+    photo_links = []
+    for photo_el in soup.find_all('button', class_='Tya61d'):
+        img_url_match = PHOTO_URL_PATTERN.search(photo_el.get('style', ''))
+        if img_url_match:
+            photo_links.append(img_url_match.group(1))
+
+    return ReviewRecord(
+        review_id=review_id,
+        username=username.get_text(strip=True) if username else '',
+        rating_value=rating_value,
+        max_rating=max_rating,
+        rating_text=rating_text,
+        review_text=review_text.get_text(strip=True) if review_text else '',
+        date_text=date_text.get_text(strip=True) if date_text else '',
+        photo_links=photo_links,
+        raw_html=html,
+    )
+
+
+def extract_reviews(review_elements):
+    """
+    Read every review element once (a single WebDriver round trip each) and parse it into a ReviewRecord.
+
+    Parameters:
+        review_elements (list): '.jftiEf' WebElements.
+
+    Returns:
+        list: ReviewRecord objects in page order.
+    """
+    return list(iter_reviews(review_elements))
+
+
+def iter_reviews(review_elements):
+    """Like extract_reviews, but yields the records one by one so they can be written as they are parsed."""
+    for element in review_elements:
+        yield parse_review_html(element.get_attribute('outerHTML'))
+
+
+# Extraction backends selectable in scrape_reviews_and_save_csv
+EXTRACTION_BS4 = "bs4"
+EXTRACTION_JS = "js"
+EXTRACTION_NETWORK = "network"  # Decoded from the review XHR responses, see review_network
+EXTRACTION_MODES = (EXTRACTION_BS4, EXTRACTION_JS, EXTRACTION_NETWORK)
+
+# reviewRecord(el, includeHtml): one review element as a record object, mirroring parse_review_html
+REVIEW_RECORD_JS = r"""
+var photoPattern = /url\("([^"]+)"\)/;
+
+// Same result as BeautifulSoup's get_text(strip=True): every text node stripped and glued together
+function strippedText(node) {
+    if (!node) { return ''; }
+    var walker = document.createTreeWalker(node, NodeFilter.SHOW_TEXT, null);
+    var parts = [];
+    while (walker.nextNode()) {
+        var piece = walker.currentNode.nodeValue.trim();
+        if (piece) { parts.push(piece); }
+    }
+    return parts.join('');
+}
+
+function reviewRecord(el, includeHtml) {
+    var idNode = el.matches('[data-review-id]') ? el : el.querySelector('[data-review-id]');
+
+    var ratingValue = null, maxRating = null, ratingText = '';
+    var numeric = el.querySelector('span.fzvQIb');
+    if (numeric && numeric.textContent.trim()) {
+        ratingText = numeric.textContent.trim();
+        if (ratingText.indexOf('/') !== -1) {
+            var parts = ratingText.split('/');
+            ratingValue = Number(parts[0]);
+            maxRating = Number(parts[1]);
+            if (isNaN(ratingValue) || isNaN(maxRating) || parts[0].trim() === '' || parts[1].trim() === '') {
+                ratingValue = null;
+                maxRating = null;
+            }
+        }
+    }
+    if (!ratingValue) {
+        var starBox = el.querySelector('span.kvMYJc');
+        if (starBox) {
+            var filled = starBox.querySelectorAll('span[class*="elGi1d"]').length;
+            if (filled) {
+                ratingValue = filled;
+                maxRating = 5;
+                ratingText = filled + ' stars';
+            }
+        }
+    }
+
+    var photos = [];
+    el.querySelectorAll('button.Tya61d').forEach(function (button) {
+        var match = photoPattern.exec(button.getAttribute('style') || '');
+        if (match) { photos.push(match[1]); }
+    });
+
+    return {
+        review_id: idNode ? (idNode.getAttribute('data-review-id') || '') : '',
+        username: strippedText(el.querySelector('div.d4r55')),
+        rating_value: ratingValue,
+        max_rating: maxRating,
+        rating_text: ratingText,
+        review_text: strippedText(el.querySelector('span.wiI7pd')),
+        date_text: strippedText(el.querySelector('span.rsqaWe')),
+        photo_links: photos,
+        raw_html: includeHtml ? el.outerHTML : ''
+    };
+}
+"""
+
+# Walks every review inside the page and returns them already structured
+EXTRACT_REVIEWS_JS = REVIEW_RECORD_JS + r"""
+var selector = arguments[0], includeHtml = arguments[1];
+var reviews = [];
+document.querySelectorAll(selector).forEach(function (el) {
+    reviews.push(reviewRecord(el, includeHtml));
+});
+return JSON.stringify(reviews);
+"""
+
+
+def extract_reviews_js(driver, selector, include_html=True):
+    """
+    Extract every review with one execute_script call instead of one round trip per review.
+
+    Parameters:
+        driver: Selenium WebDriver with the review panel open.
+        selector (str): CSS selector of the review elements.
+        include_html (bool): Also return each review's outerHTML for the HTML report.
+
+    Returns:
+        list: ReviewRecord objects in page order.
+    """
+    payload = driver.execute_script(EXTRACT_REVIEWS_JS, selector, include_html)
+    return [ReviewRecord(**item) for item in json.loads(payload or "[]")]
+
+
+def extract_reviews_from_page(driver, selector, mode=EXTRACTION_BS4):
+    """
+    Extract the reviews currently on the page with the chosen backend ("bs4", "js" or "network").
+
+    Returns an iterable of ReviewRecords; the "bs4" backend yields them lazily.
+    """
+    if mode in (EXTRACTION_JS, EXTRACTION_NETWORK):
+        # The network backend reads the DOM only as a fallback, with the one-call JS extractor
+        return extract_reviews_js(driver, selector)
+    if mode == EXTRACTION_BS4:
+        from selenium.webdriver.common.by import By
+
+        return iter_reviews(driver.find_elements(By.CSS_SELECTOR, selector))
+    raise ValueError(f"Unknown extraction mode: {mode}")
@@ -0,0 +1,42 @@
+class ReviewRecord:
+    """
+    One extracted review. Every output sink (CSV, HTML, ...) is fed from these records,
+    so each review is read from the page and parsed exactly once.
+
+    Attributes:
+        review_id (str): Google's stable review id (data-review-id), '' when unknown.
+        username (str): Reviewer name, '' when missing.
+        rating_value (float): Numeric rating, None when the review has no rating.
+        max_rating (float): Upper bound of the rating scale, None when unknown.
+        rating_text (str): Rating as shown on the page ("5/5", "4 stars"), '' when missing.
+        review_text (str): Full review text, '' when missing.
+        date_text (str): When the review was written, as shown on the page ("2 hafta önce"), '' when missing.
+        photo_links (list): URLs of the photos attached to the review.
+        raw_html (str): Original HTML of the review element.
+    """
+
+    __slots__ = ("review_id", "username", "rating_value", "max_rating", "rating_text",
+                 "review_text", "date_text", "photo_links", "raw_html")
+
+    def __init__(self, review_id="", username="", rating_value=None, max_rating=None, rating_text="",
+                 review_text="", date_text="", photo_links=None, raw_html=""):
+        self.review_id = review_id
+        self.username = username
+        self.rating_value = rating_value
+        self.max_rating = max_rating
+        self.rating_text = rating_text
+        self.review_text = review_text
+        self.date_text = date_text
+        self.photo_links = photo_links if photo_links is not None else []
+        self.raw_html = raw_html
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        if not isinstance(other, ReviewRecord):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return f"ReviewRecord(review_id={self.review_id!r}, username={self.username!r}, rating={self.rating_text!r})"
@@ -0,0 +1,243 @@
+import base64
+import html
+import json
+
+from driver_pool import create_chrome_driver
+from review_expander import expand_all_reviews
+from review_extraction import extract_reviews_js
+from review_model import ReviewRecord
+from review_sync import loaded_review_ids
+from run_log import get_logger
+
+
+logger = get_logger(__name__)
+
+# Chrome capability that makes network events readable through driver.get_log("performance")
+NETWORK_LOGGING_CAPABILITIES = {"goog:loggingPrefs": {"performance": "ALL"}}
+
+# XHR endpoints the review panel loads its batches from
+REVIEW_RPC_MARKERS = ("/maps/rpc/listugcposts", "/maps/preview/review/listentitiesreviews")
+
+_XSSI_PREFIX = ")]}'"
+
+
+def network_chrome_driver(lean=False):
+    """Driver factory for DriverPool whose sessions keep the performance (network) log."""
+    return create_chrome_driver(lean=lean, capabilities=NETWORK_LOGGING_CAPABILITIES)
+
+
+def _dig(value, *path):
+    """Follow list indexes into a nested payload, returning None as soon as a step is missing."""
+    for index in path:
+        if not isinstance(value, list) or index >= len(value):
+            return None
+        value = value[index]
+    return value
+
+
+def _photo_urls(value):
+    """Collect the googleusercontent image URLs anywhere inside a payload fragment."""
+    urls = []
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(reversed(item))
+        elif isinstance(item, str) and item.startswith("https://") and "googleusercontent.com" in item:
+            if item not in urls:
+                urls.append(item)
+    return urls
+
+
+def _make_record(review_id, username, rating, text, date_text, photos, payload):
+    rating_value = rating if isinstance(rating, (int, float)) and rating > 0 else None
+    return ReviewRecord(
+        review_id=review_id or '',
+        username=username or '',
+        rating_value=rating_value,
+        max_rating=5 if rating_value else None,
+        rating_text=f"{int(rating_value)} stars" if rating_value else '',
+        review_text=(text or '').strip(),
+        date_text=date_text if isinstance(date_text, str) else '',
+        photo_links=photos,
+        raw_html=f"<pre>{html.escape(json.dumps(payload, ensure_ascii=False))}</pre>",
+    )
+
+
+def _decode_listugcposts(data):
+    # [null, next_page_token, [[review, ...], ...]] where review = [id, [.., author ..], [rating, .., text ..]]
+    records = []
+    for item in _dig(data, 2) or []:
+        review = _dig(item, 0)
+        review_id = _dig(review, 0)
+        if not isinstance(review_id, str):
+            continue
+        records.append(_make_record(
+            review_id,
+            _dig(review, 1, 4, 5, 0),
+            _dig(review, 2, 0, 0),
+            _dig(review, 2, 15, 0, 0),
+            _dig(review, 1, 6),
+            _photo_urls(_dig(review, 2, 2)),
+            review,
+        ))
+    return records
+
+
+def _decode_listentitiesreviews(data):
+    # [.., .., [review, ...]] where review = [[.., author], .., .., text, rating, .., .., .., .., .., id, .., .., .., photos]
+    records = []
+    for review in _dig(data, 2) or []:
+        review_id = _dig(review, 10)
+        if not isinstance(review_id, str):
+            continue
+        records.append(_make_record(
+            review_id,
+            _dig(review, 0, 1),
+            _dig(review, 4),
+            _dig(review, 3),
+            _dig(review, 1),
+            _photo_urls(_dig(review, 14)),
+            review,
+        ))
+    return records
+
+
+def decode_review_batch(url, body):
+    """
+    Decode one review XHR response into ReviewRecords.
+
+    Parameters:
+        url (str): Request URL, used to pick the payload layout.
+        body (str): Response body, with or without the )]}' anti-XSSI prefix.
+
+    Returns:
+        list: The decoded reviews; empty if the payload has an unknown shape.
+    """
+    text = body.strip()
+    if text.startswith(_XSSI_PREFIX):
+        text = text[len(_XSSI_PREFIX):]
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return []
+    try:
+        if "listugcposts" in url:
+            return _decode_listugcposts(data)
+        return _decode_listentitiesreviews(data)
+    except (TypeError, AttributeError):
+        return []
+
+
+class ReviewNetworkCapture:
+    """
+    Collects review batches from the network while the review panel is scrolled.
+
+    The driver must be started with NETWORK_LOGGING_CAPABILITIES. Call drain() after
+    every scroll: it reads the new network events, fetches the bodies of finished
+    review requests through CDP and decodes them, keeping one record per review id.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.records = {}
+        self.responses = 0
+        self._pending = {}
+
+    def reset(self):
+        """Drop everything logged so far (e.g. the place page load)."""
+        self._read_log()
+        self._pending.clear()
+
+    def drain(self):
+        """Process new network events; returns the number of new reviews decoded."""
+        before = len(self.records)
+        for message in self._read_log():
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived":
+                url = params.get("response", {}).get("url", "")
+                if any(marker in url for marker in REVIEW_RPC_MARKERS):
+                    self._pending[params.get("requestId")] = url
+            elif method == "Network.loadingFinished" and params.get("requestId") in self._pending:
+                request_id = params["requestId"]
+                url = self._pending.pop(request_id)
+                body = self._response_body(request_id)
+                if body is None:
+                    continue
+                self.responses += 1
+                for record in decode_review_batch(url, body):
+                    self.records.setdefault(record.review_id, record)
+        return len(self.records) - before
+
+    def _read_log(self):
+        messages = []
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception:
+            return messages
+        for entry in entries:
+            try:
+                messages.append(json.loads(entry["message"])["message"])
+            except (KeyError, ValueError):
+                continue
+        return messages
+
+    def _response_body(self, request_id):
+        try:
+            response = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        except Exception:
+            return None
+        body = response.get("body", "")
+        if response.get("base64Encoded"):
+            body = base64.b64decode(body).decode("utf-8", errors="replace")
+        return body
+
+
+def collect_captured_reviews(driver, container, selector, capture):
+    """
+    The reviews of the open panel, taken from the captured network responses where possible.
+
+    The first page of reviews is embedded in the place page rather than fetched, so reviews
+    that are in the list but were never captured are read from the DOM after one expand call,
+    and so are reviews without a review id, matched by their position in the list. If nothing was captured at all (no performance log, or an unknown payload layout) the
+    whole list comes from the DOM.
+
+    Returns:
+        list: ReviewRecords in the order of the review list.
+    """
+    capture.drain()
+    captured = capture.records
+    if not captured:
+        logger.warning("No review responses captured, falling back to the DOM.")
+        expand_all_reviews(driver, container)
+        return extract_reviews_js(driver, selector)
+
+    dom_ids = loaded_review_ids(driver, container, selector)
+    # Reviews without an id cannot be matched to a response; they are read from the DOM by position
+    missing = [review_id for review_id in dom_ids if not review_id or review_id not in captured]
+    logger.info(f"{len(captured)} reviews captured from {capture.responses} responses, {len(missing)} read from the DOM.")
+    without_id = dom_ids.count("")
+    if without_id:
+        logger.warning(f"⚠️ {without_id} reviews have no review id; kept in list order but cannot be deduplicated.")
+    dom_records = []
+    if missing:
+        expand_all_reviews(driver, container)
+        dom_records = extract_reviews_js(driver, selector)
+    dom_by_id = {record.review_id: record for record in dom_records if record.review_id}
+
+    records = []
+    for position, review_id in enumerate(dom_ids):
+        record = captured.get(review_id) if review_id else None
+        if record is None:
+            # Same selector and list order, so the position matches unless the list changed in between
+            if position < len(dom_records) and dom_records[position].review_id == review_id:
+                record = dom_records[position]
+            else:
+                record = dom_by_id.get(review_id)
+        if record is not None:
+            records.append(record)
+    # Captured reviews the panel has not rendered (yet) are kept too
+    seen = set(dom_ids)
+    records.extend(record for review_id, record in captured.items() if review_id not in seen)
+    return records
@@ -1,315 +1,336 @@
-import csv
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import time
-from bs4 import BeautifulSoup
 import pandas as pd
 import os
-import codecs
-import re
 
+from cancellation import DriverWatchdog, ScrapeCancelled, cancellable, raise_if_cancelled, sleep_unless_cancelled
+from driver_pool import DriverPool
+from scroll_engine import scroll_until_stable
+from review_expander import expand_all_reviews
+from review_stream import ReviewHarvester
+from review_sync import KnownReviewDetector, read_known_review_ids, sort_reviews_newest_first
+from review_extraction import EXTRACTION_BS4, EXTRACTION_NETWORK, extract_reviews_from_page
+from review_network import ReviewNetworkCapture, collect_captured_reviews, network_chrome_driver
+from review_writers import (RAW_HTML_LAZY, DEFAULT_SINKS, SINK_CSV, SINK_HTML, SINK_SQLITE, SINK_PARQUET,
+                            CsvReviewWriter, HtmlReviewWriter, ReviewWriterFanout)
+from review_store import SqliteReviewWriter, place_key
+from review_dataset import ParquetReviewWriter
+from run_trace import NULL_TRACER, page_transfer_bytes
+from run_log import get_logger
+
+logger = get_logger(__name__)
 
 csv_file = "location_links.csv" # Path to the CSV file containing location links # Folder to save CSV files
 
+REVIEW_SELECTOR = ".jftiEf.fontBodyMedium"
+REVIEW_IDLE_TIMEOUT = 3  # Seconds without new reviews before the list counts as fully loaded
+INCREMENTAL_SETTLE_MS = 150  # Shorter DOM settle wait for the expand pass after each scroll
+
+
+def scrape_reviews_and_save_csv(url, NUMBER_OF_SCROLL, FOLDER_NAME, HTML_FOLDER_NAME, driver_pool=None,
+                                target_count=None, time_budget=None, extraction_mode=EXTRACTION_BS4,
+                                raw_html_mode=RAW_HTML_LAZY, incremental=False, sinks=DEFAULT_SINKS,
+                                review_store=None, run_id=None, location=None, review_dataset=None, photo_cache=None,
+                                tracer=None, streaming=False, stop_event=None):
+    """
+    Scrape all reviews of one place and save them to the chosen sinks: a CSV and an HTML
+    file per place, the shared SQLite review_store (run_id and location are stored with
+    the place there) and/or the Parquet review_dataset (partitioned by location). With a
+    photo_cache the review photos are downloaded first and the HTML gallery uses the local copies.
+    Every phase is timed by tracer (see run_trace).
+
+    With incremental=True and an existing review CSV, the panel is sorted newest-first,
+    scrolling stops at the first review already in the CSV, only the new reviews are
+    appended to it, and the HTML report (<title>_reviews_new.html) holds just the new ones.
+    Without the CSV sink the stored ids come from the SQLite store instead.
+
+    With streaming=True the sinks are opened before scrolling and the reviews loaded by each
+    scroll are extracted, deduplicated by review id, written and removed from the page
+    (see review_stream), so browser memory and scroll cost stay flat on places with many
+    reviews, and what was saved before an error is kept in <title>_reviews.partial.csv/.html
+    and the SQLite store, next to (never over) the files of an earlier complete run (except
+    by an incremental sync, whose next run would otherwise stop at those reviews).
+
+    Setting stop_event stops the scroll, expand and parse loops and quits the browser within
+    a second (see cancellation.DriverWatchdog). The reviews parsed (or streamed) before the
+    stop are kept in the same .partial files, except by an incremental sync.
 
-def scrape_reviews_and_save_csv(url, NUMBER_OF_SCROLL, FOLDER_NAME, HTML_FOLDER_NAME):
-    # Setup Chrome
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new")
-    # chrome_options.add_argument("--headless")  # Uncomment for background run
+    Returns:
+        dict: title, place_id, csv_path, html_path (None for disabled sinks) and review_count
+            of the saved place, or None if it failed.
+
+    Raises:
+        ScrapeCancelled: stop_event was set before the place was finished.
+    """
+    tracer = tracer or NULL_TRACER
 
-    service = Service(executable_path="chromedriver.exe")
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    # Borrow a warm Chrome session; without a shared pool use a one-off browser as before
+    own_pool = driver_pool is None
+    if own_pool:
+        network_mode = extraction_mode == EXTRACTION_NETWORK
+        driver_pool = DriverPool(driver_factory=network_chrome_driver) if network_mode else DriverPool()
+    driver = driver_pool.acquire()
+    watchdog = DriverWatchdog(driver, stop_event).start()
+    failed = False
+    known_ids = set()
+    open_sinks = None  # The writers while they are open, so a stop or error can close them
+    parsed = []  # Records parsed before the photo stage opens the writers, written as partial output on a stop
 
     try:
-        driver.get(url)
+        with tracer.phase("page_load", place=url) as span:
+            driver.get(url)
 
-        element = driver.find_element(By.CSS_SELECTOR, "h1.DUwDvf.lfPIob")
+            # Wait for the title: with the lean profile's eager loading the page is still rendering here
+            element = WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "h1.DUwDvf.lfPIob"))
+            )
+            span.bytes = page_transfer_bytes(driver)
 
         # İçindeki metni al ve bir değişkene ata
         baslik = element.text
         baslik = baslik.replace(" ", "_")
+        tracer.name_place(url, baslik)
         csv_filename = baslik + "_reviews" + ".csv" 
         html_filename = baslik + "_reviews" + ".html"
+        csv_path = os.path.join(FOLDER_NAME, csv_filename)
+        place_id = place_key(url, baslik)
+        use_store = SINK_SQLITE in sinks and review_store is not None
+
+        # Reviews we already have; an incremental sync stops scrolling when it reaches one
+        if incremental and SINK_CSV in sinks:
+            known_ids = read_known_review_ids(csv_path)
+        elif incremental and use_store:
+            known_ids = review_store.known_review_ids(place_id)
+        if incremental and not known_ids:
+            logger.info("No stored reviews with ids for this place yet, doing a full scrape.")
+        if known_ids:
+            html_filename = baslik + "_reviews_new" + ".html"
+        if SINK_CSV not in sinks:
+            csv_path = None
+        html_path = os.path.join(HTML_FOLDER_NAME, html_filename) if SINK_HTML in sinks else None
+
+        def open_writers(photo_paths=None):
+            sink_writers = []
+            if csv_path:
+                # Create CSV folder
+                os.makedirs(FOLDER_NAME, exist_ok=True)
+                sink_writers.append(CsvReviewWriter(csv_path, append=bool(known_ids)))
+            if html_path:
+                # Create HTML folder for pretty HTML output
+                os.makedirs(HTML_FOLDER_NAME, exist_ok=True)
+                sink_writers.append(HtmlReviewWriter(html_path, baslik, raw_html_mode=raw_html_mode,
+                                                     photo_paths=photo_paths))
+            if use_store:
+                sink_writers.append(SqliteReviewWriter(review_store, place_id, baslik, url,
+                                                       run_id=run_id, location=location))
+            if SINK_PARQUET in sinks and review_dataset is not None:
+                sink_writers.append(ParquetReviewWriter(review_dataset, place_id, baslik, category=location))
+            return ReviewWriterFanout(sink_writers, tracer=tracer, place=url)
+
+        # Network extraction: forget the place page's own requests, record the review XHRs from here on
+        network_capture = None
+        if extraction_mode == EXTRACTION_NETWORK:
+            network_capture = ReviewNetworkCapture(driver)
+            network_capture.reset()
 
         # Step 1: Click the 'Yorumlar' button
-        containers = WebDriverWait(driver, 10).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".bJzME.tTVLSc"))
-        )
-
-        yorumlar_clicked = False
-        for container in containers:
-            buttons = container.find_elements(By.TAG_NAME, "button")
-            for button in buttons:
-                if "Yorumlar" in button.text:
-                    button.click()
-                    print("Clicked on 'Yorumlar'")
-                    yorumlar_clicked = True
+        with tracer.phase("yorumlar_click", place=url):
+            containers = WebDriverWait(driver, 10).until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".bJzME.tTVLSc"))
+            )
+
+            yorumlar_clicked = False
+            for container in containers:
+                buttons = container.find_elements(By.TAG_NAME, "button")
+                for button in buttons:
+                    if "Yorumlar" in button.text:
+                        button.click()
+                        logger.info("Clicked on 'Yorumlar'")
+                        yorumlar_clicked = True
+                        break
+                if yorumlar_clicked:
                     break
-            if yorumlar_clicked:
-                break
 
-        if not yorumlar_clicked:
-            print("Couldn't find 'Yorumlar' button.")
-            return
+            if not yorumlar_clicked:
+                logger.warning("Couldn't find 'Yorumlar' button.")
+                return
 
-        time.sleep(1)
+            sleep_unless_cancelled(1, stop_event)
 
-        # Step 2: Wait for review scroll container
-        scroll_container = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located(
-                (By.CSS_SELECTOR, ".m6QErb.DxyBCb.kA9KIf.dS8AEf.XiKgde")
+            # Step 2: Wait for review scroll container
+            scroll_container = WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located(
+                    (By.CSS_SELECTOR, ".m6QErb.DxyBCb.kA9KIf.dS8AEf.XiKgde")
+                )
             )
-        )
 
-        # Step 3: Scroll down multiple times
-        for i in range(NUMBER_OF_SCROLL):
-            driver.execute_script(
-                "arguments[0].scrollTop = arguments[0].scrollHeight", scroll_container
+        # Incremental sync: newest reviews first, so everything before the first known review is new
+        detector = None
+        newest_first = bool(known_ids) and sort_reviews_newest_first(driver, REVIEW_SELECTOR)
+        if newest_first:
+            logger.info(f"Sorted reviews by newest; {len(known_ids)} reviews already stored.")
+            detector = KnownReviewDetector(driver, scroll_container, REVIEW_SELECTOR, known_ids)
+
+        # Streaming: the sinks stay open while scrolling and every scroll's reviews go straight to them
+        harvester = None
+        photo_paths = {}
+        photo_seconds = [0.0]
+        reached_known = [False]
+        if streaming:
+            open_sinks = open_writers(photo_paths)
+            harvester = ReviewHarvester(driver, scroll_container, REVIEW_SELECTOR, extraction_mode=extraction_mode,
+                                        network_capture=network_capture)
+            # Pruning shifts the list under the detector; known reviews are spotted while harvesting instead
+            detector = None
+
+        def stream(records):
+            if known_ids:
+                if newest_first and any(record.review_id in known_ids for record in records):
+                    reached_known[0] = True
+                records = [record for record in records if record.review_id and record.review_id not in known_ids]
+            if photo_cache is not None and records:
+                started = time.perf_counter()
+                photo_paths.update(photo_cache.download_all(
+                    photo_url for record in records for photo_url in record.photo_links
+                ))
+                photo_seconds[0] += time.perf_counter() - started
+            open_sinks.write_all(records)
+            if not known_ids:
+                open_sinks.flush()
+
+        # Step 3: Scroll until no new reviews load (NUMBER_OF_SCROLL is only an upper bound),
+        # expanding the truncated reviews that just arrived after every scroll (or, in network mode,
+        # decoding the review responses that arrived; those hold the full texts already)
+        expanded = [0]
+
+        def report_scroll(review_count, scrolls):
+            raise_if_cancelled(stop_event)
+            if harvester is not None:
+                # Expand what just arrived, then move the settled reviews from the page to the sinks
+                expanded[0] += expand_all_reviews(driver, scroll_container, settle_ms=INCREMENTAL_SETTLE_MS)
+                stream(harvester.harvest())
+                logger.info(f"Scrolled {scrolls}/{NUMBER_OF_SCROLL} - {review_count} reviews loaded, "
+                            f"{open_sinks.count} saved, {harvester.pruned} pruned from the page")
+            elif network_capture is not None:
+                network_capture.drain()
+                logger.info(f"Scrolled {scrolls}/{NUMBER_OF_SCROLL} - {review_count} reviews loaded, "
+                            f"{len(network_capture.records)} captured")
+            else:
+                expanded[0] += expand_all_reviews(driver, scroll_container, settle_ms=INCREMENTAL_SETTLE_MS)
+                logger.info(f"Scrolled {scrolls}/{NUMBER_OF_SCROLL} - {review_count} reviews loaded, {expanded[0]} expanded")
+            if reached_known[0] or (detector is not None and detector.reached_known_review()):
+                logger.info("Reached reviews that are already stored.")
+                return True
+            return False
+
+        with tracer.phase("review_scroll", place=url) as span:
+            scroll_result = scroll_until_stable(
+                driver, scroll_container,
+                item_selector=REVIEW_SELECTOR,
+                max_scrolls=NUMBER_OF_SCROLL,
+                target_count=target_count,
+                time_budget=time_budget,
+                idle_timeout=REVIEW_IDLE_TIMEOUT,
+                on_progress=report_scroll,
+                stop_event=stop_event,
             )
-            print(f"Scrolled {i+1}/" + str(NUMBER_OF_SCROLL))
-            time.sleep(1)
-
-        # Step 4: Expand all reviews by clicking 'w8nwRe kyuRq' buttons
-        expand_buttons = driver.find_elements(By.CSS_SELECTOR, ".w8nwRe.kyuRq")
-        print(f"Found {len(expand_buttons)} expandable review buttons.")
-        for i, btn in enumerate(expand_buttons):
-            try:
-                driver.execute_script("arguments[0].click();", btn)
-                time.sleep(0.2)
-            except Exception as e:
-                print(f"Could not click expand button #{i}: {e}")
-
-        time.sleep(1)
-
-        # Step 5: Collect full reviews
-        review_elements = driver.find_elements(By.CSS_SELECTOR, ".jftiEf.fontBodyMedium")
-
-        # Create CSV folder and add csv file to that folder
-        os.makedirs(FOLDER_NAME, exist_ok=True)
-        csv_path = os.path.join(FOLDER_NAME, csv_filename)
+            span.items = scroll_result.item_count
+        raise_if_cancelled(stop_event)
+        logger.info(f"Stopped scrolling after {scroll_result.scrolls} scrolls ({scroll_result.reason}).")
+
+        # Step 4: Expand whatever is still truncated with one in-page call
+        if network_capture is None or harvester is not None:
+            with tracer.phase("expand", place=url) as span:
+                expanded[0] += expand_all_reviews(driver, scroll_container)
+                span.items = expanded[0]
+            logger.info(f"Expanded {expanded[0]} reviews.")
+
+        # Streaming: take the last reviews off the page and close the sinks
+        if harvester is not None:
+            stream(harvester.harvest(final=True))
+            tracer.record("harvest", harvester.seconds, place=url, items=harvester.pruned)
+            if photo_cache is not None:
+                tracer.record("photos", photo_seconds[0], place=url, items=len(photo_paths))
+                logger.info(f"Cached {len(photo_paths)} photos locally.")
+            writers, open_sinks = open_sinks, None
+            writers.close()
+            logger.info(f"Streamed {writers.count} {'new ' if known_ids else ''}reviews ({extraction_mode}); "
+                        f"{harvester.pruned} review elements pruned from the page, "
+                        f"{harvester.duplicates} duplicates skipped.")
+            return {"title": baslik, "place_id": place_id, "csv_path": csv_path, "html_path": html_path,
+                    "review_count": writers.count}
+
+        # Step 5: Parse each review exactly once and stream it to every output sink
+        if network_capture is not None:
+            records = collect_captured_reviews(driver, scroll_container, REVIEW_SELECTOR, network_capture)
+        else:
+            records = extract_reviews_from_page(driver, REVIEW_SELECTOR, mode=extraction_mode)
+        # Parsing may be lazy (bs4), so only the time spent producing records counts as parse
+        records = tracer.iterate("parse", records, place=url, size=lambda record: len(record.raw_html))
+        records = cancellable(records, stop_event)
+        if known_ids:
+            records = (record for record in records if record.review_id and record.review_id not in known_ids)
+
+        # Optional photo stage: fetch every photo concurrently before the HTML gallery is written
+        photo_paths = None
+        if photo_cache is not None:
+            for record in records:
+                parsed.append(record)
+            records = parsed
+            with tracer.phase("photos", place=url) as span:
+                photo_paths = photo_cache.download_all(
+                    photo_url for record in records for photo_url in record.photo_links
+                )
+                span.items = len(photo_paths)
+            logger.info(f"Cached {len(photo_paths)} photos locally.")
+
+        open_sinks = open_writers(photo_paths)
+        open_sinks.write_all(records)
+        writers, open_sinks = open_sinks, None
+        writers.close()
+        if known_ids:
+            logger.info(f"Appended {writers.count} new reviews ({extraction_mode}).")
+        else:
+            logger.info(f"Parsed {writers.count} reviews ({extraction_mode}).")
 
-        # Create HTML folder for pretty HTML output
-        os.makedirs(HTML_FOLDER_NAME, exist_ok=True)
-        html_path = os.path.join(HTML_FOLDER_NAME, html_filename)
-
-        # Save reviews to CSV
-        with open(csv_path, mode="w", newline='', encoding="utf-8") as file:
-            writer = csv.writer(file)
-            writer.writerow(['Username', 'Rating', 'Review', 'Photo_Links'])  # Header with Photo_Links
-            for element in review_elements:
-                html = element.get_attribute('innerHTML')
-                soup = BeautifulSoup(html, 'html.parser')
-                username = soup.find('div', class_='d4r55')
-                
-                # Extract rating - try both methods
-                rating_value = 0
-                rating_text = "No rating"
-                
-                # Method 1: Check for numeric ratings (e.g., "5/5")
-                rating_numeric = soup.find('span', class_='fzvQIb')
-                if rating_numeric and rating_numeric.text.strip():
-                    rating_text = rating_numeric.text.strip()
-                    # Extract number from rating like "5/5"
-                    if '/' in rating_text:
-                        try:
-                            rating_value = float(rating_text.split('/')[0])
-                        except ValueError:
-                            rating_value = 0
-                
-                # Method 2: Check for star ratings if no numeric rating
-                if rating_value == 0:
-                    star_rating_element = soup.find('span', class_='kvMYJc')
-                    if star_rating_element:
-                        # Count the number of filled stars
-                        filled_stars = star_rating_element.find_all('span', class_=lambda cls: cls and 'elGi1d' in cls)
-                        if filled_stars:
-                            rating_value = len(filled_stars)
-                            rating_text = f"{rating_value} stars"
-                
-                review_text = soup.find('span', class_='wiI7pd')
-                
-                # Extract photo links
-                photo_links = []
-                photo_elements = soup.find_all('button', class_='Tya61d')
-                for photo_el in photo_elements:
-                    style_attr = photo_el.get('style', '')
-                    img_url_match = re.search(r'url\("([^"]+)"\)', style_attr)
-                    if img_url_match:
-                        photo_links.append(img_url_match.group(1))
-
-                username_text = username.get_text(strip=True) if username else ''
-                review_text_text = review_text.get_text(strip=True) if review_text else ''
-                
-                # Join all photo links with comma for CSV
-                photo_links_text = ", ".join(photo_links) if photo_links else ''
-                
-                writer.writerow([username_text, rating_text, review_text_text, photo_links_text])
-
-            print("✅ Data successfully saved to " + csv_path)
-        
-        # Save reviews as pretty HTML
-        with codecs.open(html_path, 'w', encoding='utf-8') as html_file:
-            # Create HTML structure with styling
-            html_content = f'''<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <title>{baslik} - Reviews</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 20px; background-color: #f8f9fa; }}
-        h1 {{ color: #1a73e8; }}
-        .review-container {{ 
-            margin-bottom: 20px; 
-            padding: 15px; 
-            border-radius: 8px; 
-            background-color: white; 
-            box-shadow: 0 1px 3px rgba(0,0,0,0.12), 0 1px 2px rgba(0,0,0,0.24); 
-        }}
-        .username {{ 
-            font-weight: bold; 
-            font-size: 16px; 
-            color: #202124; 
-            margin-bottom: 5px; 
-        }}
-        .rating {{ 
-            color: #e7711b; 
-            margin-bottom: 8px; 
-            font-weight: bold; 
-        }}
-        .review-text {{ line-height: 1.5; }}
-        .original-html {{ 
-            margin-top: 15px; 
-            border-top: 1px solid #dadce0; 
-            padding-top: 10px; 
-            font-family: monospace; 
-        }}
-        .stars {{
-            color: #e7711b;
-            font-size: 20px;
-            letter-spacing: 3px;
-        }}
-        .photo-gallery {{
-            display: flex;
-            flex-wrap: wrap;
-            gap: 10px;
-            margin-top: 15px;
-        }}
-        .review-photo {{
-            width: 150px;
-            height: 150px;
-            object-fit: cover;
-            border-radius: 4px;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.12);
-        }}
-    </style>
-</head>
-<body>
-    <h1>{baslik} - Reviews</h1>
-    <p>Total reviews collected: {len(review_elements)}</p>
-    <div class="reviews">
-'''
-            
-            # Add each review
-            for i, element in enumerate(review_elements):
-                html = element.get_attribute('innerHTML')
-                soup = BeautifulSoup(html, 'html.parser')
-                username = soup.find('div', class_='d4r55')
-                
-                # Extract rating - try both methods
-                rating_value = 0
-                rating_display = ""
-                rating_text = ""
-                
-                # Method 1: Check for numeric ratings (e.g., "5/5")
-                rating_numeric = soup.find('span', class_='fzvQIb')
-                if rating_numeric and rating_numeric.text.strip():
-                    rating_text = rating_numeric.text.strip()
-                    # Extract number from rating like "5/5"
-                    if '/' in rating_text:
-                        try:
-                            rating_value = float(rating_text.split('/')[0])
-                            max_rating = float(rating_text.split('/')[1])
-                            # Show stars based on the rating
-                            stars_html = "★" * int(rating_value) + "☆" * int(max_rating - rating_value)
-                            rating_display = f"<span class='stars'>{stars_html}</span> {rating_text}"
-                        except (ValueError, IndexError):
-                            rating_display = rating_text
-                    else:
-                        rating_display = rating_text
-                
-                # Method 2: Check for star ratings if no numeric rating was found
-                if not rating_display:
-                    star_rating_element = soup.find('span', class_='kvMYJc')
-                    if star_rating_element:
-                        # Count the number of filled stars
-                        filled_stars = star_rating_element.find_all('span', class_=lambda cls: cls and 'elGi1d' in cls)
-                        if filled_stars:
-                            rating_value = len(filled_stars)
-                            stars_html = "★" * rating_value + "☆" * (5 - rating_value)
-                            rating_display = f"<span class='stars'>{stars_html}</span> {rating_value} stars"
-                        else:
-                            rating_display = "No rating"
-                    else:
-                        rating_display = "No rating"
-                
-                review_text = soup.find('span', class_='wiI7pd')
-                
-                # Extract photo links
-                photo_links = []
-                photo_elements = soup.find_all('button', class_='Tya61d')
-                for photo_el in photo_elements:
-                    style_attr = photo_el.get('style', '')
-                    img_url_match = re.search(r'url\("([^"]+)"\)', style_attr)
-                    if img_url_match:
-                        photo_links.append(img_url_match.group(1))
-
-                username_text = username.get_text(strip=True) if username else 'Anonymous'
-                review_text_text = review_text.get_text(strip=True) if review_text else 'No review text'
-                
-                # Pretty format the original HTML
-                pretty_html = BeautifulSoup(html, 'html.parser').prettify()
-                
-                # Add photo gallery HTML if photos exist
-                photo_gallery_html = ""
-                if photo_links:
-                    photo_gallery_html = '<div class="photo-gallery">'
-                    for photo_url in photo_links:
-                        photo_gallery_html += f'<a href="{photo_url}" target="_blank"><img class="review-photo" src="{photo_url}" alt="Review photo" /></a>'
-                    photo_gallery_html += '</div>'
-                
-                html_content += f'''
-        <div class="review-container">
-            <div class="username">Review #{i+1}: {username_text}</div>
-            <div class="rating">{rating_display}</div>
-            <div class="review-text">{review_text_text}</div>
-            {photo_gallery_html}
-            <details>
-                <summary>Show original HTML</summary>
-                <pre class="original-html">{pretty_html}</pre>
-            </details>
-        </div>
-'''
-            
-            # Close HTML tags
-            html_content += '''
-    </div>
-</body>
-</html>
-'''
-            html_file.write(html_content)
-            
-            print(f"✅ HTML reviews successfully saved to {html_path}")
+        return {"title": baslik, "place_id": place_id, "csv_path": csv_path, "html_path": html_path,
+                "review_count": writers.count}
 
     except Exception as e:
-        print(f"Error: {e}")
+        failed = True
+        # Once stopped, whatever failed (e.g. a call on the browser the watchdog quit) is part of the stop
+        cancelled = stop_event is not None and stop_event.is_set()
+        if cancelled:
+            logger.warning("🛑 Stopped before the place was finished.")
+        else:
+            logger.error(f"Error: {e}")
+        if cancelled and open_sinks is None and parsed and not known_ids:
+            # Stopped before the photo stage opened the writers: write what was parsed, with remote photo links
+            open_sinks = open_writers()
+            open_sinks.write_all(parsed)
+        if open_sinks is not None:
+            # What was written before a stop (or, when streaming, an error) is kept in the .partial
+            # files (and the SQLite store), so a previous complete file of the place is never
+            # replaced by a partial one. An incremental sync drops it, or its next run would stop
+            # at these reviews and skip the older new ones
+            if known_ids or not (streaming or cancelled):
+                open_sinks.abort()
+            else:
+                open_sinks.keep_partial()
+                logger.warning(f"💾 Kept the {open_sinks.count} reviews saved before the "
+                               f"{'stop' if cancelled else 'error'} as partial output.")
+        if isinstance(e, ScrapeCancelled):
+            raise
+        if cancelled:
+            raise ScrapeCancelled() from e
 
     finally:
-        driver.quit()
+        watchdog.stop()
+        driver_pool.release(driver, discard=failed)
+        if own_pool:
+            driver_pool.close()
 
 
 def get_location_links(csv_path):
@@ -0,0 +1,243 @@
+import json
+import sqlite3
+import threading
+import time
+
+from place_identity import canonical_place_id
+from review_writers import SINK_SQLITE
+from run_log import get_logger
+
+
+logger = get_logger(__name__)
+
+DEFAULT_DATABASE_PATH = "reviews.db"
+
+# Rows sent to executemany at once while a place is saved
+INSERT_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    source TEXT,
+    settings TEXT,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS places (
+    place_id TEXT PRIMARY KEY,
+    title TEXT,
+    url TEXT,
+    location TEXT,
+    first_run_id INTEGER REFERENCES runs(run_id),
+    last_run_id INTEGER REFERENCES runs(run_id),
+    last_scraped_at REAL,
+    review_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS reviews (
+    review_id TEXT PRIMARY KEY,
+    place_id TEXT NOT NULL REFERENCES places(place_id),
+    run_id INTEGER REFERENCES runs(run_id),
+    username TEXT,
+    rating REAL,
+    max_rating REAL,
+    rating_text TEXT,
+    review_text TEXT,
+    date_text TEXT,
+    first_seen_at REAL NOT NULL,
+    scraped_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS review_photos (
+    review_id TEXT NOT NULL REFERENCES reviews(review_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (review_id, position)
+);
+
+CREATE INDEX IF NOT EXISTS idx_reviews_place_id ON reviews(place_id);
+CREATE INDEX IF NOT EXISTS idx_reviews_rating ON reviews(rating);
+CREATE INDEX IF NOT EXISTS idx_reviews_scraped_at ON reviews(scraped_at);
+CREATE INDEX IF NOT EXISTS idx_places_location ON places(location);
+"""
+
+# A review seen again keeps its first_seen_at; everything else is refreshed
+_UPSERT_REVIEW_SQL = """
+INSERT INTO reviews (review_id, place_id, run_id, username, rating, max_rating, rating_text,
+                     review_text, date_text, first_seen_at, scraped_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(review_id) DO UPDATE SET
+    place_id = excluded.place_id,
+    run_id = excluded.run_id,
+    username = excluded.username,
+    rating = excluded.rating,
+    max_rating = excluded.max_rating,
+    rating_text = excluded.rating_text,
+    review_text = excluded.review_text,
+    date_text = excluded.date_text,
+    scraped_at = excluded.scraped_at
+"""
+
+_UPSERT_PLACE_SQL = """
+INSERT INTO places (place_id, title, url, location, first_run_id, last_run_id, last_scraped_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(place_id) DO UPDATE SET
+    title = excluded.title,
+    url = excluded.url,
+    location = COALESCE(excluded.location, places.location),
+    last_run_id = excluded.last_run_id,
+    last_scraped_at = excluded.last_scraped_at
+"""
+
+
+def place_key(url, title):
+    """The place_id a place is stored under: its canonical "cid:<CID>" id, or its title if the URL has none."""
+    return canonical_place_id(url) or title
+
+
+def _batches(rows, size=INSERT_BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class ReviewStore:
+    """
+    One SQLite database holding every run, place and review, instead of a CSV per place.
+
+    Reviews are upserted by review id, so scraping a place again refreshes its reviews
+    without duplicating them. The connection is shared by the place workers; writes are
+    serialized with a lock and each place is saved in a single transaction.
+
+    Parameters:
+        path (str): Database file; created with the schema if it does not exist.
+    """
+
+    def __init__(self, path=DEFAULT_DATABASE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("PRAGMA foreign_keys=ON")
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+
+    # ----- Runs -----
+
+    def start_run(self, kind, source=None, settings=None):
+        """Record a new run and return its run_id."""
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO runs (kind, source, settings, status, started_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, source, json.dumps(settings or {}), "running", time.time()),
+            )
+            return cursor.lastrowid
+
+    def finish_run(self, run_id, status):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE runs SET status = ?, finished_at = ? WHERE run_id = ?",
+                (status, time.time(), run_id),
+            )
+
+    # ----- Places and reviews -----
+
+    def known_review_ids(self, place_id):
+        """Ids of the reviews already stored for a place (for incremental syncs)."""
+        with self._lock:
+            rows = self._connection.execute("SELECT review_id FROM reviews WHERE place_id = ?", (place_id,))
+            return {row[0] for row in rows}
+
+    def save_place_reviews(self, place_id, title, url, records, run_id=None, location=None):
+        """
+        Upsert a place and its reviews in one transaction.
+
+        Reviews without an id cannot be upserted and are skipped.
+
+        Returns:
+            int: Number of reviews written.
+        """
+        now = time.time()
+        review_rows = []
+        photo_rows = []
+        for record in records:
+            if not record.review_id:
+                continue
+            review_rows.append((
+                record.review_id, place_id, run_id, record.username, record.rating_value, record.max_rating,
+                record.rating_text, record.review_text, record.date_text, now, now,
+            ))
+            photo_rows.extend((record.review_id, position, photo_url)
+                              for position, photo_url in enumerate(record.photo_links))
+
+        with self._lock, self._connection:
+            self._connection.execute(_UPSERT_PLACE_SQL, (place_id, title, url, location, run_id, run_id, now))
+            for batch in _batches(review_rows):
+                self._connection.executemany(_UPSERT_REVIEW_SQL, batch)
+                # Photos are replaced as a whole, their order may have changed
+                self._connection.executemany("DELETE FROM review_photos WHERE review_id = ?",
+                                             [(row[0],) for row in batch])
+            for batch in _batches(photo_rows):
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO review_photos (review_id, position, url) VALUES (?, ?, ?)", batch
+                )
+            self._connection.execute(
+                "UPDATE places SET review_count = (SELECT COUNT(*) FROM reviews WHERE place_id = ?) WHERE place_id = ?",
+                (place_id, place_id),
+            )
+        return len(review_rows)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class SqliteReviewWriter:
+    """
+    Review writer (see review_writers) that saves a place's reviews into a ReviewStore.
+
+    Records are buffered while the place is scraped and written in one transaction on
+    close, so an aborted place leaves the database untouched. A streaming scrape calls
+    flush() after every scroll instead, which saves the buffered records right away.
+    """
+
+    sink = SINK_SQLITE
+
+    def __init__(self, store, place_id, title, url, run_id=None, location=None):
+        self.store = store
+        self.place_id = place_id
+        self.title = title
+        self.url = url
+        self.run_id = run_id
+        self.location = location
+        self.count = 0
+        self.saved = 0
+        self._records = []
+
+    def write(self, record):
+        self._records.append(record)
+        self.count += 1
+
+    def _save(self):
+        self.saved += self.store.save_place_reviews(
+            self.place_id, self.title, self.url, self._records, run_id=self.run_id, location=self.location
+        )
+        self._records = []
+
+    def flush(self):
+        if self._records:
+            self._save()
+
+    def close(self):
+        self._save()  # Even without new reviews, so the place itself is recorded
+        logger.info(f"✅ {self.saved} reviews saved to {self.store.path}")
+
+    def keep_partial(self):
+        # Upserts by review id only add or update, so the reviews of a stopped place are safe to keep
+        self.close()
+
+    def abort(self):
+        self._records = []
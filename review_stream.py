@@ -0,0 +1,111 @@
+import json
+import time
+
+from review_expander import EXPAND_BUTTON_SELECTOR
+from review_extraction import EXTRACTION_BS4, REVIEW_RECORD_JS, parse_review_html
+from review_model import ReviewRecord
+from scroll_engine import PRUNED_HEIGHT_ATTRIBUTE, PRUNED_ITEMS_ATTRIBUTE
+
+
+STREAM_KEEP_TAIL = 5  # Review elements left at the bottom of the panel, so the list still has an end to scroll to
+
+# A "more" button the expander has not clicked yet: the review above it is still truncated
+UNEXPANDED_SELECTOR = EXPAND_BUTTON_SELECTOR + ":not([data-expand-clicked])"
+
+# Returns the settled review elements (records, or their outerHTML for bs4) and removes them from the panel
+_HARVEST_REVIEWS_JS = REVIEW_RECORD_JS + """
+var container = arguments[0], selector = arguments[1], keepTail = arguments[2];
+var structured = arguments[3], unexpandedSelector = arguments[4];
+var nodes = container.querySelectorAll(selector);
+var harvested = [], height = 0;
+for (var i = 0; i < nodes.length - keepTail; i++) {
+    var el = nodes[i];
+    if (unexpandedSelector && el.querySelector(unexpandedSelector)) { break; }
+    harvested.push(structured ? reviewRecord(el, true) : el.outerHTML);
+    height += el.offsetHeight;
+    el.remove();
+}
+container.setAttribute('%s', parseInt(container.getAttribute('%s') || '0', 10) + harvested.length);
+container.setAttribute('%s', parseInt(container.getAttribute('%s') || '0', 10) + height);
+return JSON.stringify(harvested);
+""" % (PRUNED_ITEMS_ATTRIBUTE, PRUNED_ITEMS_ATTRIBUTE, PRUNED_HEIGHT_ATTRIBUTE, PRUNED_HEIGHT_ATTRIBUTE)
+
+
+class ReviewHarvester:
+    """
+    Takes the reviews out of the review panel while it is being scrolled (harvest and prune).
+
+    After every scroll harvest() extracts the review elements that have settled, removes
+    them from the page and returns the ones whose review id was not seen before. The
+    browser only ever holds the reviews of the last scroll, so every scroll costs the same
+    however many reviews a place has. The last keep_tail elements stay until the final
+    harvest, and so does everything from the first review whose "more" button was not
+    clicked yet. scroll_until_stable still counts the pruned elements.
+
+    In network mode the decoded responses replace the DOM copy of every captured review,
+    and the final harvest adds the captured reviews the panel never rendered.
+
+    Parameters:
+        driver: Selenium WebDriver with the review panel open.
+        container: The scrollable review panel WebElement.
+        selector (str): CSS selector of the review elements.
+        extraction_mode (str): "bs4" parses the elements' HTML here; "js" and "network" read them in the page.
+        network_capture (ReviewNetworkCapture): The capture of the review responses in network mode.
+        keep_tail (int): Review elements left in the panel between scrolls.
+    """
+
+    def __init__(self, driver, container, selector, extraction_mode=EXTRACTION_BS4, network_capture=None,
+                 keep_tail=STREAM_KEEP_TAIL):
+        self.driver = driver
+        self.container = container
+        self.selector = selector
+        self.extraction_mode = extraction_mode
+        self.network_capture = network_capture
+        self.keep_tail = keep_tail
+        self.seen_ids = set()
+        self.pruned = 0
+        self.duplicates = 0
+        self.seconds = 0.0
+
+    def harvest(self, final=False):
+        """
+        Extract and remove the settled review elements.
+
+        Parameters:
+            final (bool): Take every element that is left, after the last scroll and expand.
+
+        Returns:
+            list: The new ReviewRecords, in list order.
+        """
+        started = time.perf_counter()
+        payload = self.driver.execute_script(
+            _HARVEST_REVIEWS_JS, self.container, self.selector, 0 if final else self.keep_tail,
+            self.extraction_mode != EXTRACTION_BS4, None if final else UNEXPANDED_SELECTOR,
+        )
+        items = json.loads(payload or "[]")
+        self.pruned += len(items)
+        if self.extraction_mode == EXTRACTION_BS4:
+            records = [parse_review_html(html) for html in items]
+        else:
+            records = [ReviewRecord(**item) for item in items]
+
+        if self.network_capture is not None:
+            self.network_capture.drain()
+            captured = self.network_capture.records
+            records = [captured.get(record.review_id, record) for record in records]
+
+        new_records = []
+        for record in records:
+            if record.review_id:
+                if record.review_id in self.seen_ids:
+                    self.duplicates += 1
+                    continue
+                self.seen_ids.add(record.review_id)
+            new_records.append(record)
+        if final and self.network_capture is not None:
+            unrendered = [record for review_id, record in self.network_capture.records.items()
+                          if review_id not in self.seen_ids]
+            self.seen_ids.update(record.review_id for record in unrendered)
+            new_records.extend(unrendered)
+        self.seconds += time.perf_counter() - started
+        return new_records
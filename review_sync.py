@@ -0,0 +1,102 @@
+import csv
+import os
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from run_log import get_logger
+
+
+logger = get_logger(__name__)
+
+SORT_BUTTON_SELECTOR = ('button[aria-label*="Sırala"], button[aria-label*="Sort"], '
+                        'button[data-value="Sırala"], button[data-value="Sort"]')
+SORT_MENU_ITEM_SELECTOR = 'div[role="menuitemradio"]'
+NEWEST_MENU_INDEX = 1  # En alakalı, En yeni, En yüksek puan, En düşük puan
+
+# Review ids of the review elements from index arguments[2] onwards
+_LOADED_REVIEW_IDS_JS = """
+var nodes = arguments[0].querySelectorAll(arguments[1]);
+var ids = [];
+for (var i = arguments[2]; i < nodes.length; i++) {
+    var node = nodes[i].matches('[data-review-id]') ? nodes[i] : nodes[i].querySelector('[data-review-id]');
+    ids.push(node ? node.getAttribute('data-review-id') : '');
+}
+return ids;
+"""
+
+
+def loaded_review_ids(driver, container, selector, start=0):
+    """Review ids of the review elements in the container, in list order, from index start onwards."""
+    return driver.execute_script(_LOADED_REVIEW_IDS_JS, container, selector, start)
+
+
+def read_known_review_ids(csv_path):
+    """
+    Review ids already stored in a place's review CSV.
+
+    Returns:
+        set: The stored ids; empty if the file does not exist or predates the Review_ID column.
+    """
+    if not os.path.exists(csv_path):
+        return set()
+    with open(csv_path, newline='', encoding="utf-8") as file:
+        reader = csv.DictReader(file)
+        if not reader.fieldnames or "Review_ID" not in reader.fieldnames:
+            return set()
+        return {row["Review_ID"] for row in reader if row.get("Review_ID")}
+
+
+def sort_reviews_newest_first(driver, review_selector, timeout=5):
+    """
+    Switch the open review panel to newest-first ordering and wait for the list to reload.
+
+    Returns:
+        bool: True if the ordering was changed.
+    """
+    try:
+        old_reviews = driver.find_elements(By.CSS_SELECTOR, review_selector)
+        sort_button = WebDriverWait(driver, timeout).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, SORT_BUTTON_SELECTOR))
+        )
+        driver.execute_script("arguments[0].click();", sort_button)
+        menu_items = WebDriverWait(driver, timeout).until(
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, SORT_MENU_ITEM_SELECTOR))
+        )
+        if len(menu_items) <= NEWEST_MENU_INDEX:
+            return False
+        driver.execute_script("arguments[0].click();", menu_items[NEWEST_MENU_INDEX])
+        if old_reviews:
+            # The panel swaps in a fresh list; wait until the old first review is gone
+            try:
+                WebDriverWait(driver, timeout).until(EC.staleness_of(old_reviews[0]))
+            except Exception:
+                pass
+        return True
+    except Exception as e:
+        logger.warning(f"Could not sort reviews by newest: {e}")
+        return False
+
+
+class KnownReviewDetector:
+    """
+    Tells the scroller when the newest-first list has reached a review that is already stored.
+
+    Only the review elements loaded since the previous check are read, so every check is cheap.
+    """
+
+    def __init__(self, driver, container, selector, known_ids):
+        self.driver = driver
+        self.container = container
+        self.selector = selector
+        self.known_ids = known_ids
+        self.checked = 0
+        self.found = False
+
+    def reached_known_review(self):
+        if not self.known_ids or self.found:
+            return self.found
+        ids = loaded_review_ids(self.driver, self.container, self.selector, self.checked)
+        self.checked += len(ids)
+        self.found = any(review_id in self.known_ids for review_id in ids)
+        return self.found
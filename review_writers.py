@@ -0,0 +1,395 @@
+import csv
+import os
+import shutil
+import time
+
+from run_trace import NULL_TRACER
+from run_log import get_logger
+
+
+logger = get_logger(__name__)
+
+# What HtmlReviewWriter does with each review's original HTML
+RAW_HTML_NONE = "none"
+RAW_HTML_LAZY = "lazy"
+RAW_HTML_SIDECAR = "sidecar"
+RAW_HTML_MODES = (RAW_HTML_NONE, RAW_HTML_LAZY, RAW_HTML_SIDECAR)
+
+# Output sinks a scrape can write to; CSV and HTML are the per-place files, SQLite and Parquet are shared
+# by the whole run
+SINK_CSV = "csv"
+SINK_HTML = "html"
+SINK_SQLITE = "sqlite"
+SINK_PARQUET = "parquet"
+SINKS = (SINK_CSV, SINK_HTML, SINK_SQLITE, SINK_PARQUET)
+DEFAULT_SINKS = (SINK_CSV, SINK_HTML)
+
+CSV_HEADER = ['Username', 'Rating', 'Review', 'Photo_Links', 'Review_ID']
+
+HTML_STYLE = '''
+        body { font-family: Arial, sans-serif; margin: 20px; background-color: #f8f9fa; }
+        h1 { color: #1a73e8; }
+        .review-container {
+            margin-bottom: 20px;
+            padding: 15px;
+            border-radius: 8px;
+            background-color: white;
+            box-shadow: 0 1px 3px rgba(0,0,0,0.12), 0 1px 2px rgba(0,0,0,0.24);
+        }
+        .username {
+            font-weight: bold;
+            font-size: 16px;
+            color: #202124;
+            margin-bottom: 5px;
+        }
+        .rating {
+            color: #e7711b;
+            margin-bottom: 8px;
+            font-weight: bold;
+        }
+        .review-date { color: #70757a; font-size: 13px; margin-bottom: 8px; }
+        .review-text { line-height: 1.5; }
+        .original-html {
+            margin-top: 15px;
+            border-top: 1px solid #dadce0;
+            padding-top: 10px;
+            font-family: monospace;
+        }
+        .stars {
+            color: #e7711b;
+            font-size: 20px;
+            letter-spacing: 3px;
+        }
+        .photo-gallery {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 10px;
+            margin-top: 15px;
+        }
+        .review-photo {
+            width: 150px;
+            height: 150px;
+            object-fit: cover;
+            border-radius: 4px;
+            box-shadow: 0 1px 3px rgba(0,0,0,0.12);
+        }
+'''
+
+
+def _partial_path(path):
+    # Writers fill <path>.part and rename it on close, so an interrupted place never leaves a truncated file
+    return path + ".part"
+
+
+def _abort_partial(file_handle, path):
+    file_handle.close()
+    if os.path.exists(_partial_path(path)):
+        os.remove(_partial_path(path))
+
+
+def partial_output_path(path):
+    """Where the reviews of a stopped or failed place are kept: <name>.partial<ext> next to path."""
+    root, extension = os.path.splitext(path)
+    return f"{root}.partial{extension}"
+
+
+def _finish_output(path, partial):
+    # A finished place replaces its file and drops the partial copy of an earlier stopped run;
+    # a stopped one goes to the partial name, so an earlier complete file is never replaced
+    target = partial_output_path(path) if partial else path
+    os.replace(_partial_path(path), target)
+    if not partial and os.path.exists(partial_output_path(path)):
+        os.remove(partial_output_path(path))
+    return target
+
+
+class CsvReviewWriter:
+    """
+    Writes ReviewRecords as rows of a CSV file.
+
+    With append=True the rows are added after the ones already in the file (used by
+    incremental syncs); the file is still replaced atomically on close.
+    """
+
+    sink = SINK_CSV
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.count = 0
+        append = append and os.path.exists(path)
+        if append:
+            shutil.copyfile(path, _partial_path(path))
+        self._file = open(_partial_path(path), mode="a" if append else "w", newline='', encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        if not append:
+            self._writer.writerow(CSV_HEADER)
+
+    def write(self, record):
+        self._writer.writerow([
+            record.username,
+            record.rating_text or "No rating",
+            record.review_text,
+            # Join all photo links with comma for CSV
+            ", ".join(record.photo_links),
+            record.review_id,
+        ])
+        self.count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+        _finish_output(self.path, partial=False)
+        logger.info("✅ Data successfully saved to " + self.path)
+
+    def keep_partial(self):
+        """Save the rows written so far to partial_output_path(path), leaving path itself untouched."""
+        self._file.close()
+        logger.info(f"💾 Partial reviews saved to {_finish_output(self.path, partial=True)}")
+
+    def abort(self):
+        _abort_partial(self._file, self.path)
+
+
+class HtmlReviewWriter:
+    """
+    Streams ReviewRecords into a styled HTML report.
+
+    The header is written when the writer is created, every record is rendered and written
+    straight to the file handle, and the footer is added on close, so memory use does not
+    grow with the number of reviews.
+
+    Parameters:
+        path (str): Report file to create.
+        title (str): Place title shown in the report.
+        raw_html_mode (str): How each review's original HTML is kept:
+            "none" drops it, "lazy" embeds it in a <template> that is only rendered when
+            "Show original HTML" is opened, "sidecar" writes it to <name>_raw.html next to
+            the report and links to it.
+        photo_paths (dict): Photo URL -> local file (see photo_cache); the gallery shows these
+            copies instead of hotlinking Google.
+    """
+
+    sink = SINK_HTML
+
+    def __init__(self, path, title, raw_html_mode=RAW_HTML_LAZY, photo_paths=None):
+        if raw_html_mode not in RAW_HTML_MODES:
+            raise ValueError(f"Unknown raw HTML mode: {raw_html_mode}")
+        self.path = path
+        self.title = title
+        self.raw_html_mode = raw_html_mode
+        self.photo_paths = photo_paths if photo_paths is not None else {}  # May be filled in while streaming
+        self.count = 0
+
+        self._file = open(_partial_path(path), 'w', encoding='utf-8')
+        self._file.write(render_html_header(title))
+
+        self._raw_file = None
+        self.raw_path = None
+        if raw_html_mode == RAW_HTML_SIDECAR:
+            self.raw_path = os.path.splitext(path)[0] + "_raw.html"
+            self._raw_file = open(_partial_path(self.raw_path), 'w', encoding='utf-8')
+            self._raw_file.write(f'<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>{title} - Original review HTML</title></head>\n<body>\n')
+
+    def write(self, record):
+        self.count += 1
+        raw_html_link = None
+        if self._raw_file is not None:
+            self._raw_file.write(f'<section id="review-{self.count}">\n<h2>Review #{self.count}</h2>\n{record.raw_html}\n</section>\n')
+            raw_html_link = f"{os.path.basename(self.raw_path)}#review-{self.count}"
+        self._file.write(render_review_block(self.count, record, self.raw_html_mode, raw_html_link,
+                                             photo_src=self._photo_src))
+
+    def _photo_src(self, photo_url):
+        local_path = self.photo_paths.get(photo_url)
+        if not local_path:
+            return photo_url
+        return os.path.relpath(local_path, os.path.dirname(os.path.abspath(self.path))).replace(os.sep, "/")
+
+    def flush(self):
+        self._file.flush()
+        if self._raw_file is not None:
+            self._raw_file.flush()
+
+    def _finish(self, partial):
+        self._file.write(render_html_footer(self.count, lazy_raw_html=self.raw_html_mode == RAW_HTML_LAZY))
+        self._file.close()
+        if self._raw_file is not None:
+            self._raw_file.write('</body>\n</html>\n')
+            self._raw_file.close()
+            _finish_output(self.raw_path, partial)
+        return _finish_output(self.path, partial)
+
+    def close(self):
+        self._finish(partial=False)
+        logger.info(f"✅ HTML reviews successfully saved to {self.path}")
+
+    def keep_partial(self):
+        """Save the report of the reviews written so far to partial_output_path(path), leaving path untouched."""
+        logger.info(f"💾 Partial HTML reviews saved to {self._finish(partial=True)}")
+
+    def abort(self):
+        _abort_partial(self._file, self.path)
+        if self._raw_file is not None:
+            _abort_partial(self._raw_file, self.raw_path)
+
+
+class ReviewWriterFanout:
+    """
+    Feeds every record to several writers, so new sinks can be added without touching the scraper.
+
+    The time spent in each writer is recorded as a write_<sink> phase of tracer on close.
+    """
+
+    def __init__(self, writers, tracer=None, place=None):
+        self.writers = list(writers)
+        self.count = 0
+        self.tracer = tracer or NULL_TRACER
+        self.place = place
+        self._seconds = [0.0] * len(self.writers)
+
+    def write(self, record):
+        for index, writer in enumerate(self.writers):
+            start = time.perf_counter()
+            writer.write(record)
+            self._seconds[index] += time.perf_counter() - start
+        self.count += 1
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Push what was written so far to the writers that can save part of a place (streaming)."""
+        for index, writer in enumerate(self.writers):
+            if hasattr(writer, "flush"):
+                start = time.perf_counter()
+                writer.flush()
+                self._seconds[index] += time.perf_counter() - start
+
+    def close(self):
+        for index, writer in enumerate(self.writers):
+            start = time.perf_counter()
+            writer.close()
+            self._seconds[index] += time.perf_counter() - start
+            path = getattr(writer, "path", None)
+            self.tracer.record(
+                f"write_{getattr(writer, 'sink', type(writer).__name__)}", self._seconds[index], place=self.place,
+                items=writer.count, size_bytes=os.path.getsize(path) if path and os.path.exists(path) else None,
+            )
+
+    def abort(self):
+        """Drop the partial output of every writer."""
+        for writer in self.writers:
+            writer.abort()
+
+    def keep_partial(self):
+        """
+        Keep what was written for a place that did not finish, without replacing its earlier complete output.
+
+        The file writers save to their partial_output_path, the SQLite writer upserts its reviews
+        (that never removes stored ones), and writers without keep_partial (Parquet, whose file per
+        place would be replaced) drop theirs.
+        """
+        for writer in self.writers:
+            if hasattr(writer, "keep_partial"):
+                writer.keep_partial()
+            else:
+                writer.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def render_html_header(title):
+    # The total is unknown while streaming; the footer fills it in
+    return f'''<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{title} - Reviews</title>
+    <style>{HTML_STYLE}    </style>
+</head>
+<body>
+    <h1>{title} - Reviews</h1>
+    <p>Total reviews collected: <span id="review-total">...</span></p>
+    <div class="reviews">
+'''
+
+
+# Renders a review's original HTML from its <template> the first time its <details> is opened
+_LAZY_RAW_HTML_SCRIPT = '''
+    <script>
+        document.querySelectorAll('details.lazy-html').forEach(function (details) {
+            details.addEventListener('toggle', function () {
+                var template = details.querySelector('template');
+                if (details.open && template) {
+                    details.querySelector('.original-html').appendChild(template.content.cloneNode(true));
+                    template.remove();
+                }
+            });
+        });
+    </script>'''
+
+
+def render_html_footer(review_count, lazy_raw_html=False):
+    return f'''
+    </div>
+    <p>Total reviews collected: {review_count}</p>
+    <script>document.getElementById('review-total').textContent = '{review_count}';</script>{_LAZY_RAW_HTML_SCRIPT if lazy_raw_html else ''}
+</body>
+</html>
+'''
+
+
+def render_rating(record):
+    """Stars plus the rating text, or "No rating"."""
+    if record.rating_value and record.max_rating:
+        try:
+            stars_html = "★" * int(record.rating_value) + "☆" * int(record.max_rating - record.rating_value)
+            return f"<span class='stars'>{stars_html}</span> {record.rating_text}"
+        except (ValueError, TypeError):
+            return record.rating_text
+    return record.rating_text or "No rating"
+
+
+def render_review_block(number, record, raw_html_mode=RAW_HTML_LAZY, raw_html_link=None, photo_src=None):
+    username_text = record.username or 'Anonymous'
+    review_text_text = record.review_text or 'No review text'
+
+    # Add photo gallery HTML if photos exist
+    photo_gallery_html = ""
+    if record.photo_links:
+        photos = ''.join(
+            f'<a href="{photo_url}" target="_blank"><img class="review-photo" src="{photo_src(photo_url) if photo_src else photo_url}" alt="Review photo" /></a>'
+            for photo_url in record.photo_links
+        )
+        photo_gallery_html = f'<div class="photo-gallery">{photos}</div>'
+
+    original_html = ""
+    if raw_html_mode == RAW_HTML_LAZY:
+        original_html = f'''<details class="lazy-html">
+                <summary>Show original HTML</summary>
+                <pre class="original-html"></pre>
+                <template>{record.raw_html}</template>
+            </details>'''
+    elif raw_html_mode == RAW_HTML_SIDECAR and raw_html_link:
+        original_html = f'<a href="{raw_html_link}" target="_blank">Show original HTML</a>'
+
+    return f'''
+        <div class="review-container">
+            <div class="username">Review #{number}: {username_text}</div>
+            <div class="rating">{render_rating(record)}</div>
+            {f'<div class="review-date">{record.date_text}</div>' if record.date_text else ''}
+            <div class="review-text">{review_text_text}</div>
+            {photo_gallery_html}
+            {original_html}
+        </div>
+'''
@@ -0,0 +1,162 @@
+import collections
+import contextvars
+import itertools
+import logging
+import logging.handlers
+import threading
+from contextlib import contextmanager
+
+
+LOGGER_NAME = "maps_scraper"  # Parent of every scraper module's logger
+DEFAULT_LOG_FILE = "scraper.log"
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+MAX_QUEUED_EVENTS = 10000
+FILE_LOG_FORMAT = "%(asctime)s %(levelname)-7s [%(run_id)s] %(name)s: %(message)s"
+
+# The GUI log view takes queued lines on a timer, in batches, and keeps only the newest lines
+LOG_DRAIN_INTERVAL_MS = 200
+LOG_DRAIN_BATCH = 500
+LOG_VIEW_MAX_LINES = 5000
+
+logging.getLogger(LOGGER_NAME).setLevel(logging.INFO)
+
+# Run the code on this thread belongs to; worker threads inherit it through carry_context
+current_run_id = contextvars.ContextVar("current_run_id", default=None)
+_run_numbers = itertools.count(1)
+
+
+def get_logger(module_name):
+    """Logger of a scraper module, e.g. get_logger(__name__) -> "maps_scraper.review_scrapper2"."""
+    return logging.getLogger(f"{LOGGER_NAME}.{module_name}")
+
+
+def new_run_id():
+    return f"run-{next(_run_numbers)}"
+
+
+@contextmanager
+def run_context(run_id):
+    """Everything logged inside the with-block (on this thread) belongs to run_id."""
+    token = current_run_id.set(run_id)
+    try:
+        yield run_id
+    finally:
+        current_run_id.reset(token)
+
+
+def carry_context(function):
+    """
+    Wrap function so it runs in the caller's context (and so under its run id) on another thread.
+
+    Threads and executors start with an empty context; every call gets its own copy, so the
+    wrapper can be used by several threads at once.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(function, *args, **kwargs)
+    return run
+
+
+class RunFilter(logging.Filter):
+    """Tags records with the current run id and, for a given run_id, drops the records of other runs."""
+
+    def __init__(self, run_id=None):
+        super().__init__()
+        self.run_id = run_id
+
+    def filter(self, record):
+        record.run_id = current_run_id.get()
+        return self.run_id is None or record.run_id == self.run_id
+
+
+class LogEvent:
+    """One log line as handed to the GUI."""
+
+    __slots__ = ("created", "level", "run_id", "logger", "message")
+
+    def __init__(self, created, level, run_id, logger, message):
+        self.created = created
+        self.level = level
+        self.run_id = run_id
+        self.logger = logger
+        self.message = message
+
+
+class LogQueue:
+    """
+    Thread-safe, bounded buffer of log events between the scraping threads and the GUI.
+
+    Writers never block; when the reader falls behind, the oldest events are dropped and
+    counted in dropped.
+    """
+
+    def __init__(self, max_events=MAX_QUEUED_EVENTS):
+        self._events = collections.deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, event):
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+
+    def put_text(self, message, level="INFO"):
+        """Queue a line that did not come through logging (e.g. from the GUI itself)."""
+        self.put(LogEvent(None, level, current_run_id.get(), LOGGER_NAME, message))
+
+    def drain(self, limit=None):
+        """Take up to limit events (all if None), oldest first."""
+        with self._lock:
+            count = len(self._events) if limit is None else min(limit, len(self._events))
+            return [self._events.popleft() for _ in range(count)]
+
+
+class QueueLogHandler(logging.Handler):
+    """Logging handler that puts the records of one run (all runs if run_id is None) on a LogQueue."""
+
+    def __init__(self, log_queue, run_id=None):
+        super().__init__()
+        self.log_queue = log_queue
+        self.addFilter(RunFilter(run_id))
+
+    def emit(self, record):
+        try:
+            self.log_queue.put(LogEvent(record.created, record.levelname, record.run_id, record.name,
+                                        self.format(record)))
+        except Exception:
+            self.handleError(record)
+
+
+def open_file_log(path=DEFAULT_LOG_FILE, run_id=None):
+    """Rotating log file handler for one run (all runs if run_id is None)."""
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter(FILE_LOG_FORMAT))
+    handler.addFilter(RunFilter(run_id))
+    return handler
+
+
+def run_handlers(log_queue, run_id, log_file=None):
+    """The handlers of one GUI run: its lines go to log_queue and, if log_file is given, to a rotating file."""
+    handlers = [QueueLogHandler(log_queue, run_id)]
+    if log_file:
+        handlers.append(open_file_log(log_file, run_id))
+    return handlers
+
+
+@contextmanager
+def attached(*handlers):
+    """Attach handlers to the scraper loggers for the with-block, then close them."""
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in handlers:
+        logger.addHandler(handler)
+    try:
+        yield
+    finally:
+        for handler in handlers:
+            logger.removeHandler(handler)
+            handler.close()
@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+import time
+
+from file_utils import atomic_write_text
+
+
+STATUS_PENDING = "pending"
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+MANIFEST_VERSION = 1
+
+
+class RunManifest:
+    """
+    On-disk record of a (batch) run, so a stopped or crashed run can be resumed.
+
+    For every Location row and every place link it stores whether the work is pending,
+    in progress, done or failed, plus the output files it produced. The JSON file is
+    rewritten atomically after every change, so at most the place being scraped when
+    the process died is lost.
+
+    Parameters:
+        path (str): Manifest JSON file.
+        resume (bool): Load the existing manifest if there is one; otherwise start fresh.
+    """
+
+    def __init__(self, path, resume=True):
+        self.path = path
+        self._lock = threading.RLock()
+        self.data = None
+        if resume and os.path.exists(path):
+            with open(path, encoding="utf-8") as manifest_file:
+                self.data = json.load(manifest_file)
+        if not self.data or self.data.get("version") != MANIFEST_VERSION:
+            self.data = {"version": MANIFEST_VERSION, "created_at": time.time(), "locations": {}}
+        self._save()
+
+    # ----- Locations (rows of the batch CSV) -----
+
+    def location(self, name):
+        with self._lock:
+            return dict(self.data["locations"].get(name, {}))
+
+    def location_status(self, name):
+        return self.location(name).get("status", STATUS_PENDING)
+
+    def update_location(self, name, **fields):
+        """Set fields (status, link, folder, links_path, error, ...) of a Location row and save."""
+        with self._lock:
+            entry = self.data["locations"].setdefault(name, {"status": STATUS_PENDING, "places": {}})
+            entry.update(fields)
+            entry["updated_at"] = time.time()
+            self._save()
+
+    # ----- Places (links discovered for a location) -----
+
+    def place(self, location, link):
+        with self._lock:
+            entry = self.data["locations"].get(location, {}).get("places", {}).get(link)
+            return dict(entry) if entry else {}
+
+    def place_status(self, location, link):
+        return self.place(location, link).get("status", STATUS_PENDING)
+
+    def is_place_done(self, location, link):
+        return self.place_status(location, link) == STATUS_DONE
+
+    def start_place(self, location, link):
+        with self._lock:
+            entry = self._place_entry(location, link)
+            entry["status"] = STATUS_IN_PROGRESS
+            entry["attempts"] = entry.get("attempts", 0) + 1
+            entry["started_at"] = time.time()
+            self._save()
+
+    def finish_place(self, location, link, outputs=None):
+        """Mark a place as done and remember the files it produced."""
+        with self._lock:
+            entry = self._place_entry(location, link)
+            entry["status"] = STATUS_DONE
+            entry["outputs"] = outputs or {}
+            entry.pop("error", None)
+            entry["finished_at"] = time.time()
+            self._save()
+
+    def fail_place(self, location, link, error):
+        with self._lock:
+            entry = self._place_entry(location, link)
+            entry["status"] = STATUS_FAILED
+            entry["error"] = str(error)
+            entry["finished_at"] = time.time()
+            self._save()
+
+    def reset_place(self, location, link):
+        """Put a place that was cancelled mid-way back to pending."""
+        with self._lock:
+            entry = self._place_entry(location, link)
+            if entry.get("status") == STATUS_IN_PROGRESS:
+                entry["status"] = STATUS_PENDING
+                self._save()
+
+    def summary(self):
+        """Count places per status over the whole manifest."""
+        counts = {STATUS_PENDING: 0, STATUS_IN_PROGRESS: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+        with self._lock:
+            for entry in self.data["locations"].values():
+                for place in entry.get("places", {}).values():
+                    counts[place.get("status", STATUS_PENDING)] += 1
+        return counts
+
+    def _place_entry(self, location, link):
+        location_entry = self.data["locations"].setdefault(location, {"status": STATUS_PENDING, "places": {}})
+        places = location_entry.setdefault("places", {})
+        entry = places.setdefault(link, {"status": STATUS_PENDING, "attempts": 0})
+        entry["updated_at"] = time.time()
+        return entry
+
+    def _save(self):
+        self.data["updated_at"] = time.time()
+        atomic_write_text(self.path, json.dumps(self.data, ensure_ascii=False, indent=2))
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Phases in the order a place goes through them; the summary lists them in this order
+PHASE_ORDER = (
+    "driver_start", "discovery_http", "page_load", "feed_scroll", "yorumlar_click", "review_scroll",
+    "expand", "harvest", "parse", "photos", "write_csv", "write_html", "write_sqlite", "write_parquet",
+)
+
+
+def trace_file_name():
+    return time.strftime("trace-%Y%m%d-%H%M%S.jsonl")
+
+
+# Bytes the current page has transferred so far (document plus every resource), from the Resource Timing API
+_TRANSFERRED_BYTES_JS = """
+return performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))
+    .reduce(function (total, entry) { return total + (entry.transferSize || 0); }, 0);
+"""
+
+
+def page_transfer_bytes(driver):
+    """Bytes the browser's current page has downloaded, or None if the browser cannot tell."""
+    try:
+        return int(driver.execute_script(_TRANSFERRED_BYTES_JS))
+    except Exception:
+        return None
+
+
+class TraceSpan:
+    """What a phase reports about itself while it runs: items handled and bytes moved."""
+
+    __slots__ = ("items", "bytes")
+
+    def __init__(self):
+        self.items = None
+        self.bytes = None
+
+
+class RunTracer:
+    """
+    Times the phases of a run and writes one JSON line per phase to a trace file.
+
+    Every line holds the phase, the place it belongs to, duration_s, items, bytes, the
+    worker thread and, if the phase raised, the error. Totals per phase and per place are
+    kept in memory for summary_lines(). Safe to share between the place workers.
+
+    Parameters:
+        path (str): JSONL file to write; None keeps only the in-memory totals.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._phases = {}
+        self._places = {}
+        self._titles = {}
+        self._file = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    @contextmanager
+    def phase(self, name, place=None):
+        """Time the with-block as phase `name`; set items/bytes on the yielded span."""
+        span = TraceSpan()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, place=place,
+                        items=span.items, size_bytes=span.bytes, error=error)
+
+    def iterate(self, name, iterable, place=None, size=None):
+        """
+        Yield from iterable, timing only the time spent producing items (e.g. lazy parsing)
+        and not what the consumer does with them.
+
+        Parameters:
+            size (callable): Bytes of one item, summed into the phase's bytes.
+        """
+        iterator = iter(iterable)
+        elapsed = 0.0
+        count = 0
+        total_bytes = 0 if size else None
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                elapsed += time.perf_counter() - start
+                break
+            elapsed += time.perf_counter() - start
+            count += 1
+            if size:
+                total_bytes += size(item)
+            yield item
+        self.record(name, elapsed, place=place, items=count, size_bytes=total_bytes)
+
+    def name_place(self, place, title):
+        """Show title instead of the place link in the summary."""
+        with self._lock:
+            self._titles[place] = title
+
+    def record(self, name, duration, place=None, items=None, size_bytes=None, error=None):
+        event = {
+            "ts": round(time.time(), 3),
+            "phase": name,
+            "place": place,
+            "duration_s": round(duration, 4),
+            "items": items,
+            "bytes": size_bytes,
+            "thread": threading.current_thread().name,
+        }
+        if error:
+            event["error"] = error
+        with self._lock:
+            totals = self._phases.setdefault(name, {"count": 0, "seconds": 0.0, "items": 0, "bytes": 0, "errors": 0})
+            totals["count"] += 1
+            totals["seconds"] += duration
+            totals["items"] += items or 0
+            totals["bytes"] += size_bytes or 0
+            totals["errors"] += 1 if error else 0
+            if place is not None:
+                self._places[place] = self._places.get(place, 0.0) + duration
+            if self._file is not None:
+                self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def summary_lines(self, top_places=20):
+        """The per-phase and per-place totals as printable table lines."""
+        with self._lock:
+            phases = dict(self._phases)
+            places = dict(self._places)
+            titles = dict(self._titles)
+        if not phases:
+            return []
+
+        lines = [f"{'Phase':<16}{'Count':>7}{'Total s':>10}{'Mean s':>9}{'Items':>9}{'KB':>10}{'Errors':>8}"]
+        ordered = [name for name in PHASE_ORDER if name in phases]
+        ordered += sorted(name for name in phases if name not in PHASE_ORDER)
+        for name in ordered:
+            totals = phases[name]
+            lines.append(f"{name:<16}{totals['count']:>7}{totals['seconds']:>10.2f}"
+                         f"{totals['seconds'] / totals['count']:>9.3f}{totals['items']:>9}"
+                         f"{totals['bytes'] / 1024:>10.1f}{totals['errors']:>8}")
+        lines.append(f"{'Run':<16}{'':>7}{time.time() - self.started_at:>10.2f}")
+
+        if places:
+            lines.append("")
+            lines.append(f"{'Place':<48}{'Total s':>10}")
+            for place, seconds in sorted(places.items(), key=lambda item: item[1], reverse=True)[:top_places]:
+                label = str(titles.get(place, place))
+                label = label if len(label) <= 46 else label[:43] + "..."
+                lines.append(f"{label:<48}{seconds:>10.2f}")
+            if len(places) > top_places:
+                lines.append(f"... {len(places) - top_places} more places in {self.path or 'the trace'}")
+        return lines
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class _NullTracer(RunTracer):
+    """Tracer used when none is passed in: phases run untimed and nothing is kept."""
+
+    def record(self, name, duration, place=None, items=None, size_bytes=None, error=None):
+        pass
+
+    def name_place(self, place, title):
+        pass
+
+
+NULL_TRACER = _NullTracer()
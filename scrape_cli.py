@@ -0,0 +1,485 @@
+"""
+Run the scrapers without the GUI: python -m scrape_cli {single,batch,watch,enqueue,worker,jobs,serve-queue} ...
+
+Nothing here imports PyQt, and selenium, bs4 and pandas are only loaded once a run needs
+them. The scrapers' log lines are forwarded to stdout; with --json the log and progress are
+written as one JSON object per line. Exit codes are the EXIT_* constants below.
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import shutil
+import signal
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+
+import parallel_scraper
+import run_log
+import scrape_pipeline
+from job_queue import JOB_DEAD, open_job_queue
+from job_queue_server import DEFAULT_QUEUE_PORT, JobQueueServer
+from run_manifest import RunManifest, STATUS_FAILED
+from photo_cache import DEFAULT_PHOTO_FOLDER
+from place_cache import DEFAULT_PLACE_CACHE_TTL_HOURS
+from http_discovery import DISCOVERY_MODES, DISCOVERY_BROWSER
+from review_extraction import EXTRACTION_MODES, EXTRACTION_BS4
+from review_dataset import DEFAULT_DATASET_PATH
+from review_store import DEFAULT_DATABASE_PATH
+from review_writers import RAW_HTML_MODES, RAW_HTML_LAZY, SINKS, DEFAULT_SINKS
+
+
+EXIT_OK = 0
+EXIT_FAILED = 1  # The run stopped on an error
+EXIT_USAGE = 2  # Bad arguments (argparse)
+EXIT_PARTIAL = 3  # The run finished, but some places failed
+EXIT_INTERRUPTED = 130  # Stopped by Ctrl+C / SIGTERM; run again with --resume to continue
+
+DEFAULT_BATCH_CSV = "location_links_collection.csv"
+DEFAULT_WATCH_INTERVAL = 10
+QUEUE_FOLDERS = ("processing", "done", "failed")
+
+
+class ProgressReporter:
+    """
+    Writes a run's log and progress to stdout, as plain text or as JSON lines.
+
+    Every JSON line has "event" ("log", "progress", "run_started", "run_finished", ...) and
+    "ts"; the other fields depend on the event. Safe to call from the place workers.
+    """
+
+    def __init__(self, json_lines=False, stream=None):
+        self.json_lines = json_lines
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+        self._last_percent = None
+
+    def event(self, kind, **fields):
+        if not self.json_lines:
+            return
+        line = json.dumps(dict(event=kind, ts=round(time.time(), 3), **fields), ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def log(self, message, level="INFO"):
+        if self.json_lines:
+            self.event("log", level=level, message=str(message))
+        else:
+            with self._lock:
+                self.stream.write(f"{message}\n")
+                self.stream.flush()
+
+    def progress(self, percent):
+        # The pipeline reports the same percentage many times; only changes are written
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.event("progress", percent=percent)
+
+
+class ReporterLogHandler(logging.Handler):
+    """Forwards the scrapers' log records to a ProgressReporter."""
+
+    def __init__(self, reporter):
+        super().__init__()
+        self.reporter = reporter
+
+    def emit(self, record):
+        try:
+            self.reporter.log(self.format(record), level=record.levelname)
+        except Exception:
+            self.handleError(record)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scrape Google Maps places and reviews without the GUI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common_options(subparser):
+        subparser.add_argument("--location-scrolls", type=int, default=10, help="Maximum scrolls of the search feed")
+        subparser.add_argument("--review-scrolls", type=int, default=150, help="Maximum scrolls of each review list")
+        subparser.add_argument("--parallelism", type=int, default=1,
+                               choices=range(1, parallel_scraper.MAX_PARALLELISM + 1), metavar="N",
+                               help="Number of places scraped at the same time")
+        subparser.add_argument("--extraction", choices=EXTRACTION_MODES, default=EXTRACTION_BS4)
+        subparser.add_argument("--raw-html", choices=RAW_HTML_MODES, default=RAW_HTML_LAZY,
+                               help="How the original review HTML is kept in the HTML report")
+        subparser.add_argument("--resume", action="store_true",
+                               help="Skip work finished by a previous run and retry only failures")
+        subparser.add_argument("--incremental", action="store_true",
+                               help="Only fetch reviews newer than the ones already in each place's CSV")
+        subparser.add_argument("--streaming", action="store_true",
+                               help="Save and remove reviews from the page while scrolling (flat memory on big places)")
+        subparser.add_argument("--lean", action="store_true",
+                               help="Block images, fonts and media and load pages eagerly")
+        subparser.add_argument("--discovery", choices=DISCOVERY_MODES, default=DISCOVERY_BROWSER,
+                               help="Find places by scrolling the feed in a browser, or with one HTTP request")
+        subparser.add_argument("--sinks", nargs="+", choices=SINKS, default=list(DEFAULT_SINKS),
+                               help="Where reviews are saved: per-place CSV/HTML files, one SQLite database, "
+                                    "and/or a Parquet dataset")
+        subparser.add_argument("--database", default=DEFAULT_DATABASE_PATH, help="SQLite file of the sqlite sink")
+        subparser.add_argument("--dataset", default=DEFAULT_DATASET_PATH, help="Folder of the parquet sink")
+        subparser.add_argument("--place-cache-ttl", type=float, default=DEFAULT_PLACE_CACHE_TTL_HOURS, metavar="HOURS",
+                               help="Scrape a place found by several searches once; with --resume also reuse places "
+                                    "scraped by earlier runs within this many hours (0 disables the cache)")
+        subparser.add_argument("--download-photos", action="store_true",
+                               help="Download review photo thumbnails so the HTML reports show local copies")
+        subparser.add_argument("--photo-folder", default=DEFAULT_PHOTO_FOLDER)
+        subparser.add_argument("--no-trace", action="store_true",
+                               help="Do not write the per-phase timing trace (trace-<time>.jsonl)")
+        subparser.add_argument("--log-file", metavar="PATH",
+                               help="Also write the log to this file (rotated at 5 MB, 3 backups kept)")
+        subparser.add_argument("--json", action="store_true",
+                               help="Write log and progress to stdout as JSON lines")
+
+    single = subparsers.add_parser("single", help="Scrape the places of one Google Maps search URL")
+    single.add_argument("url")
+    single.add_argument("--csv-folder", default="csv_reviews")
+    single.add_argument("--html-folder", default="html_reviews")
+    add_common_options(single)
+
+    batch = subparsers.add_parser("batch", help="Scrape every Location/Link row of a batch CSV")
+    batch.add_argument("csv_path", nargs="?", default=DEFAULT_BATCH_CSV)
+    batch.add_argument("--queue", nargs="?", const="", metavar="FILE_OR_URL",
+                       help="Run through a durable job queue: the one next to the CSV (<csv>.jobs.db), or the given "
+                            "file or http://host:port of a serve-queue. Failed places are retried with backoff, "
+                            "and worker processes can help")
+    batch.add_argument("--token", help="Shared secret of the serve-queue server")
+    batch.add_argument("--shared-volume", action="store_true",
+                       help="The queue file is on a network share used by several machines")
+    add_common_options(batch)
+
+    watch = subparsers.add_parser(
+        "watch", help="Keep running: scrape a batch CSV whenever it changes, or every batch CSV dropped into a folder"
+    )
+    watch.add_argument("path", help="Batch CSV to watch, or queue folder of batch CSVs")
+    watch.add_argument("--interval", type=float, default=DEFAULT_WATCH_INTERVAL, metavar="SECONDS",
+                       help="How often to look for changes")
+    watch.add_argument("--once", action="store_true", help="Process what is there now and exit")
+    add_common_options(watch)
+
+    default_queue = scrape_pipeline.batch_queue_path(DEFAULT_BATCH_CSV)
+
+    def add_queue_options(subparser, default=default_queue):
+        subparser.add_argument("--queue", default=default,
+                               help=f"Job queue: a file (default {default}), or the http://host:port of a serve-queue")
+        subparser.add_argument("--token", help="Shared secret of the serve-queue server")
+        subparser.add_argument("--shared-volume", action="store_true",
+                               help="The queue file is on a network share used by several machines")
+
+    enqueue = subparsers.add_parser("enqueue", help="Add the Location rows of a batch CSV to a job queue")
+    enqueue.add_argument("csv_path", nargs="?", default=DEFAULT_BATCH_CSV)
+    add_queue_options(enqueue, default=None)
+    enqueue.add_argument("--json", action="store_true", help="Write the result as a JSON line")
+
+    worker = subparsers.add_parser("worker", help="Work through the jobs of a job queue, also from other machines")
+    add_queue_options(worker)
+    worker.add_argument("--wait", action="store_true",
+                        help="Keep waiting for new jobs when the queue is empty (stop with Ctrl+C / SIGTERM)")
+    add_common_options(worker)
+
+    jobs = subparsers.add_parser("jobs", help="Show the job counts and dead-lettered jobs of a job queue")
+    add_queue_options(jobs)
+    jobs.add_argument("--retry-dead", action="store_true", help="Put the dead-lettered jobs back in the queue")
+    jobs.add_argument("--json", action="store_true", help="Write the result as a JSON line")
+
+    serve = subparsers.add_parser("serve-queue", help="Share a job queue file with workers on other machines")
+    serve.add_argument("--queue", default=default_queue, help="Job queue file")
+    serve.add_argument("--host", default="127.0.0.1", help="Interface to listen on (0.0.0.0 for other machines)")
+    serve.add_argument("--port", type=int, default=DEFAULT_QUEUE_PORT)
+    serve.add_argument("--token",
+                       help="Shared secret the workers must pass with --token (required unless --host is 127.0.0.1)")
+    serve.add_argument("--json", action="store_true", help="Write the log as JSON lines")
+
+    return parser
+
+
+def settings_from_args(args):
+    return scrape_pipeline.ScrapeSettings(
+        location_scroll=args.location_scrolls,
+        review_scroll=args.review_scrolls,
+        parallelism=args.parallelism,
+        extraction_mode=args.extraction,
+        raw_html_mode=args.raw_html,
+        # A watched CSV or queued batch is picked up again after changes and restarts; never redo finished work
+        resume=args.resume or args.command == "watch",
+        incremental=args.incremental,
+        streaming=args.streaming,
+        lean_browser=args.lean,
+        discovery_mode=args.discovery,
+        sinks=args.sinks,
+        database_path=args.database,
+        dataset_path=args.dataset,
+        place_cache_ttl_hours=args.place_cache_ttl,
+        download_photos=args.download_photos,
+        photo_folder=args.photo_folder,
+        trace=not args.no_trace,
+        # Only batch --queue reads these; worker, enqueue and jobs open their queue with _open_queue
+        job_queue_target=getattr(args, "queue", None) or None,
+        job_queue_token=getattr(args, "token", None),
+        shared_volume=getattr(args, "shared_volume", False),
+    )
+
+
+def _manifest_failures(manifest_path):
+    """Place counts per status of a finished run, plus its failed Location rows."""
+    if not os.path.exists(manifest_path):
+        return {}, 0
+    manifest = RunManifest(manifest_path, resume=True)
+    failed_locations = sum(1 for entry in manifest.data["locations"].values() if entry.get("status") == STATUS_FAILED)
+    return manifest.summary(), failed_locations
+
+
+def _open_queue(args, queue_path=None):
+    return open_job_queue(queue_path or args.queue, token=getattr(args, "token", None),
+                          shared_volume=getattr(args, "shared_volume", False))
+
+
+def _job_counts(open_queue):
+    job_queue = open_queue()
+    try:
+        return job_queue.counts()
+    finally:
+        job_queue.close()
+
+
+def run_scrape(command, source, settings, reporter, stop_event, csv_folder=None, html_folder=None,
+               open_queue=None, wait=False):
+    """
+    Run the single-URL, the batch or the queue worker flow once and report how it ended.
+
+    With open_queue (a callable returning the job queue) a batch runs through that queue and
+    "worker" works on it; the end report then has the job counts instead of the manifest's
+    place counts.
+
+    Returns:
+        int: One of the EXIT_* codes.
+    """
+    reporter.event("run_started", command=command, source=source, settings=settings.as_dict())
+
+    try:
+        if command == "single":
+            completed = scrape_pipeline.run_single(
+                source, csv_folder, html_folder, settings, progress=reporter.progress, stop_event=stop_event,
+            )
+        elif command == "worker":
+            job_queue = open_queue()
+            try:
+                completed = scrape_pipeline.run_queue(
+                    job_queue, settings, progress=reporter.progress, stop_event=stop_event, wait=wait
+                )
+            finally:
+                job_queue.close()
+        elif open_queue is not None:
+            completed = scrape_pipeline.run_batch_queued(
+                source, settings, progress=reporter.progress, stop_event=stop_event
+            )
+        else:
+            completed = scrape_pipeline.run_batch(
+                source, settings, progress=reporter.progress, stop_event=stop_event
+            )
+    except Exception as e:
+        reporter.log(f"❌ Error occurred: {e}", level="ERROR")
+        reporter.event("run_finished", source=source, status="error", error=str(e), exit_code=EXIT_FAILED)
+        return EXIT_FAILED
+
+    if open_queue is not None:
+        jobs = _job_counts(open_queue)
+        report = {"jobs": jobs}
+        has_failures = jobs[JOB_DEAD] > 0
+    else:
+        if command == "single":
+            manifest_path = os.path.join(csv_folder, scrape_pipeline.SINGLE_MANIFEST_NAME)
+        else:
+            manifest_path = scrape_pipeline.batch_manifest_path(source)
+        places, failed_locations = _manifest_failures(manifest_path)
+        report = {"places": places, "failed_locations": failed_locations}
+        has_failures = places.get(STATUS_FAILED) or failed_locations
+
+    if stop_event.is_set():
+        status, code = "stopped", EXIT_INTERRUPTED
+    elif not completed:
+        status, code = "failed", EXIT_FAILED
+    elif has_failures:
+        status, code = "partial", EXIT_PARTIAL
+    else:
+        status, code = "completed", EXIT_OK
+    reporter.event("run_finished", source=source, status=status, exit_code=code, **report)
+    return code
+
+
+def manage_jobs(args, reporter):
+    """The enqueue and jobs commands: fill or inspect a job queue without scraping."""
+    queue_path = args.queue or scrape_pipeline.batch_queue_path(args.csv_path)
+    try:
+        job_queue = _open_queue(args, queue_path)
+    except Exception as e:
+        reporter.log(f"❌ Could not open the job queue {queue_path}: {e}", level="ERROR")
+        return EXIT_FAILED
+    try:
+        if args.command == "enqueue":
+            added = scrape_pipeline.enqueue_batch(args.csv_path, job_queue)
+            reporter.log(f"📬 Queued {added} new locations in {queue_path}")
+            reporter.event("enqueued", queue=queue_path, added=added, jobs=job_queue.counts())
+            return EXIT_OK
+
+        if args.retry_dead:
+            reporter.log(f"🔁 {job_queue.retry_dead()} dead-lettered jobs queued again")
+        counts = job_queue.counts()
+        dead = job_queue.dead_letters()
+        if args.json:
+            reporter.event("jobs", queue=queue_path, jobs=counts, dead=[job.as_dict() for job in dead])
+        else:
+            reporter.log(f"📬 {queue_path}: " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+            for job in dead:
+                reporter.log(f"💀 #{job.job_id} {job.kind} {job.payload.get('link')} "
+                             f"({job.attempts} attempts): {job.last_error}")
+        return EXIT_OK
+    finally:
+        job_queue.close()
+
+
+def _batch_files(csv_path):
+    """A batch CSV and the manifest and place cache kept next to it."""
+    return [csv_path, scrape_pipeline.batch_manifest_path(csv_path), scrape_pipeline.batch_place_cache_path(csv_path)]
+
+
+def watch_csv(csv_path, settings, reporter, stop_event, interval, once=False):
+    """Scrape a batch CSV now and again every time it is saved; Locations already done are skipped."""
+    last_mtime = None
+    code = EXIT_OK
+    while not stop_event.is_set():
+        mtime = os.path.getmtime(csv_path) if os.path.exists(csv_path) else None
+        if mtime is not None and mtime != last_mtime:
+            last_mtime = mtime
+            code = run_scrape("batch", csv_path, settings, reporter, stop_event)
+        if once:
+            break
+        stop_event.wait(interval)
+    return EXIT_INTERRUPTED if stop_event.is_set() else code
+
+
+def watch_queue(folder, settings, reporter, stop_event, interval, once=False):
+    """
+    Scrape every batch CSV dropped into folder, oldest first.
+
+    A job is moved to processing/ while it runs and then, with its manifest and place cache,
+    to done/ (also when only some places failed) or failed/. Jobs left in processing/ by a
+    stopped or crashed daemon are resumed first. Files are picked up once they have not
+    changed for interval seconds, so a CSV still being copied in is not read half-written.
+    """
+    processing, done, failed = (os.path.join(folder, name) for name in QUEUE_FOLDERS)
+    for path in (processing, done, failed):
+        os.makedirs(path, exist_ok=True)
+
+    code = EXIT_OK
+    while not stop_event.is_set():
+        jobs = sorted(glob.glob(os.path.join(processing, "*.csv")))
+        jobs += [
+            path for path in sorted(glob.glob(os.path.join(folder, "*.csv")), key=os.path.getmtime)
+            if time.time() - os.path.getmtime(path) >= interval or once
+        ]
+        for path in jobs:
+            if stop_event.is_set():
+                break
+            if os.path.dirname(path) != processing:
+                path = shutil.move(path, os.path.join(processing, os.path.basename(path)))
+            reporter.event("job_started", job=os.path.basename(path))
+            code = run_scrape("batch", path, settings, reporter, stop_event)
+            if code == EXIT_INTERRUPTED:
+                break  # Stays in processing/ and is resumed on the next start
+            target = failed if code == EXIT_FAILED else done
+            for job_file in _batch_files(path):
+                if os.path.exists(job_file):
+                    shutil.move(job_file, os.path.join(target, os.path.basename(job_file)))
+            reporter.event("job_finished", job=os.path.basename(path), folder=os.path.basename(target), exit_code=code)
+        if once:
+            break
+        stop_event.wait(interval)
+    return EXIT_INTERRUPTED if stop_event.is_set() else code
+
+
+def serve_queue(args, reporter, stop_event):
+    """Serve a job queue file to workers on other machines until stopped."""
+    job_queue = _open_queue(args)
+    try:
+        try:
+            server = JobQueueServer(job_queue, host=args.host, port=args.port, token=args.token)
+        except ValueError as e:
+            reporter.log(f"❌ {e}", level="ERROR")
+            return EXIT_USAGE
+        except OSError as e:
+            reporter.log(f"❌ Could not listen on {args.host}:{args.port}: {e}", level="ERROR")
+            return EXIT_FAILED
+        with server:
+            reporter.log(f"📡 Serving {args.queue} on {server.base_url} (workers: --queue {server.base_url})")
+            reporter.event("queue_server_started", queue=args.queue, url=server.base_url)
+            while not stop_event.wait(1):
+                pass
+    finally:
+        job_queue.close()
+    return EXIT_OK
+
+
+def _stop_on_signals(stop_event, reporter):
+    # First Ctrl+C / SIGTERM: cancel the places in progress, whose browsers are quit within
+    # about 0.1 s, and stop cleanly. Second one: interrupt right away, skipping the clean-up.
+    def handle(signum, frame):
+        if stop_event.is_set():
+            raise KeyboardInterrupt
+        stop_event.set()
+        reporter.log("🛑 Stopping: cancelling the places in progress and closing the browsers "
+                     "(send the signal again to stop now)...")
+
+    signal.signal(signal.SIGINT, handle)
+    signal.signal(signal.SIGTERM, handle)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    reporter = ProgressReporter(json_lines=args.json)
+    if args.command in ("enqueue", "jobs"):
+        return manage_jobs(args, reporter)
+    stop_event = threading.Event()
+    _stop_on_signals(stop_event, reporter)
+    if args.command == "serve-queue":
+        return serve_queue(args, reporter, stop_event)
+    settings = settings_from_args(args)
+
+    # The scrapers log through run_log; in JSON mode stdout carries only the JSON lines, so
+    # anything printed by third-party code goes to stderr
+    log_handlers = [ReporterLogHandler(reporter)]
+    if args.log_file:
+        log_handlers.append(run_log.open_file_log(args.log_file))
+    with redirect_stdout(sys.stderr if args.json else sys.stdout), run_log.attached(*log_handlers):
+        try:
+            if args.command == "single":
+                code = run_scrape("single", args.url, settings, reporter, stop_event,
+                                  csv_folder=args.csv_folder, html_folder=args.html_folder)
+            elif args.command == "batch":
+                queue_path = scrape_pipeline.batch_queue_path(args.csv_path)
+                open_queue = (lambda: settings.open_job_queue(queue_path)) if args.queue is not None else None
+                code = run_scrape("batch", args.csv_path, settings, reporter, stop_event, open_queue=open_queue)
+            elif args.command == "worker":
+                code = run_scrape("worker", args.queue, settings, reporter, stop_event,
+                                  open_queue=lambda: _open_queue(args), wait=args.wait)
+            elif os.path.isdir(args.path):
+                code = watch_queue(args.path, settings, reporter, stop_event, args.interval, once=args.once)
+            else:
+                code = watch_csv(args.path, settings, reporter, stop_event, args.interval, once=args.once)
+        except KeyboardInterrupt:
+            stop_event.set()
+            reporter.log("🛑 Interrupted.")
+            code = EXIT_INTERRUPTED
+
+    # The manifest keeps every finished place; watch mode and queue workers resume by themselves
+    if code == EXIT_INTERRUPTED and args.command not in ("watch", "worker"):
+        reporter.log("Run again with --resume to continue.")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,682 @@
+import functools
+import os
+import socket
+import threading
+
+import parallel_scraper
+from cancellation import ScrapeCancelled
+from http_discovery import DISCOVERY_BROWSER, DISCOVERY_HTTP, create_http_session
+from job_queue import JOB_DEAD, JOB_DONE, LeaseHeartbeat, open_job_queue
+from photo_cache import DEFAULT_PHOTO_FOLDER, PhotoCache
+from place_cache import DEFAULT_PLACE_CACHE_TTL_HOURS, PlaceCache
+from place_identity import canonical_place_id
+from review_extraction import EXTRACTION_BS4, EXTRACTION_NETWORK
+from review_dataset import DEFAULT_DATASET_PATH, ReviewDataset
+from review_store import DEFAULT_DATABASE_PATH, ReviewStore
+from review_writers import RAW_HTML_LAZY, DEFAULT_SINKS, SINK_SQLITE, SINK_PARQUET
+from run_manifest import RunManifest, STATUS_DONE, STATUS_FAILED, STATUS_IN_PROGRESS
+from run_log import carry_context, get_logger
+from run_trace import RunTracer, trace_file_name
+
+# The scrapers, the driver pool and pandas pull in selenium, bs4 and pandas; they are imported
+# by the functions that run those stages, so the command line starts without them.
+
+
+logger = get_logger(__name__)
+
+SINGLE_LINKS_CSV = "location_links.csv"
+SINGLE_MANIFEST_NAME = "run_manifest.json"
+SINGLE_PLACE_CACHE_NAME = "place_cache.json"
+
+# Job kinds of the batch job queue
+JOB_DISCOVER = "discover"  # Collect the place links of one Location row
+JOB_REVIEWS = "reviews"  # Scrape the reviews of one place
+REVIEWS_JOB_PRIORITY = 10  # Finish the places already found before discovering more locations
+QUEUE_POLL_SECONDS = 5  # How often an idle queue worker looks for new or retried jobs
+
+
+class ScrapeSettings:
+    """Options shared by the GUI apps and the command line."""
+
+    def __init__(self, location_scroll=10, review_scroll=150, parallelism=1,
+                 extraction_mode=EXTRACTION_BS4, raw_html_mode=RAW_HTML_LAZY, resume=False, incremental=False,
+                 streaming=False, lean_browser=False, discovery_mode=DISCOVERY_BROWSER, sinks=DEFAULT_SINKS,
+                 database_path=DEFAULT_DATABASE_PATH, dataset_path=DEFAULT_DATASET_PATH,
+                 place_cache_ttl_hours=DEFAULT_PLACE_CACHE_TTL_HOURS, download_photos=False,
+                 photo_folder=DEFAULT_PHOTO_FOLDER, trace=True, job_queue_target=None, job_queue_token=None,
+                 shared_volume=False):
+        self.location_scroll = location_scroll
+        self.review_scroll = review_scroll
+        self.parallelism = parallelism
+        self.extraction_mode = extraction_mode
+        self.raw_html_mode = raw_html_mode
+        self.resume = resume
+        self.incremental = incremental
+        self.streaming = streaming
+        self.lean_browser = lean_browser
+        self.discovery_mode = discovery_mode
+        self.sinks = tuple(sinks)
+        self.database_path = database_path
+        self.dataset_path = dataset_path
+        self.place_cache_ttl_hours = place_cache_ttl_hours
+        self.download_photos = download_photos
+        self.photo_folder = photo_folder
+        self.trace = trace
+        self.job_queue_target = job_queue_target
+        self.job_queue_token = job_queue_token
+        self.shared_volume = shared_volume
+
+    def create_driver_pool(self, tracer=None):
+        from driver_pool import DriverPool, create_chrome_driver, lean_chrome_driver
+        from review_network import network_chrome_driver
+
+        if self.extraction_mode == EXTRACTION_NETWORK:
+            # Review responses are read from the performance log, which has to be enabled at startup
+            factory = functools.partial(network_chrome_driver, lean=self.lean_browser)
+        else:
+            factory = lean_chrome_driver if self.lean_browser else create_chrome_driver
+        return DriverPool(max_size=self.parallelism, driver_factory=factory, tracer=tracer)
+
+    def create_http_session(self):
+        """One keep-alive session for all discovery requests of a run, or None when discovery uses the browser."""
+        return create_http_session() if self.discovery_mode == DISCOVERY_HTTP else None
+
+    def open_review_store(self):
+        """The shared SQLite review store, or None when the SQLite sink is off."""
+        return ReviewStore(self.database_path) if SINK_SQLITE in self.sinks else None
+
+    def open_review_dataset(self):
+        """The Parquet review dataset, or None when the Parquet sink is off."""
+        return ReviewDataset(self.dataset_path) if SINK_PARQUET in self.sinks else None
+
+    def open_place_cache(self, path):
+        """
+        The place cache at path, or None when the TTL is 0 (cache off) or the run is incremental.
+
+        An incremental run has to visit every place for its new reviews, so nothing is reused.
+        Places of earlier runs are only reused when resuming.
+        """
+        if self.place_cache_ttl_hours <= 0 or self.incremental:
+            return None
+        return PlaceCache(path, ttl_hours=self.place_cache_ttl_hours, resume=self.resume)
+
+    def open_photo_cache(self):
+        """The shared photo downloader, or None when photos are only linked."""
+        return PhotoCache(self.photo_folder) if self.download_photos else None
+
+    def open_job_queue(self, default_path):
+        """
+        The job queue of a queued batch: job_queue_target (a file, or the http:// URL of a
+        serve-queue) if set, otherwise the file at default_path (see open_job_queue).
+        """
+        return open_job_queue(self.job_queue_target or default_path, token=self.job_queue_token,
+                              shared_volume=self.shared_volume)
+
+    def create_tracer(self, folder):
+        """Phase timer of a run; writes trace-<timestamp>.jsonl into folder unless tracing is off."""
+        return RunTracer(os.path.join(folder, trace_file_name()) if self.trace else None)
+
+    def as_dict(self):
+        settings = dict(vars(self))
+        # Stored with every run and printed in the run events; never the queue's secret
+        settings["job_queue_token"] = "***" if self.job_queue_token else None
+        return settings
+
+
+def _start_store_run(review_store, kind, source, settings):
+    return review_store.start_run(kind, source=source, settings=settings.as_dict()) if review_store else None
+
+
+def _finish_store_run(review_store, run_id, status):
+    if review_store is not None:
+        review_store.finish_run(run_id, status)
+        review_store.close()
+
+
+def _log_trace_summary(tracer, log):
+    tracer.close()
+    lines = tracer.summary_lines()
+    if lines:
+        log("⏱️ Time per phase and place" + (f" (details in {tracer.path})" if tracer.path else "") + ":")
+        for line in lines:
+            log(line)
+
+
+def batch_manifest_path(csv_path):
+    """The manifest of a batch run lives next to its input CSV."""
+    return os.path.splitext(csv_path)[0] + ".manifest.json"
+
+
+def batch_place_cache_path(csv_path):
+    """The place cache shared by all Location rows of a batch CSV."""
+    return os.path.splitext(csv_path)[0] + ".places.json"
+
+
+def batch_queue_path(csv_path):
+    """The job queue of a batch CSV run through the queue (see run_batch_queued)."""
+    return os.path.splitext(csv_path)[0] + ".jobs.db"
+
+
+def _read_batch_csv(csv_path):
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    if "Location" not in df.columns or "Link" not in df.columns:
+        raise ValueError("CSV file must contain 'Location' and 'Link' columns")
+    return df
+
+
+def location_paths(location_name):
+    """Folder, csv_reviews/ and html_reviews/ subfolders and links CSV of one batch Location."""
+    main_folder = location_name
+    return (main_folder, os.path.join(main_folder, "csv_reviews"), os.path.join(main_folder, "html_reviews"),
+            os.path.join(main_folder, "location_links.csv"))
+
+
+def scrape_location_places(location, links, csv_folder, html_folder, settings, driver_pool, manifest,
+                           log=logger.info, on_progress=None, stop_event=None, review_store=None, run_id=None,
+                           review_dataset=None, category=None, place_cache=None, photo_cache=None, tracer=None):
+    """
+    Scrape the reviews of every place link of one location in parallel, recording each place in the manifest.
+
+    Places already marked done in the manifest are skipped; failed and interrupted ones are retried.
+
+    Parameters:
+        on_progress (callable): Called with the finished fraction (0..1) of this location's places.
+        review_store (ReviewStore): Shared database for the SQLite sink; run_id is the run it records.
+        review_dataset (ReviewDataset): Shared dataset for the Parquet sink.
+        category (str): Batch Location the places belong to, stored with them by the SQLite and Parquet sinks.
+        place_cache (PlaceCache): Places scraped recently under any category; those are linked, not scraped again.
+        photo_cache (PhotoCache): Downloads the review photos for the HTML galleries.
+        tracer (RunTracer): Times the phases of every place.
+
+    Returns:
+        dict: Counts of "completed", "failed", "cancelled" and "skipped" places.
+    """
+    import review_scrapper2
+
+    todo = [link for link in links if not manifest.is_place_done(location, link)]
+    skipped = len(links) - len(todo)
+    if skipped:
+        log(f"⏭️ Skipping {skipped} places already done in a previous run.")
+    if on_progress is not None and links:
+        on_progress(skipped / len(links))
+
+    def scrape_place(link):
+        place_id = canonical_place_id(link)
+        cached = place_cache.lookup(place_id) if place_cache is not None else None
+        if cached is not None:
+            # Same place found by another search: point at the fresh results instead of scraping again
+            outputs = dict(cached["outputs"], shared_from=cached["category"])
+            manifest.finish_place(location, link, outputs=outputs)
+            log(f"♻️ {outputs.get('title', link)} already scraped under {cached['category']}, reusing its reviews.")
+            return outputs
+
+        manifest.start_place(location, link)
+        try:
+            result = review_scrapper2.scrape_reviews_and_save_csv(
+                link, settings.review_scroll, csv_folder, html_folder,
+                driver_pool=driver_pool,
+                extraction_mode=settings.extraction_mode,
+                raw_html_mode=settings.raw_html_mode,
+                incremental=settings.incremental,
+                streaming=settings.streaming,
+                sinks=settings.sinks,
+                review_store=review_store,
+                run_id=run_id,
+                location=category,
+                review_dataset=review_dataset,
+                photo_cache=photo_cache,
+                tracer=tracer,
+                stop_event=stop_event,
+            )
+        except ScrapeCancelled:
+            # Back to pending, so the manifest does not show a stopped place as still running
+            manifest.reset_place(location, link)
+            raise
+        if result is None:
+            # The scraper logs its own errors and returns None; report it as a failed place
+            raise RuntimeError("No reviews were saved (see log)")
+        manifest.finish_place(location, link, outputs=result)
+        if place_cache is not None:
+            place_cache.record(place_id, link, category or location, result)
+        return result
+
+    def place_done(result, completed, total):
+        # Places finish out of order, so progress follows the completed count
+        if result.error is not None:
+            manifest.fail_place(location, result.link, result.error)
+            log(f"❌ Place {result.index + 1} failed: {result.error}")
+        elif not result.cancelled:
+            log(f"✔️ Finished place {completed}/{total}")
+        if on_progress is not None:
+            on_progress((skipped + completed) / len(links))
+
+    summary = parallel_scraper.scrape_places_in_parallel(
+        todo, scrape_place, workers=settings.parallelism,
+        stop_event=stop_event, on_place_done=place_done
+    )
+    summary["skipped"] = skipped
+    return summary
+
+
+def run_single(url, csv_folder, html_folder, settings, log=logger.info, progress=None, stop_event=None):
+    """
+    Discover the places of one Google Maps search URL and scrape their reviews.
+
+    Returns:
+        bool: True if the run finished, False if it was stopped.
+    """
+    import location_scrapper
+    import review_scrapper2
+
+    stop_event = stop_event or threading.Event()
+    progress = progress or (lambda value: None)
+    manifest = RunManifest(os.path.join(csv_folder, SINGLE_MANIFEST_NAME), resume=settings.resume)
+    place_cache = settings.open_place_cache(os.path.join(csv_folder, SINGLE_PLACE_CACHE_NAME))
+    tracer = settings.create_tracer(csv_folder)
+    driver_pool = settings.create_driver_pool(tracer)
+    http_session = settings.create_http_session()
+    review_store = settings.open_review_store()
+    review_dataset = settings.open_review_dataset()
+    photo_cache = settings.open_photo_cache()
+    run_id = _start_store_run(review_store, "single", url, settings)
+    run_status = "failed"
+
+    try:
+        # Step 1: Scrape location links (skipped when resuming a run that already has them)
+        log("🔍 Starting location scraping...")
+        if settings.resume and manifest.location_status(url) == STATUS_DONE and os.path.exists(SINGLE_LINKS_CSV):
+            log("⏭️ Location links already collected in a previous run.")
+        elif not stop_event.is_set():
+            manifest.update_location(url, link=url, status=STATUS_IN_PROGRESS, links_path=SINGLE_LINKS_CSV)
+            location_scrapper.locationScrapper(
+                url, settings.location_scroll, driver_pool=driver_pool, output_csv=SINGLE_LINKS_CSV,
+                discovery_mode=settings.discovery_mode, http_session=http_session, tracer=tracer,
+                stop_event=stop_event,
+            )
+            manifest.update_location(url, status=STATUS_DONE)
+            log("📋 Location links scraped successfully.")
+        progress(25)
+
+        # Step 2: Get the links
+        if stop_event.is_set():
+            return False
+        log("📊 Processing location links...")
+        location_links = review_scrapper2.get_location_links(SINGLE_LINKS_CSV)
+        log(f"🏢 Found {len(location_links)} locations to process.")
+        progress(30)
+
+        # Step 3: Scrape reviews for the locations, several at once
+        log(f"🔍 Processing {len(location_links)} locations with {settings.parallelism} parallel browser(s)...")
+        scrape_location_places(
+            url, location_links, csv_folder, html_folder, settings, driver_pool, manifest,
+            log=log, on_progress=lambda fraction: progress(30 + int(70 * fraction)), stop_event=stop_event,
+            review_store=review_store, run_id=run_id, review_dataset=review_dataset, place_cache=place_cache,
+            photo_cache=photo_cache, tracer=tracer,
+        )
+        if stop_event.is_set():
+            log("🛑 Scraping stopped by user.")
+            run_status = "stopped"
+            return False
+
+        log("✅ All scraping tasks completed successfully!")
+        progress(100)
+        run_status = "completed"
+        return True
+
+    except ScrapeCancelled:
+        log("🛑 Scraping stopped by user.")
+        run_status = "stopped"
+        return False
+
+    finally:
+        driver_pool.close()
+        if http_session is not None:
+            http_session.close()
+        _finish_store_run(review_store, run_id, run_status)
+        if photo_cache is not None:
+            photo_cache.close()
+            log(f"🖼️ Photos: {photo_cache.downloaded} downloaded, {photo_cache.failed} failed")
+        log(f"🧰 Driver pool: {driver_pool.format_stats()}")
+        log(f"🗂️ Manifest: {manifest.summary()}")
+        _log_trace_summary(tracer, log)
+
+
+def run_batch(csv_path, settings, log=logger.info, progress=None, stop_event=None):
+    """
+    Run the search URL of every Location row of a batch CSV and scrape the reviews of the places found.
+
+    Each location gets its own folder with csv_reviews/ and html_reviews/ subfolders. With
+    settings.resume the run manifest next to the CSV is used to skip finished locations and places.
+
+    Returns:
+        bool: True if the batch finished, False if it was stopped.
+    """
+    import location_scrapper
+    import review_scrapper2
+
+    stop_event = stop_event or threading.Event()
+    progress = progress or (lambda value: None)
+
+    # Read the CSV file
+    df = _read_batch_csv(csv_path)
+
+    manifest = RunManifest(batch_manifest_path(csv_path), resume=settings.resume)
+    place_cache = settings.open_place_cache(batch_place_cache_path(csv_path))
+    tracer = settings.create_tracer(os.path.dirname(os.path.abspath(csv_path)))
+    driver_pool = settings.create_driver_pool(tracer)
+    http_session = settings.create_http_session()
+    review_store = settings.open_review_store()
+    review_dataset = settings.open_review_dataset()
+    photo_cache = settings.open_photo_cache()
+    run_id = _start_store_run(review_store, "batch", csv_path, settings)
+    run_status = "failed"
+
+    total_locations = len(df)
+    log(f"📊 Found {total_locations} locations to process")
+
+    try:
+        for processed, (index, row) in enumerate(df.iterrows()):
+            if stop_event.is_set():
+                log("🛑 Scraping stopped by user.")
+                run_status = "stopped"
+                return False
+
+            location_name = row['Location']
+            url = row['Link']
+
+            if manifest.location_status(location_name) == STATUS_DONE:
+                log(f"⏭️ {location_name} already done in a previous run.")
+                progress(int(((processed + 1) / total_locations) * 100))
+                continue
+
+            # Create main folder for this location
+            main_folder, csv_folder, html_folder, links_path = location_paths(location_name)
+
+            # Create all necessary directories
+            os.makedirs(main_folder, exist_ok=True)
+            os.makedirs(csv_folder, exist_ok=True)
+            os.makedirs(html_folder, exist_ok=True)
+
+            log(f"🔍 Processing {location_name} ({index + 1}/{total_locations})")
+            manifest.update_location(location_name, link=url, folder=main_folder,
+                                     links_path=links_path, status=STATUS_IN_PROGRESS)
+
+            try:
+                # Step 1: Scrape location links, unless a previous run already saved them
+                if manifest.location(location_name).get("links_collected") and os.path.exists(links_path):
+                    log("⏭️ Location links already collected in a previous run.")
+                else:
+                    location_scrapper.locationScrapper(
+                        url, settings.location_scroll, driver_pool=driver_pool, output_csv=links_path,
+                        discovery_mode=settings.discovery_mode, http_session=http_session, tracer=tracer,
+                        stop_event=stop_event,
+                    )
+                    manifest.update_location(location_name, links_collected=True)
+
+                # Step 2: Scrape the places of this location
+                location_links = review_scrapper2.get_location_links(links_path)
+                summary = scrape_location_places(
+                    location_name, location_links, csv_folder, html_folder, settings, driver_pool, manifest,
+                    log=log,
+                    on_progress=lambda fraction: progress(int(((processed + fraction) / total_locations) * 100)),
+                    stop_event=stop_event,
+                    review_store=review_store,
+                    run_id=run_id,
+                    review_dataset=review_dataset,
+                    category=location_name,
+                    place_cache=place_cache,
+                    photo_cache=photo_cache,
+                    tracer=tracer,
+                )
+            except ScrapeCancelled:
+                log("🛑 Scraping stopped by user.")
+                run_status = "stopped"
+                return False
+            except Exception as e:
+                log(f"❌ {location_name} failed: {e}")
+                manifest.update_location(location_name, status=STATUS_FAILED, error=str(e))
+                continue
+
+            if stop_event.is_set():
+                log("🛑 Scraping stopped by user.")
+                run_status = "stopped"
+                return False
+
+            status = STATUS_FAILED if summary["failed"] else STATUS_DONE
+            manifest.update_location(location_name, status=status)
+            progress(int(((processed + 1) / total_locations) * 100))
+
+        log("✅ All batch scraping tasks completed successfully!")
+        progress(100)
+        run_status = "completed"
+        return True
+
+    finally:
+        driver_pool.close()
+        if http_session is not None:
+            http_session.close()
+        _finish_store_run(review_store, run_id, run_status)
+        if photo_cache is not None:
+            photo_cache.close()
+            log(f"🖼️ Photos: {photo_cache.downloaded} downloaded, {photo_cache.failed} failed")
+        log(f"🧰 Driver pool: {driver_pool.format_stats()}")
+        log(f"🗂️ Manifest: {manifest.summary()}")
+        _log_trace_summary(tracer, log)
+
+
+def enqueue_batch(csv_path, job_queue):
+    """
+    Queue a discovery job for every Location row of a batch CSV.
+
+    Returns:
+        int: Number of jobs added; rows already in the queue (in any status) are left alone.
+    """
+    added = 0
+    for _, row in _read_batch_csv(csv_path).iterrows():
+        job_id = job_queue.enqueue(JOB_DISCOVER, {"location": row["Location"], "link": row["Link"]},
+                                   dedupe_key=f"{JOB_DISCOVER}:{row['Location']}")
+        if job_id is not None:
+            added += 1
+    return added
+
+
+def run_queue(job_queue, settings, log=logger.info, progress=None, stop_event=None, worker_id=None, wait=False):
+    """
+    Work through the jobs of a JobQueue with settings.parallelism consumers.
+
+    A discovery job collects the place links of a Location row and queues one review job per
+    place; a review job scrapes one place into its Location's folders (see location_paths).
+    Failed jobs are retried with backoff and dead-lettered after their last attempt instead of
+    being lost.
+
+    Other processes, also on other machines (see job_queue.open_job_queue), may work on the same
+    queue at the same time. Review jobs are deduplicated by canonical place id, so a place found
+    by several Location rows or workers is scraped once; outputs are overwritten and reviews
+    upserted, so a job run twice after a lost lease leaves no duplicates.
+
+    Parameters:
+        worker_id (str): Lease owner name of this process; defaults to <host>-<pid>.
+        wait (bool): Keep polling for new jobs when the queue is empty, until stop_event is set.
+
+    Returns:
+        bool: True if the queue was worked off, False if it was stopped.
+    """
+    import location_scrapper
+    import review_scrapper2
+
+    stop_event = stop_event or threading.Event()
+    progress = progress or (lambda value: None)
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    tracer = settings.create_tracer(job_queue.folder)
+    driver_pool = settings.create_driver_pool(tracer)
+    http_session = settings.create_http_session()
+    review_store = settings.open_review_store()
+    review_dataset = settings.open_review_dataset()
+    photo_cache = settings.open_photo_cache()
+    run_id = _start_store_run(review_store, "queue", job_queue.path, settings)
+    run_status = "failed"
+
+    def discover(job):
+        location, link = job.payload["location"], job.payload["link"]
+        _, csv_folder, html_folder, links_path = location_paths(location)
+        os.makedirs(csv_folder, exist_ok=True)
+        os.makedirs(html_folder, exist_ok=True)
+        log(f"🔍 Discovering the places of {location}")
+        location_scrapper.locationScrapper(
+            link, settings.location_scroll, driver_pool=driver_pool, output_csv=links_path,
+            discovery_mode=settings.discovery_mode, http_session=http_session, tracer=tracer,
+            stop_event=stop_event,
+        )
+        links = review_scrapper2.get_location_links(links_path)
+        queued = 0
+        for place_link in links:
+            place_id = canonical_place_id(place_link) or place_link
+            job_id = job_queue.enqueue(JOB_REVIEWS, {"location": location, "link": place_link},
+                                       priority=REVIEWS_JOB_PRIORITY, dedupe_key=f"{JOB_REVIEWS}:{place_id}")
+            if job_id is not None:
+                queued += 1
+        log(f"🏢 {location}: {len(links)} places found, {queued} new review jobs "
+            f"({len(links) - queued} already queued by another Location).")
+        return {"links": len(links), "queued": queued}
+
+    def scrape_reviews(job):
+        location, link = job.payload["location"], job.payload["link"]
+        _, csv_folder, html_folder, _ = location_paths(location)
+        result = review_scrapper2.scrape_reviews_and_save_csv(
+            link, settings.review_scroll, csv_folder, html_folder,
+            driver_pool=driver_pool,
+            extraction_mode=settings.extraction_mode,
+            raw_html_mode=settings.raw_html_mode,
+            incremental=settings.incremental,
+            streaming=settings.streaming,
+            sinks=settings.sinks,
+            review_store=review_store,
+            run_id=run_id,
+            location=location,
+            review_dataset=review_dataset,
+            photo_cache=photo_cache,
+            tracer=tracer,
+            stop_event=stop_event,
+        )
+        if result is None:
+            # The scraper logs its own errors and returns None; fail the job so it is retried
+            raise RuntimeError("No reviews were saved (see log)")
+        log(f"✔️ {result['title']}: {result['review_count']} reviews")
+        return result
+
+    handlers = {JOB_DISCOVER: discover, JOB_REVIEWS: scrape_reviews}
+
+    def report_progress():
+        counts = job_queue.counts()
+        total = sum(counts.values())
+        if total:
+            progress(int((counts[JOB_DONE] + counts[JOB_DEAD]) / total * 100))
+
+    def run_job(job):
+        try:
+            with LeaseHeartbeat(job_queue, job):
+                result = handlers[job.kind](job)
+        except ScrapeCancelled:
+            # Stopped, not failed: hand the job back without counting the attempt
+            job_queue.release(job)
+            log(f"⏸️ Job {job.job_id} returned to the queue.")
+            return
+        except Exception as e:
+            # Selenium errors often have an empty message; keep the exception type with it
+            error = f"{type(e).__name__}: {e}".strip()
+            retry_in = job_queue.fail(job, error)
+            if retry_in is None:
+                log(f"💀 Job {job.job_id} ({job.kind} {job.payload['link']}) dead after "
+                    f"{job.attempts} attempts: {error}")
+            else:
+                log(f"🔁 Job {job.job_id} failed (attempt {job.attempts}/{job.max_attempts}), "
+                    f"retrying in {retry_in:.0f}s: {error}")
+            return
+        if not job_queue.complete(job, result):
+            log(f"⚠️ Job {job.job_id} finished after its lease expired; another worker may have run it too.")
+
+    def consume(number):
+        consumer_id = f"{worker_id}-{number}"
+        while not stop_event.is_set():
+            try:
+                job = job_queue.lease(consumer_id, kinds=list(handlers))
+                # Nothing ready: done when no job is left anywhere, otherwise wait for retries and new jobs
+                if job is None and not wait and job_queue.pending() == 0:
+                    return
+            except Exception as e:
+                # A queue server may be briefly unreachable; keep polling
+                log(f"⚠️ Could not reach the job queue: {e}")
+                job = None
+            if job is None:
+                stop_event.wait(QUEUE_POLL_SECONDS)
+                continue
+            try:
+                run_job(job)
+                report_progress()
+            except Exception as e:
+                # The job's lease then expires and it is retried (review jobs are idempotent)
+                log(f"⚠️ Could not record job {job.job_id} in the job queue: {e}")
+
+    try:
+        counts = job_queue.counts()
+        log(f"📬 {job_queue.pending()} jobs to run ({counts[JOB_DONE]} done, {counts[JOB_DEAD]} dead) "
+            f"with {settings.parallelism} parallel browser(s)")
+        report_progress()
+        consumers = [
+            threading.Thread(target=carry_context(consume), args=(number + 1,), name=f"queue-worker-{number + 1}",
+                             daemon=True)
+            for number in range(settings.parallelism)
+        ]
+        for consumer in consumers:
+            consumer.start()
+        for consumer in consumers:
+            consumer.join()
+
+        if stop_event.is_set():
+            log("🛑 Scraping stopped by user.")
+            run_status = "stopped"
+            return False
+
+        log("✅ All queued jobs are finished!")
+        progress(100)
+        run_status = "completed"
+        return True
+
+    finally:
+        driver_pool.close()
+        if http_session is not None:
+            http_session.close()
+        _finish_store_run(review_store, run_id, run_status)
+        if photo_cache is not None:
+            photo_cache.close()
+            log(f"🖼️ Photos: {photo_cache.downloaded} downloaded, {photo_cache.failed} failed")
+        log(f"🧰 Driver pool: {driver_pool.format_stats()}")
+        log(f"📬 Jobs: {job_queue.counts()}")
+        _log_trace_summary(tracer, log)
+
+
+def run_batch_queued(csv_path, settings, log=logger.info, progress=None, stop_event=None):
+    """
+    Run a batch CSV through its job queue (batch_queue_path) instead of the run manifest.
+
+    Without settings.resume the batch's own queue is emptied first; with it, rows already queued
+    are kept and only new rows are added, so finished jobs are not redone and dead ones stay dead.
+    settings.job_queue_target points the batch at a shared queue instead (a file on a shared
+    volume, or a serve-queue URL), which is never emptied from here: the other nodes' jobs stay.
+
+    Returns:
+        bool: True if the batch finished, False if it was stopped.
+    """
+    job_queue = settings.open_job_queue(batch_queue_path(csv_path))
+    try:
+        if not settings.resume and not settings.job_queue_target:
+            job_queue.clear()
+        elif not settings.resume:
+            log(f"📡 Jobs already in the shared queue {job_queue.path} are kept.")
+        added = enqueue_batch(csv_path, job_queue)
+        log(f"📊 Queued {added} new locations")
+        return run_queue(job_queue, settings, log=log, progress=progress, stop_event=stop_event)
+    finally:
+        job_queue.close()
@@ -0,0 +1,119 @@
+import threading
+import time
+
+
+# Attributes on the container that count the items (and their height) already removed from it
+PRUNED_ITEMS_ATTRIBUTE = "data-pruned-items"
+PRUNED_HEIGHT_ATTRIBUTE = "data-pruned-height"
+
+# Scrolls the container to the bottom and reports how much content it holds, pruned items included
+_SCROLL_AND_MEASURE_JS = """
+var el = arguments[0], selector = arguments[1], endSelector = arguments[2];
+if (arguments[3]) { el.scrollTop = el.scrollHeight; }
+return [
+    (selector ? el.querySelectorAll(selector).length : el.children.length)
+        + parseInt(el.getAttribute('%s') || '0', 10),
+    el.scrollHeight + parseInt(el.getAttribute('%s') || '0', 10),
+    endSelector ? el.querySelector(endSelector) !== null : false
+];
+""" % (PRUNED_ITEMS_ATTRIBUTE, PRUNED_HEIGHT_ATTRIBUTE)
+
+# Reasons returned in ScrollResult.reason
+REASON_END = "end_of_list"
+REASON_TARGET = "target_count"
+REASON_BUDGET = "time_budget"
+REASON_MAX_SCROLLS = "max_scrolls"
+REASON_STOPPED = "stopped"
+REASON_CANCELLED = "cancelled"
+
+
+class ScrollResult:
+    """Summary of one scroll_until_stable run."""
+
+    def __init__(self, item_count, scrolls, reason, elapsed):
+        self.item_count = item_count
+        self.scrolls = scrolls
+        self.reason = reason
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return (f"ScrollResult(items={self.item_count}, scrolls={self.scrolls}, "
+                f"reason={self.reason!r}, elapsed={self.elapsed:.1f}s)")
+
+
+def scroll_until_stable(driver, container, item_selector=None, max_scrolls=None, target_count=None,
+                        time_budget=None, idle_timeout=3.0, poll_interval=0.2, end_selector=None,
+                        on_progress=None, stop_event=None):
+    """
+    Scroll a lazily loaded list until it stops growing.
+
+    After every scroll the container's item count and scrollHeight are polled, and the
+    next scroll happens as soon as new content lands instead of after a fixed sleep.
+    The list is considered finished when nothing new arrives within idle_timeout seconds
+    or when end_selector appears inside the container. Items that on_progress removed from
+    the container (see review_stream) still count, so pruning does not look like an end.
+
+    Parameters:
+        driver: Selenium WebDriver.
+        container: The scrollable WebElement (search feed or review panel).
+        item_selector (str): CSS selector of the list items; direct children are counted if omitted.
+        max_scrolls (int): Hard cap on the number of scrolls.
+        target_count (int): Stop once this many items are loaded.
+        time_budget (float): Stop after this many seconds.
+        idle_timeout (float): Seconds to wait for new content before deciding the list ended.
+        poll_interval (float): Seconds between DOM checks while waiting.
+        end_selector (str): CSS selector of an "end of list" marker.
+        on_progress (callable): Called as on_progress(item_count, scrolls) after every scroll;
+            returning True stops scrolling.
+        stop_event (threading.Event): When set, scrolling ends within one poll_interval.
+
+    Returns:
+        ScrollResult: Final item count, scrolls performed and why scrolling stopped.
+    """
+    stop_event = stop_event or threading.Event()
+    started = time.monotonic()
+    count, height, at_end = driver.execute_script(
+        _SCROLL_AND_MEASURE_JS, container, item_selector, end_selector, False
+    )
+    scrolls = 0
+
+    def result(reason):
+        return ScrollResult(count, scrolls, reason, time.monotonic() - started)
+
+    while True:
+        if stop_event.is_set():
+            return result(REASON_CANCELLED)
+        if target_count and count >= target_count:
+            return result(REASON_TARGET)
+        if at_end:
+            return result(REASON_END)
+        if max_scrolls is not None and scrolls >= max_scrolls:
+            return result(REASON_MAX_SCROLLS)
+        if time_budget is not None and time.monotonic() - started >= time_budget:
+            return result(REASON_BUDGET)
+
+        new_count, new_height, at_end = driver.execute_script(
+            _SCROLL_AND_MEASURE_JS, container, item_selector, end_selector, True
+        )
+        scrolls += 1
+
+        # Wait only until something new shows up, not for a fixed amount of time
+        deadline = time.monotonic() + idle_timeout
+        while new_count <= count and new_height <= height and not at_end:
+            if time.monotonic() >= deadline:
+                break
+            if time_budget is not None and time.monotonic() - started >= time_budget:
+                break
+            if stop_event.wait(poll_interval):
+                return result(REASON_CANCELLED)
+            new_count, new_height, at_end = driver.execute_script(
+                _SCROLL_AND_MEASURE_JS, container, item_selector, end_selector, False
+            )
+
+        grew = new_count > count or new_height > height
+        count, height = max(count, new_count), max(height, new_height)
+
+        if on_progress is not None and on_progress(count, scrolls):
+            return result(REASON_STOPPED)
+        if not grew:
+            return result(REASON_END)
@@ -0,0 +1,31 @@
+"""
+Two runs writing to the same Parquet dataset must not erase each other's manifest entries.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT]
+
+pytest.importorskip("pyarrow")
+
+from review_dataset import MANIFEST_NAME, ReviewDataset  # noqa: E402
+from review_model import ReviewRecord  # noqa: E402
+
+
+def test_concurrent_runs_keep_each_others_manifest_entries(tmp_path):
+    root = str(tmp_path / "dataset")
+    # Both runs load the manifest before either writes, like two processes started together
+    first, second = ReviewDataset(root), ReviewDataset(root)
+    record = ReviewRecord(review_id="r1", username="user", rating_value=5, max_rating=5, review_text="ok")
+
+    first.write_place("place-a", "A", "Cafe", [record])
+    second.write_place("place-b", "B", "Cafe", [record])
+    first.write_place("place-c", "C", "Bar", [record])
+
+    with open(os.path.join(root, MANIFEST_NAME), encoding="utf-8") as manifest_file:
+        files = json.load(manifest_file)["files"]
+    assert sorted(entry["place_id"] for entry in files.values()) == ["place-a", "place-b", "place-c"]
@@ -0,0 +1,140 @@
+"""
+A stopped rerun of a place or a Location search must not replace the output of an earlier complete
+run, and must keep what it collected before the stop in the .partial files.
+
+Runs against the fake Google Maps server and the scripted browser of the load harness,
+so neither Chrome nor the network is needed.
+"""
+import csv
+import glob
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+import location_scrapper  # noqa: E402
+import review_scrapper2  # noqa: E402
+import review_stream  # noqa: E402
+from cancellation import ScrapeCancelled  # noqa: E402
+from driver_pool import DriverPool  # noqa: E402
+from fake_maps_server import FakeMapsConfig, FakeMapsServer, place_url  # noqa: E402
+from fake_webdriver import fake_driver_factory  # noqa: E402
+from review_writers import partial_output_path  # noqa: E402
+
+REVIEWS = 200
+PLACES = 30
+
+
+@pytest.fixture
+def place(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = FakeMapsConfig(places=1, reviews=(REVIEWS, REVIEWS), latency_ms=1, jitter_ms=0, slow_rate=0,
+                            error_rate=0)
+    with FakeMapsServer(config) as server:
+        feature_id, name = server._search_results("Stop")[0]
+        pool = DriverPool(driver_factory=fake_driver_factory(server.base_url))
+        try:
+            yield place_url(feature_id, name), pool
+        finally:
+            pool.close()
+
+
+def _rows(path):
+    with open(path, encoding="utf-8", newline="") as csv_file:
+        return sum(1 for _ in csv.reader(csv_file)) - 1
+
+
+def _stop_after_first_harvest(monkeypatch, stop_event):
+    harvest = review_stream.ReviewHarvester.harvest
+
+    def harvest_then_stop(self, final=False):
+        records = harvest(self, final=final)
+        stop_event.set()
+        return records
+
+    monkeypatch.setattr(review_stream.ReviewHarvester, "harvest", harvest_then_stop)
+
+
+def test_stopped_streaming_rerun_keeps_complete_output(place, monkeypatch):
+    url, pool = place
+    result = review_scrapper2.scrape_reviews_and_save_csv(url, 50, "csv", "html", driver_pool=pool, streaming=True)
+    assert _rows(result["csv_path"]) == REVIEWS
+    with open(result["html_path"], encoding="utf-8") as html_file:
+        complete_html = html_file.read()
+
+    stop_event = threading.Event()
+    _stop_after_first_harvest(monkeypatch, stop_event)
+    with pytest.raises(ScrapeCancelled):
+        review_scrapper2.scrape_reviews_and_save_csv(url, 50, "csv", "html", driver_pool=pool, streaming=True,
+                                                     stop_event=stop_event)
+
+    assert _rows(result["csv_path"]) == REVIEWS
+    with open(result["html_path"], encoding="utf-8") as html_file:
+        assert html_file.read() == complete_html
+    assert 0 < _rows(partial_output_path(result["csv_path"])) < REVIEWS
+    assert os.path.exists(partial_output_path(result["html_path"]))
+    assert not glob.glob(os.path.join("csv", "*.part")) and not glob.glob(os.path.join("html", "*.part"))
+
+
+def test_stopped_buffered_rerun_keeps_parsed_reviews(place, monkeypatch):
+    url, pool = place
+    result = review_scrapper2.scrape_reviews_and_save_csv(url, 50, "csv", "html", driver_pool=pool)
+    assert _rows(result["csv_path"]) == REVIEWS
+
+    stop_event = threading.Event()
+    extract = review_scrapper2.extract_reviews_from_page
+
+    def extract_then_stop(*args, **kwargs):
+        for index, record in enumerate(extract(*args, **kwargs)):
+            if index == 50:
+                stop_event.set()
+            yield record
+
+    monkeypatch.setattr(review_scrapper2, "extract_reviews_from_page", extract_then_stop)
+    with pytest.raises(ScrapeCancelled):
+        review_scrapper2.scrape_reviews_and_save_csv(url, 50, "csv", "html", driver_pool=pool,
+                                                     stop_event=stop_event)
+
+    assert _rows(result["csv_path"]) == REVIEWS
+    assert 0 < _rows(partial_output_path(result["csv_path"])) < REVIEWS
+
+    # The next complete run replaces the file and removes the partial copy
+    monkeypatch.setattr(review_scrapper2, "extract_reviews_from_page", extract)
+    review_scrapper2.scrape_reviews_and_save_csv(url, 50, "csv", "html", driver_pool=pool)
+    assert not os.path.exists(partial_output_path(result["csv_path"]))
+
+
+def test_stopped_location_search_keeps_found_links(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = FakeMapsConfig(places=PLACES, reviews=(1, 1), latency_ms=1, jitter_ms=0, slow_rate=0, error_rate=0)
+    with FakeMapsServer(config) as server:
+        pool = DriverPool(driver_factory=fake_driver_factory(server.base_url))
+        try:
+            url = FakeMapsServer.search_url("Stop")
+            location_scrapper.locationScrapper(url, 50, driver_pool=pool, output_csv="links.csv")
+            assert _rows("links.csv") == PLACES
+
+            stop_event = threading.Event()
+            scroll = location_scrapper.scroll_until_stable
+
+            def scroll_then_stop(*args, on_progress=None, **kwargs):
+                def progress_then_stop(count, scrolls):
+                    stopped = on_progress(count, scrolls)
+                    stop_event.set()
+                    return stopped
+
+                return scroll(*args, on_progress=progress_then_stop, **kwargs)
+
+            monkeypatch.setattr(location_scrapper, "scroll_until_stable", scroll_then_stop)
+            with pytest.raises(ScrapeCancelled):
+                location_scrapper.locationScrapper(url, 50, driver_pool=pool, output_csv="links.csv",
+                                                   stop_event=stop_event)
+        finally:
+            pool.close()
+
+    assert _rows("links.csv") == PLACES
+    assert 0 < _rows("links.partial.csv") < PLACES